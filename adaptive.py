@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+import metrics
+
+# Adaptive (AIMD) concurrency: how many requests each host gets in flight.
+#
+# Every host has a window that starts at CRICBUZZ_CONCURRENCY and moves
+# between CRICBUZZ_MIN_CONCURRENCY and CRICBUZZ_MAX_CONCURRENCY like TCP's
+# congestion window:
+#   - additive increase: each good response while the window is full adds
+#     1/window, so a window's worth of good responses adds one slot
+#   - multiplicative decrease: a 429 / 5xx / connection error halves it, and
+#     a p95 latency (over the last SAMPLES responses) above
+#     CRICBUZZ_LATENCY_TARGET seconds cuts it by LATENCY_BACKOFF. Responses
+#     to requests sent before the last cut don't cut again, so one bad
+#     moment costs one cut, not one per request in flight.
+# The token bucket (fetcher.bucket_for) still caps the request rate; the
+# window only decides how many of those requests may overlap.
+#
+#   window = window_for(url)
+#   window.acquire()  /  await window.acquire_async()
+#   start = time.perf_counter()
+#   ... request ...
+#   window.release(start, status)  # status None when the request raised
+#
+# The current size is exported as the concurrency_window gauge.
+# CRICBUZZ_ADAPTIVE=0 pins every window at CRICBUZZ_CONCURRENCY.
+
+SAMPLES = 50  # responses in the latency window
+MIN_SAMPLES = 10  # before p95 is trusted
+ERROR_BACKOFF = 0.5
+LATENCY_BACKOFF = 0.7
+THROTTLED = {429, 500, 502, 503, 504}
+
+
+class Window:
+    def __init__(self, host: str, initial: int = None):
+        self.host = host
+        initial = initial or config.CRAWL_CONCURRENCY
+        if config.ADAPTIVE_CONCURRENCY:
+            self.lower = config.MIN_CONCURRENCY
+            self.upper = max(config.MAX_CONCURRENCY, self.lower)
+        else:
+            self.lower = self.upper = initial
+        self.limit = float(min(max(initial, self.lower), self.upper))
+        self.in_flight = 0
+        self.latencies = deque(maxlen=SAMPLES)
+        self.last_cut = 0.0
+        self.smallest = self.largest = int(self.limit)
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._waiters = deque()  # (loop, future) of asyncio callers
+        metrics.gauge("concurrency_window", int(self.limit), host=host)
+
+    @property
+    def size(self) -> int:
+        return int(self.limit)
+
+    def acquire(self):
+        with self._ready:
+            while self.in_flight >= self.size:
+                self._ready.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < self.size:
+                    self.in_flight += 1
+                    return
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # Pass on a wake-up this caller won't use
+                with self._lock:
+                    self._wake()
+                raise
+
+    def release(self, start: Optional[float], status: Optional[int]):
+        """Give the slot back; `start` is the perf_counter() the request was sent at (None if it never was)."""
+        now = time.perf_counter()
+        with self._lock:
+            self.in_flight -= 1
+            if start is not None and self.lower < self.upper:
+                self._adjust(start, now - start, status)
+            self._wake()
+
+    def _adjust(self, start: float, seconds: float, status: Optional[int]):
+        # Called with _lock held
+        before = self.size
+        if status is None or status in THROTTLED:
+            self._cut(start, ERROR_BACKOFF, "error" if status is None else status)
+        else:
+            self.latencies.append(seconds)
+            if len(self.latencies) >= MIN_SAMPLES and self._p95() > config.LATENCY_TARGET:
+                self._cut(start, LATENCY_BACKOFF, "latency")
+            elif self.in_flight + 1 >= before:
+                # Only grow a window that is actually in use
+                self.limit = min(self.upper, self.limit + 1 / self.limit)
+        if self.size != before:
+            self.smallest = min(self.smallest, self.size)
+            self.largest = max(self.largest, self.size)
+            metrics.gauge("concurrency_window", self.size, host=self.host)
+
+    def _cut(self, start: float, factor: float, reason):
+        if start < self.last_cut:
+            return
+        self.limit = max(self.lower, self.limit * factor)
+        self.last_cut = time.perf_counter()
+        # Latencies from before the cut would only trigger it again
+        self.latencies.clear()
+        metrics.inc("concurrency_cuts_total", host=self.host, reason=reason)
+
+    def _p95(self) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _wake(self):
+        # Called with _lock held: let as many waiters retry as there are free slots
+        free = self.size - self.in_flight
+        if free <= 0:
+            return
+        self._ready.notify(free)
+        while free > 0 and self._waiters:
+            loop, future = self._waiters.popleft()
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(_set_result, future)
+            free -= 1
+
+
+def _set_result(future):
+    if not future.done():
+        future.set_result(None)
+
+
+_windows = {}
+_windows_lock = threading.Lock()
+
+
+def window_for(url: str, initial: int = None) -> Window:
+    host = urlsplit(url).netloc
+    with _windows_lock:
+        if host not in _windows:
+            _windows[host] = Window(host, initial)
+        return _windows[host]
+
+
+def totals() -> Tuple[int, int]:
+    """(requests in flight, sum of the windows) over every host."""
+    with _windows_lock:
+        return sum(w.in_flight for w in _windows.values()), sum(w.size for w in _windows.values())
+
+
+def report():
+    with _windows_lock:
+        windows = list(_windows.values())
+    for w in windows:
+        if w.lower < w.upper:
+            print(f"🚦 {w.host}: concurrency window {w.size} (ranged {w.smallest}-{w.largest})")
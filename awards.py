@@ -1,19 +1,24 @@
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import sqlite3
-import time
 import re
 
-# List of matches provided by the user
-MATCH_IDS = [
-    116441, 121389, 121400, 121406, 133000, 133011, 133017, 
-    137826, 137831, 140537, 140548, 140559
-]
+import config
+import crawl_state
+import db
+import frontier
+import migrate
+import profiling
+import revalidation
+from crawler import crawl
+from fetcher import NOT_MODIFIED
+from extractors import register, page_url
+from parsing import make_soup
 
-DB_PATH = "cricbuzz.db"
+DB_PATH = config.DB_PATH
 
 def init_db():
+    migrate.migrate(DB_PATH)
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
@@ -34,6 +39,9 @@ def init_db():
     conn.commit()
     conn.close()
 
+POM_RE = re.compile(r"PLAYER OF THE MATCH", re.I)
+PROFILE_RE = re.compile(r"/profiles/")
+
 def get_player_of_the_match(soup):
     """
     Robust strategy to find Player of the Match.
@@ -41,9 +49,11 @@ def get_player_of_the_match(soup):
     """
     # Strategy 1: Search for the text directly
     # This text is usually in a label or span
-    pom_text_nodes = soup.find_all(string=re.compile(r"PLAYER OF THE MATCH", re.I))
+    # Walk the matches lazily (find / find_next) so we stop at the first hit
+    # instead of scanning every text node in the page up front.
+    node = soup.find(string=POM_RE)
     
-    for node in pom_text_nodes:
+    while node is not None:
         # The node is a NavigableString. We want to check its container and nearby elements.
         # Usually structure is:
         # <div class="cb-mo-ply-id">
@@ -53,7 +63,9 @@ def get_player_of_the_match(soup):
         
         # Check parent container
         parent = node.parent
-        if not parent: continue
+        if not parent:
+            node = node.find_next(string=POM_RE)
+            continue
         
         # Traverse up a few levels to find a container that might hold the link
         # Usually it's the direct parent or grandparent
@@ -61,76 +73,90 @@ def get_player_of_the_match(soup):
         for _ in range(3): # Check parent, grandparent, great-grandparent
             if not container: break
             
-            link = container.find("a", href=re.compile(r"/profiles/"))
+            link = container.find("a", href=PROFILE_RE)
             if link:
                 return link
             container = container.parent
+        
+        node = node.find_next(string=POM_RE)
             
     return None
 
+def save_awards(cursor, match_id, awards):
+    # Clean up existing entry for this match/award
+    cursor.executemany("""
+        DELETE FROM match_awards 
+        WHERE match_id=? AND award_name=?
+    """, [(int(match_id), award_name) for p_id, award_name in awards])
+    
+    cursor.executemany("""
+        INSERT OR IGNORE INTO match_awards (match_id, player_id, award_name)
+        VALUES (?, ?, ?)
+    """, [(int(match_id), p_id, award_name) for p_id, award_name in awards])
+
+@register("match", "awards", save=save_awards)
+def extract_awards(soup, match_id):
+    """List of (player_id, award_name) found on the match page."""
+    link = get_player_of_the_match(soup)
+    
+    if not link:
+        print(f"   ⚠️ Match {match_id}: 'Player of the Match' NOT found in page.")
+        return []
+    
+    href = link['href']
+    p_name = link.get_text().strip()
+    
+    # Extract ID from /profiles/123/name
+    m = re.search(r"/profiles/(\d+)/", href)
+    p_id = int(m.group(1)) if m else None
+    
+    if not p_id:
+        print(f"   ⚠️ Found name {p_name} but could not extract ID from {href}")
+        return []
+    
+    print(f"   ✅ Found: {p_name} ({p_id})")
+    return [(p_id, "Player of the Match")]
+
 def scrape_awards():
     init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
+    crawl_state.init_db()
+    state = crawl_state.load(["awards"])
+    writer = db.BatchWriter()
+    revalidate = revalidation.Revalidation("awards", lambda mid: crawl_state.is_done(state, mid, "awards"))
     
-    for match_id in MATCH_IDS:
+    def handle(match_id, r):
         print(f"Processing Match ID: {match_id}...")
         
-        url = f"https://www.cricbuzz.com/live-cricket-scores/{match_id}/match"
-        
         try:
-            r = requests.get(url, headers=headers, timeout=10)
+            if r.status_code == NOT_MODIFIED:
+                print("   ⏭️ Unchanged since last run.")
+                return
             if r.status_code != 200:
                 print(f"❌ Failed to fetch page. Status: {r.status_code}")
-                # Try fallback url structure just in case redirect fails
-                # url = f"https://www.cricbuzz.com/cricket-scores/{match_id}/match"
-                # r = requests.get(url, headers=headers, timeout=10)
-                continue
-                
-            soup = BeautifulSoup(r.text, "html.parser")
-            
-            link = get_player_of_the_match(soup)
-            
-            if link:
-                href = link['href']
-                p_name = link.get_text().strip()
-                
-                # Extract ID from /profiles/123/name
-                m = re.search(r"/profiles/(\d+)/", href)
-                p_id = int(m.group(1)) if m else None
+                crawl_state.mark_failed(writer, match_id, "awards", f"HTTP {r.status_code}")
+                return
                 
-                if p_id:
-                    print(f"   ✅ Found: {p_name} ({p_id})")
-                    
-                    # Clean up existing entry for this match/award
-                    # Clean up existing entry for this match/award
-                    cursor.execute("""
-                        DELETE FROM match_awards 
-                        WHERE match_id=? AND award_name='Player of the Match'
-                    """, (int(match_id),))
-                    
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO match_awards (match_id, player_id, award_name)
-                        VALUES (?, ?, ?)
-                    """, (int(match_id), p_id, "Player of the Match"))
-                    
-                    conn.commit()
-                else:
-                    print(f"   ⚠️ Found name {p_name} but could not extract ID from {href}")
-            else:
-                print(f"   ⚠️ Match {match_id}: 'Player of the Match' NOT found in page.")
+            soup = make_soup(r.text)
             
-            time.sleep(1.0)
+            awards = extract_awards(soup, match_id)
+            crawl_state.save_stage(writer, state, match_id, "awards", awards, save_awards)
+            revalidate.save(writer, r)
             
         except Exception as e:
             print(f"❌ Error processing {match_id}: {e}")
+            crawl_state.mark_failed(writer, match_id, "awards", e)
 
-    conn.close()
-    print("Done.")
+    todo = crawl_state.pending(frontier.match_ids(), ["awards"], state)
+    jobs = [(match_id, page_url("match", match_id)) for match_id in todo]
+    crawl(jobs, handle, timeout=10, revalidation=revalidate)
+
+    writer.close()
+    print(f"Done. {writer.stats()}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the player of the match of every match in the frontier.")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
     scrape_awards()
@@ -0,0 +1,284 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import db
+import parsing
+from bench_parsers import load_from_dir
+from extractors import PAGE_ORDER, extractors_for, load_all, page_regions
+from stub_server import FIRST_MATCH_ID, Site, make_server
+
+# Benchmark suite: is a change making ingestion faster or slower?
+#
+#   python3 bench.py                          # all stages, compared to bench_results/baseline.json
+#   python3 bench.py --stages parse write     # skip the end-to-end run
+#   python3 bench.py --dir corpus/            # parse/write on saved pages instead of synthetic ones
+#   python3 bench.py --save-baseline          # make this run the new baseline
+#
+# Stages (every result is a rate, higher is better):
+#   parse    pages/s to build the soup of each page type, and for every
+#            extractor on a prebuilt soup (get_match_details, the scorecard
+#            row loops, process_col, get_player_of_the_match, ...) plus
+#            parse_player_details on profiles
+#   write    rows/s into each table, saving the extracted records through
+#            db.BatchWriter into a scratch DB
+#   e2e      matches/min for discover + ingest against stub_server.py
+#
+# The default corpus is generated by stub_server.Site with a fixed seed, so
+# runs on the same machine are comparable. Each run is written to
+# bench_results/<time>.json; any metric more than --threshold below the
+# baseline is reported and the exit status is 1.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = "bench_results"
+BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+STAGES = ["parse", "write", "e2e"]
+
+
+@contextlib.contextmanager
+def quiet():
+    # Extractors and scrapers print progress lines; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def synthetic_corpus(matches, seed=0):
+    """page_type -> [(id, html)] from the stub site."""
+    site = Site(matches, matches * 22, seed)
+    pages = defaultdict(list)
+    for mid in range(FIRST_MATCH_ID, FIRST_MATCH_ID + matches):
+        pages["squads"].append((mid, site.squads_page(mid)))
+        pages["match"].append((mid, site.match_page(mid)))
+        pages["scorecard"].append((mid, site.scorecard_page(mid)))
+        for pid in site.xi(mid, site.fixture(mid)[0])[:2]:
+            pages["profile"].append((pid, site.profile_page(pid)))
+    return pages
+
+
+def dir_corpus(path):
+    # Saved pages carry no ID; number them so saves don't collide
+    return {page_type: list(enumerate(htmls, start=1)) for page_type, htmls in load_from_dir(path).items()}
+
+
+def best_of(repeat, fn):
+    # Fastest of `repeat` runs with the GC off, like timeit: the minimum is
+    # the least disturbed by whatever else the machine is doing
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with quiet():
+                fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return max(best, 1e-9)
+
+
+def bench_parse(pages, repeat):
+    from enrich_players import parse_player_details
+
+    metrics = {}
+    for page_type in PAGE_ORDER:
+        htmls = pages.get(page_type)
+        if not htmls:
+            continue
+        regions = page_regions(page_type)
+        elapsed = best_of(repeat, lambda: [parsing.make_soup(html, regions=regions) for _, html in htmls])
+        metrics[f"parse.{page_type}.soup pages/s"] = len(htmls) / elapsed
+
+        soups = [(i, parsing.make_soup(html, regions=regions)) for i, html in htmls]
+        for ex in extractors_for(page_type):
+            elapsed = best_of(repeat, lambda: [ex.extract(soup, i) for i, soup in soups])
+            metrics[f"parse.{page_type}.{ex.name} pages/s"] = len(soups) / elapsed
+
+    if pages.get("profile"):
+        profiles = pages["profile"]
+        elapsed = best_of(repeat, lambda: [parse_player_details(html) for _, html in profiles])
+        metrics["parse.profile.player_details pages/s"] = len(profiles) / elapsed
+    return metrics
+
+
+def scratch_db(path):
+    # Create the schema the way the scripts do, in a child process so the
+    # module-level DB_PATH of every script points at the scratch file
+    env = dict(os.environ, CRICBUZZ_DB=path, PYTHONPATH=HERE)
+    subprocess.run([sys.executable, "-c", "import ingest; ingest.init_all()"], env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def bench_write(pages, workdir, repeat):
+    import squads
+    from enrich_players import parse_player_details, update_player
+    from extractors import records_of, run_extractors
+
+    with quiet():
+        records = {page_type: [(i, run_extractors(page_type, i, html)) for i, html in pages[page_type]]
+                   for page_type in PAGE_ORDER if pages.get(page_type)}
+        profiles = [(i, parse_player_details(html)) for i, html in pages.get("profile", [])]
+
+    schema = os.path.join(workdir, "schema.db")
+    scratch_db(schema)
+    # Squads first, so later stages update rows that exist
+    stages = [(ex.name, ex.save, [(i, records_of(results[ex.name])[0]) for i, results in records[page_type] if ex.name in results])
+              for page_type in records for ex in extractors_for(page_type) if ex.save]
+    stages.append(("profile", lambda cursor, pid, row: update_player(cursor, pid, *row), profiles))
+
+    best = {}
+    for n in range(repeat):
+        # Every run starts from an empty copy of the schema
+        path = os.path.join(workdir, f"write{n}.db")
+        shutil.copy(schema, path)
+        squads.reset_known_players(empty=True)  # the copy has no players yet
+        rows, seconds = defaultdict(int), defaultdict(float)
+        writer = db.BatchWriter(db.connect(path))
+        for name, save, items in stages:
+            before = dict(writer.rows)
+            start = time.perf_counter()
+            with quiet():
+                for i, result in items:
+                    save(writer, i, result)
+                writer.flush()
+            elapsed = time.perf_counter() - start
+            for table, count in writer.rows.items():
+                if count > before.get(table, 0):
+                    rows[table] += count - before.get(table, 0)
+                    seconds[table] += elapsed
+        if writer.failed and n == 0:
+            print(f"⚠️ {writer.failed} rows failed to write")
+        writer.close()
+        for table in rows:
+            best[table] = max(best.get(table, 0), rows[table] / max(seconds[table], 1e-9))
+    return {f"write.{table} rows/s": best[table] for table in sorted(best)}
+
+
+def bench_e2e(matches, workdir, latency_ms, workers):
+    server = make_server("127.0.0.1", 0, Site(matches, matches * 22), latency_ms=latency_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    env = dict(os.environ, PYTHONPATH=HERE, CRICBUZZ_DB=os.path.join(workdir, "e2e.db"),
+               CRICBUZZ_BASE_URL=f"http://127.0.0.1:{server.server_address[1]}",
+               CRICBUZZ_HOST_RATE="10000", CRICBUZZ_HOST_BURST="100", CRICBUZZ_CONCURRENCY="16",
+               CRICBUZZ_CACHE="0", CRICBUZZ_PAGE_ARCHIVE="0", CRICBUZZ_HTTP_MODE="live")
+
+    def run(script, *args):
+        subprocess.run([sys.executable, os.path.join(HERE, script), *args], env=env, cwd=workdir, check=True,
+                       stdout=subprocess.DEVNULL)
+
+    try:
+        run("discover.py")
+        start = time.perf_counter()
+        run("ingest.py", "--workers", str(workers))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    conn = sqlite3.connect(env["CRICBUZZ_DB"])
+    done = conn.execute("SELECT COUNT(*) FROM master WHERE match_id >= ?", (FIRST_MATCH_ID,)).fetchone()[0]
+    conn.close()
+    return {"e2e.ingest matches/min": done / elapsed * 60}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(metrics, baseline, threshold):
+    """Names of metrics that dropped more than `threshold` below the baseline."""
+    regressions = []
+    print(f"\n{'METRIC':<48} {'BASELINE':>12} {'NOW':>12} {'CHANGE':>8}")
+    print("-" * 84)
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<48} {'-':>12} {value:>12.1f}")
+            continue
+        change = value / base - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<48} {base:>12.1f} {value:>12.1f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse, write and end-to-end ingestion speed.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--dir", help="corpus of <page_type>_*.html files (default: synthetic pages)")
+    parser.add_argument("--matches", type=int, default=100, help="matches in the synthetic corpus (default 100)")
+    parser.add_argument("--e2e-matches", type=int, default=200, help="matches served for the end-to-end run (default 200)")
+    parser.add_argument("--latency", type=float, default=20, help="stub server latency in ms for the end-to-end run (default 20)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="ingest parser processes")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs for parse and write timings (default 5)")
+    parser.add_argument("--baseline", default=BASELINE, help=f"results to compare against (default {BASELINE})")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before a metric counts as a regression (default 0.10)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write the results to {BASELINE}")
+    args = parser.parse_args()
+
+    load_all()
+    pages = dir_corpus(args.dir) if args.dir else synthetic_corpus(args.matches)
+    print(f"Corpus: {', '.join(f'{len(v)} {k}' for k, v in sorted(pages.items()))} ({args.dir or 'synthetic'})")
+
+    metrics = {}
+    workdir = tempfile.mkdtemp(prefix="cricbuzz-bench-")
+    try:
+        if "parse" in args.stages:
+            print("⏱️ parse...")
+            metrics.update(bench_parse(pages, args.repeat))
+        if "write" in args.stages:
+            print("⏱️ write...")
+            metrics.update(bench_write(pages, workdir, args.repeat))
+        if "e2e" in args.stages:
+            print(f"⏱️ end-to-end ({args.e2e_matches} matches, {args.latency:.0f} ms latency)...")
+            metrics.update(bench_e2e(args.e2e_matches, workdir, args.latency, args.workers))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parser": parsing.resolve_backend(),
+        "corpus": args.dir or f"synthetic:{args.matches}",
+        "metrics": metrics,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    for path in [out] + ([BASELINE] if args.save_baseline else []):
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+    print(f"Results written to {out}")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != result["corpus"]:
+            print(f"⚠️ Baseline was run on {baseline.get('corpus')}, this run on {result['corpus']}")
+    regressions = compare(metrics, baseline.get("metrics", {}), args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) more than {args.threshold:.0%} slower than the baseline")
+        sys.exit(1)
+    print("\n✅ No regressions" if baseline else "\nNo baseline to compare with (use --save-baseline).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import time
+import tracemalloc
+import zlib
+from collections import defaultdict
+
+import config
+import parsing
+from extractors import extractors_for, load_all, run_extractors
+from page_archive import URL_TYPES, classify
+
+# Compare parser backends on saved pages.
+#
+#   python3 bench_parsers.py                      # pages from page_cache.db
+#   python3 bench_parsers.py --save corpus/       # freeze the cache into .html files
+#   python3 bench_parsers.py --dir corpus/        # run on a frozen corpus
+#
+# For each page type it times a full parse, a partial parse of just the
+# regions the extractors declared, and parse + every registered extractor,
+# and prints the speedup over the stdlib html.parser. Peak memory is for
+# one full vs one partial parse of the largest page.
+
+def load_from_cache(path):
+    pages = defaultdict(list)
+    conn = sqlite3.connect(path)
+    for url, body in conn.execute("SELECT url, body FROM pages"):
+        page_type, _ = classify(url)
+        if page_type:
+            pages[page_type].append(zlib.decompress(body).decode("utf-8"))
+    conn.close()
+    return pages
+
+
+def load_from_dir(path):
+    # Files are named <page_type>_<anything>.html
+    pages = defaultdict(list)
+    for fname in sorted(os.listdir(path)):
+        page_type = fname.split("_", 1)[0]
+        if fname.endswith(".html") and page_type in dict(URL_TYPES):
+            with open(os.path.join(path, fname), encoding="utf-8") as f:
+                pages[page_type].append(f.read())
+    return pages
+
+
+def save_corpus(pages, path):
+    os.makedirs(path, exist_ok=True)
+    for page_type, htmls in pages.items():
+        for i, html in enumerate(htmls):
+            with open(os.path.join(path, f"{page_type}_{i:05d}.html"), "w", encoding="utf-8") as f:
+                f.write(html)
+    print(f"Saved {sum(len(h) for h in pages.values())} pages to {path}")
+
+
+def extract(page_type, html):
+    if page_type == "profile":
+        from enrich_players import parse_player_details
+        return parse_player_details(html)
+    return run_extractors(page_type, 0, html)
+
+
+def regions_of(page_type):
+    # Everything the region-aware extractors asked for, even if another
+    # extractor on the same page still needs the full tree
+    if page_type == "profile":
+        return None
+    regions = []
+    for ex in extractors_for(page_type):
+        regions += [r for r in (ex.regions or []) if r not in regions]
+    return regions or None
+
+
+def time_backend(backend, page_type, htmls, repeat):
+    config.PARSER = backend
+    regions = regions_of(page_type)
+    best_parse = best_partial = best_full = float("inf")
+    # Extractors print progress lines; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for html in htmls:
+                parsing.make_soup(html)
+            best_parse = min(best_parse, time.perf_counter() - start)
+
+            if regions:
+                start = time.perf_counter()
+                for html in htmls:
+                    parsing.make_soup(html, regions=regions)
+                best_partial = min(best_partial, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for html in htmls:
+                extract(page_type, html)
+            best_full = min(best_full, time.perf_counter() - start)
+    return best_parse, best_partial, best_full
+
+
+def peak_kb(html, regions=None):
+    tracemalloc.start()
+    soup = parsing.make_soup(html, regions=regions)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del soup
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved pages.")
+    parser.add_argument("--dir", help="directory of <page_type>_*.html files (default: page cache)")
+    parser.add_argument("--save", help="write the loaded pages to this directory and exit")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = parser.parse_args()
+
+    pages = load_from_dir(args.dir) if args.dir else load_from_cache(config.CACHE_PATH)
+    if args.save:
+        save_corpus(pages, args.save)
+        return
+    if not pages:
+        print("No saved pages found. Run a scraper first or pass --dir.")
+        return
+
+    load_all()
+    backends = [b for b in parsing.BACKENDS if parsing._available[b]()]
+    print(f"Backends: {', '.join(backends)}")
+    print(f"{'PAGE TYPE':<10} {'PAGES':>6} {'BACKEND':<12} {'PARSE ms/pg':>12} {'PARTIAL ms/pg':>14} {'EXTRACT ms/pg':>14} {'SPEEDUP':>8}")
+    print("-" * 84)
+    for page_type, htmls in sorted(pages.items()):
+        baseline = None
+        n = len(htmls)
+        for backend in reversed(backends):  # html.parser first, it's the baseline
+            parse_s, partial_s, full_s = time_backend(backend, page_type, htmls, args.repeat)
+            if baseline is None:
+                baseline = full_s
+            partial = f"{partial_s / n * 1000:.2f}" if partial_s != float("inf") else "-"
+            print(f"{page_type:<10} {n:>6} {backend:<12} {parse_s / n * 1000:>12.2f} {partial:>14} {full_s / n * 1000:>14.2f} {baseline / full_s:>7.1f}x")
+
+        regions = regions_of(page_type)
+        if regions:
+            largest = max(htmls, key=len)
+            print(f"{'':<10} peak memory, full vs {', '.join(regions)}: {peak_kb(largest):.0f} KB -> {peak_kb(largest, regions):.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
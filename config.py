@@ -0,0 +1,96 @@
+import os
+
+# Shared settings for all scrapers.
+# Anything here can be overridden from the environment so the same scripts
+# can point at a different DB or host without editing code.
+
+DB_PATH = os.environ.get("CRICBUZZ_DB", "cricbuzz.db")
+BASE_URL = os.environ.get("CRICBUZZ_BASE_URL", "https://www.cricbuzz.com").rstrip("/")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+# --- Politeness budget ---
+# Every host gets a token bucket: HOST_RATE requests/sec on average,
+# with short bursts of up to HOST_BURST. Cache hits don't use tokens.
+HOST_RATE = float(os.environ.get("CRICBUZZ_HOST_RATE", 1.0))
+HOST_BURST = int(os.environ.get("CRICBUZZ_HOST_BURST", 2))
+
+# Requests in flight per host to start with. The window then adapts between
+# MIN and MAX: it grows while responses are fast and clean, and shrinks on
+# 429 / 5xx / errors or a p95 latency above LATENCY_TARGET (see adaptive.py)
+CRAWL_CONCURRENCY = int(os.environ.get("CRICBUZZ_CONCURRENCY", 4))
+ADAPTIVE_CONCURRENCY = os.environ.get("CRICBUZZ_ADAPTIVE", "1") == "1"
+MIN_CONCURRENCY = int(os.environ.get("CRICBUZZ_MIN_CONCURRENCY", 1))
+MAX_CONCURRENCY = int(os.environ.get("CRICBUZZ_MAX_CONCURRENCY", 32))
+LATENCY_TARGET = float(os.environ.get("CRICBUZZ_LATENCY_TARGET", 2.0))  # seconds
+
+# --- Retries (see resilience.py) ---
+RETRY_ATTEMPTS = int(os.environ.get("CRICBUZZ_RETRIES", 4))  # attempts per URL, including the first
+RETRY_BASE_DELAY = float(os.environ.get("CRICBUZZ_RETRY_BASE_DELAY", 1.0))  # seconds, doubled per attempt
+RETRY_MAX_DELAY = float(os.environ.get("CRICBUZZ_RETRY_MAX_DELAY", 60.0))  # cap, also for Retry-After
+# A host's circuit opens after this many failures in a row and stays open for the cooldown
+BREAKER_FAILURES = int(os.environ.get("CRICBUZZ_BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN = float(os.environ.get("CRICBUZZ_BREAKER_COOLDOWN", 30.0))
+# Total seconds one URL may spend waiting on an open circuit before it is given up
+BREAKER_MAX_WAIT = float(os.environ.get("CRICBUZZ_BREAKER_MAX_WAIT", 300.0))
+
+# --- Player enrichment schedule (see enrich_players.py) ---
+# Enriched profiles are re-checked about every ENRICH_TTL_DAYS. Failed or
+# incomplete ones are retried after ENRICH_RETRY_HOURS, doubling each time
+# up to ENRICH_RETRY_MAX_DAYS.
+ENRICH_TTL_DAYS = float(os.environ.get("CRICBUZZ_ENRICH_TTL_DAYS", 90))
+ENRICH_RETRY_HOURS = float(os.environ.get("CRICBUZZ_ENRICH_RETRY_HOURS", 6))
+ENRICH_RETRY_MAX_DAYS = float(os.environ.get("CRICBUZZ_ENRICH_RETRY_MAX_DAYS", 30))
+
+# Re-process matches whose stages are already marked done in crawl_state
+FORCE_RECRAWL = os.environ.get("CRICBUZZ_FORCE", "0") == "1"
+
+# --- HTML parsing ---
+# "html.parser" (stdlib, slowest), "lxml", "selectolax" (lexbor pre-pass that
+# strips scripts/styles, then lxml) or "auto" = fastest one installed.
+PARSER = os.environ.get("CRICBUZZ_PARSER", "auto")
+
+# --- Page cache ---
+# Fetched HTML is kept (compressed) in a side SQLite file so that two scripts
+# reading the same page only hit the network once.
+CACHE_ENABLED = os.environ.get("CRICBUZZ_CACHE", "1") != "0"
+CACHE_PATH = os.environ.get("CRICBUZZ_CACHE_PATH", "page_cache.db")
+CACHE_TTL = int(os.environ.get("CRICBUZZ_CACHE_TTL", 6 * 3600))  # seconds, for pages that can still change
+CACHE_MAX_BYTES = int(os.environ.get("CRICBUZZ_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # compressed size
+
+# --- HTTP archive (see http_archive.py) ---
+# "live", "record" (store every response) or "replay" (serve only from the archive, no network)
+HTTP_MODE = os.environ.get("CRICBUZZ_HTTP_MODE", "live")
+ARCHIVE_PATH = os.environ.get("CRICBUZZ_ARCHIVE", "http_archive.db")
+
+# --- Page archive (see page_archive.py) ---
+# Every fetched page is kept (deduplicated, compressed) so reparse.py can
+# rebuild the tables offline
+PAGE_ARCHIVE_ENABLED = os.environ.get("CRICBUZZ_PAGE_ARCHIVE", "1") != "0"
+PAGE_ARCHIVE_PATH = os.environ.get("CRICBUZZ_PAGE_ARCHIVE_PATH", "page_archive")
+
+# --- Database writes (see db.py) ---
+DB_BATCH_SIZE = int(os.environ.get("CRICBUZZ_DB_BATCH", 500))  # rows per transaction
+DB_CACHE_MB = int(os.environ.get("CRICBUZZ_DB_CACHE_MB", 64))
+DB_MMAP_MB = int(os.environ.get("CRICBUZZ_DB_MMAP_MB", 256))
+# WAL needs all processes on one host; use DELETE when the DB sits on a
+# shared file system for workers on several machines (see work_queue.py)
+DB_JOURNAL = os.environ.get("CRICBUZZ_DB_JOURNAL", "WAL")
+DB_BUSY_TIMEOUT = float(os.environ.get("CRICBUZZ_DB_BUSY_TIMEOUT", 30))  # seconds to wait for another writer
+
+# --- Metrics (see metrics.py) ---
+# Counters and latency histograms, written as <script>.prom / <script>.json on exit
+METRICS_ENABLED = os.environ.get("CRICBUZZ_METRICS", "1") != "0"
+METRICS_DIR = os.environ.get("CRICBUZZ_METRICS_DIR", "metrics")
+
+# --- Profiling (see profiling.py) ---
+# Per-stage cProfile, sampled flamegraph stacks and tracemalloc; slows a run down
+PROFILE_ENABLED = os.environ.get("CRICBUZZ_PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get("CRICBUZZ_PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.environ.get("CRICBUZZ_PROFILE_INTERVAL", 10))
+
+# --- Distributed ingest (see work_queue.py) ---
+# A claimed job goes back to the queue if its worker stops heartbeating this long
+LEASE_SECONDS = int(os.environ.get("CRICBUZZ_LEASE_SECONDS", 300))
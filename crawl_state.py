@@ -0,0 +1,150 @@
+import hashlib
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List
+
+import config
+import db
+
+# Per-match, per-stage checkpoints.
+#
+# A stage is one extractor (see extractors.py): "squad", "match_details",
+# "awards", "batting", "bowling", "leaders". Each (match_id, stage) row says
+# whether that extractor's rows are saved, when it last succeeded, how many
+# times it was tried and a fingerprint of the records it saved.
+#
+#   - reruns skip stages that are already done (CRICBUZZ_FORCE=1 / --force redoes them)
+#   - failed stages (including pages where nothing was found) are retried on the next run
+#   - pending stages saved what a live / upcoming match shows so far; like
+#     failed ones they are fetched again until the result is final
+#   - the checkpoint is written through the same cursor / batch as the rows
+#     themselves, so after a crash a rerun resumes from the last commit
+#   - records whose fingerprint didn't change are not rewritten
+
+DONE = "done"
+FAILED = "failed"
+PENDING = "pending"
+
+State = namedtuple("State", ["status", "last_success", "attempts", "fingerprint"])
+
+
+def init_db():
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_state (
+            match_id INTEGER,
+            stage TEXT,
+            status TEXT NOT NULL,
+            last_success REAL,
+            attempts INTEGER DEFAULT 0,
+            fingerprint TEXT,
+            last_error TEXT,
+            updated_at REAL,
+            PRIMARY KEY (match_id, stage)
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def reset(stages: Iterable[str]):
+    """Forget every checkpoint of these stages, e.g. after their table was rebuilt."""
+    stages = list(stages)
+    conn = db.connect()
+    conn.execute(f"DELETE FROM crawl_state WHERE stage IN ({','.join('?' * len(stages))})", stages)
+    conn.commit()
+    conn.close()
+
+
+def load(stages: Iterable[str], match_ids: Iterable[int] = None) -> Dict[tuple, State]:
+    """(match_id, stage) -> State for these stages (of these matches, if given), in one query."""
+    stages = list(stages)
+    where, params = f"stage IN ({','.join('?' * len(stages))})", stages
+    if match_ids is not None:
+        match_ids = [int(mid) for mid in match_ids]
+        where += f" AND match_id IN ({','.join('?' * len(match_ids))})"
+        params = stages + match_ids
+    conn = db.connect()
+    rows = conn.execute(f"""
+        SELECT match_id, stage, status, last_success, attempts, fingerprint
+        FROM crawl_state WHERE {where}
+    """, params).fetchall()
+    conn.close()
+    return {(mid, stage): State(*rest) for mid, stage, *rest in rows}
+
+
+def is_done(state: Dict[tuple, State], match_id: int, stage: str) -> bool:
+    s = state.get((match_id, stage))
+    return s is not None and s.status == DONE
+
+
+def pending(match_ids: Iterable[int], stages: List[str], state: Dict[tuple, State], force: bool = None) -> List[int]:
+    """Matches with at least one of `stages` not done yet."""
+    if force is None:
+        force = config.FORCE_RECRAWL
+    match_ids = list(match_ids)
+    if force:
+        return match_ids
+    todo = [mid for mid in match_ids if not all(is_done(state, mid, s) for s in stages)]
+    skipped = len(match_ids) - len(todo)
+    if skipped:
+        print(f"⏭️  Skipping {skipped} matches already done for {', '.join(stages)} (set CRICBUZZ_FORCE=1 to redo)")
+    return todo
+
+
+def fingerprint(records) -> str:
+    return hashlib.sha1(repr(records).encode("utf-8")).hexdigest()
+
+
+def mark_done(cursor, match_id: int, stage: str, fp: str = None):
+    now = time.time()
+    cursor.execute("""
+        INSERT INTO crawl_state (match_id, stage, status, last_success, attempts, fingerprint, last_error, updated_at)
+        VALUES (?, ?, 'done', ?, 1, ?, NULL, ?)
+        ON CONFLICT(match_id, stage) DO UPDATE SET
+            status='done', last_success=excluded.last_success, attempts=attempts + 1,
+            fingerprint=excluded.fingerprint, last_error=NULL, updated_at=excluded.updated_at
+    """, (int(match_id), stage, now, fp, now))
+
+
+def mark_failed(cursor, match_id: int, stage: str, error: str):
+    cursor.execute("""
+        INSERT INTO crawl_state (match_id, stage, status, attempts, last_error, updated_at)
+        VALUES (?, ?, 'failed', 1, ?, ?)
+        ON CONFLICT(match_id, stage) DO UPDATE SET
+            status='failed', attempts=attempts + 1,
+            last_error=excluded.last_error, updated_at=excluded.updated_at
+    """, (int(match_id), stage, str(error), time.time()))
+
+
+def mark_pending(cursor, match_id: int, stage: str, fp: str = None):
+    cursor.execute("""
+        INSERT INTO crawl_state (match_id, stage, status, attempts, fingerprint, last_error, updated_at)
+        VALUES (?, ?, 'pending', 1, ?, 'match not finished', ?)
+        ON CONFLICT(match_id, stage) DO UPDATE SET
+            status='pending', attempts=attempts + 1, fingerprint=excluded.fingerprint,
+            last_error=excluded.last_error, updated_at=excluded.updated_at
+    """, (int(match_id), stage, fp, time.time()))
+
+
+def save_stage(cursor, state: Dict[tuple, State], match_id: int, stage: str, records, save,
+               complete: bool = True) -> bool:
+    """
+    save(cursor, match_id, records) and checkpoint the stage, unless the
+    records are identical to what was saved last time. With `complete`
+    False (the match isn't over) the records are saved but the stage is
+    left pending instead of done.
+    Returns False when nothing was written.
+    """
+    if not records:
+        # Nothing on the page yet (match not started, layout change...): retry next run
+        mark_failed(cursor, match_id, stage, "no records found")
+        return False
+    fp = fingerprint(records)
+    status = DONE if complete else PENDING
+    prev = state.get((match_id, stage))
+    if prev is not None and prev.status == status and prev.fingerprint == fp:
+        return False
+    save(cursor, match_id, records)
+    (mark_done if complete else mark_pending)(cursor, match_id, stage, fp)
+    return True
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Callable, Iterable, List, Tuple, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import adaptive
+import config
+import http_archive
+import metrics
+import profiling
+import resilience
+from fetcher import NOT_MODIFIED, Page, bucket_for, record_fetch, replay_page, store_response, validator_of
+from page_cache import get_cache
+
+# A job is (key, url) or (key, [url, fallback_url, ...]).
+# The handler is called as handler(key, page) for every job, in completion order.
+# Jobs whose every URL raised (timeout, connection error) are logged and skipped.
+# With a revalidation.Revalidation, pages already processed are requested
+# conditionally and come back as 304 when they haven't changed.
+# Two jobs asking for the same URL at the same time share one request.
+Job = Tuple[object, Union[str, List[str]]]
+
+
+class Crawler:
+    """
+    Async fetch engine shared by all scrapers.
+    Each host is throttled by its own token bucket (see fetcher.bucket_for)
+    and its own adaptive concurrency window (see adaptive.py), which starts
+    at `concurrency`. Enough workers run for the windows to grow into.
+    """
+
+    def __init__(self, concurrency: int = None, timeout: int = 15, revalidation=None):
+        self.concurrency = concurrency or config.CRAWL_CONCURRENCY
+        self.revalidation = revalidation
+        self.workers = max(self.concurrency, config.MAX_CONCURRENCY) if config.ADAPTIVE_CONCURRENCY else self.concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self._flights = {}  # (url, conditional headers) -> task of the request in progress
+
+    def window(self) -> str:
+        """Requests in flight / allowed, over every host."""
+        in_flight, size = adaptive.totals()
+        return f"{in_flight}/{size or self.concurrency}"
+
+    async def _get(self, session: aiohttp.ClientSession, url: str, headers: dict = None):
+        """One network attempt inside the host's window: (status, headers, text, seconds)."""
+        # Window slot first, then the token (see fetcher._get)
+        window = adaptive.window_for(url, self.concurrency)
+        await window.acquire_async()
+        start, status = None, None
+        try:
+            await asyncio.sleep(bucket_for(url).reserve())
+            start = time.perf_counter()
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as r:
+                text = await r.text(errors="replace")
+                status = r.status
+                return status, r.headers, text, time.perf_counter() - start
+        finally:
+            window.release(start, status)
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str, headers: dict = None) -> Page:
+        archive = http_archive.get_archive()
+        if archive and http_archive.mode() == "replay":
+            return replay_page(archive, url, headers)
+        if archive:
+            # Recording: always fetch the full page, a 304 has nothing to archive
+            headers = None
+
+        cache = get_cache()
+        if cache and not archive:
+            html = cache.get(url)
+            if html is not None:
+                record_fetch(url, 200, "cache")
+                return Page(url, 200, html, True)
+
+        # Coalesce: wait for a request already in progress for this URL
+        key = (url, tuple(sorted(headers.items())) if headers else ())
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(self._fetch_network(session, url, headers))
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            metrics.inc("fetches_coalesced_total", host=urlsplit(url).netloc)
+        # shield: a cancelled caller doesn't cancel the others' request
+        return await asyncio.shield(task)
+
+    async def _fetch_network(self, session: aiohttp.ClientSession, url: str, headers: dict = None) -> Page:
+        # Retry loop: see resilience.py
+        retry = resilience.Retry(url)
+        page = None
+        while True:
+            wait = retry.breaker_wait()
+            if wait:
+                delay = retry.blocked(wait)
+            else:
+                try:
+                    status, response_headers, text, seconds = await self._get(session, url, headers)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    metrics.inc("http_errors_total", host=urlsplit(url).netloc, error=type(e).__name__)
+                    delay = retry.failed(exc=e)
+                else:
+                    record_fetch(url, status, "network", text, seconds)
+                    page = Page(url, status, text, False, validator_of(response_headers))
+                    if not retry.should_retry(status):
+                        retry.succeeded()
+                        store_response(url, status, response_headers, text)
+                        return page
+                    delay = retry.failed(status=status, headers=response_headers)
+                    if delay is None:
+                        store_response(url, status, response_headers, text)
+                finally:
+                    retry.release()
+            if delay is None:
+                if page is None:
+                    raise resilience.GaveUp(f"{url}: {retry.error}")
+                return page
+            await asyncio.sleep(delay)
+
+    async def _fetch_job(self, session, key, urls) -> Page:
+        page = None
+        for url in urls:
+            conditional = self.revalidation.headers(key, url) if self.revalidation else None
+            try:
+                page = await self.fetch(session, url, conditional)
+            except resilience.GaveUp as e:
+                print(f"❌ Error fetching {e}")
+                continue
+            except Exception as e:
+                print(f"❌ Error fetching {url}: {e!r}")
+                metrics.inc("http_errors_total", host=urlsplit(url).netloc, error=type(e).__name__)
+                continue
+            if conditional is not None:
+                page = self.revalidation.check(page)
+            if page.status_code in (200, NOT_MODIFIED):
+                break
+        return page
+
+    async def arun(self, jobs: Iterable[Job], handler: Callable):
+        """
+        Fetch every job with `workers` coroutines pulling from the same
+        iterator, so jobs are consumed lazily. If the handler is async the
+        worker waits for it, which lets a slow consumer hold back fetching.
+        """
+        jobs = iter(jobs)
+        connector = aiohttp.TCPConnector(limit=self.workers)
+        async with aiohttp.ClientSession(headers=config.HEADERS, connector=connector) as session:
+            async def worker():
+                for key, urls in jobs:
+                    if isinstance(urls, str):
+                        urls = [urls]
+                    self.in_flight += 1
+                    try:
+                        page = await self._fetch_job(session, key, urls)
+                    finally:
+                        self.in_flight -= 1
+                    if page is None:
+                        continue
+                    result = handler(key, page)
+                    if asyncio.iscoroutine(result):
+                        await result
+
+            await asyncio.gather(*(worker() for _ in range(self.workers)))
+
+    def run(self, jobs: Iterable[Job], handler: Callable):
+        with profiling.stage("fetch"):
+            asyncio.run(self.arun(jobs, handler))
+        adaptive.report()
+
+
+def crawl(jobs: Iterable[Job], handler: Callable, concurrency: int = None, timeout: int = 15, revalidation=None):
+    Crawler(concurrency, timeout, revalidation).run(jobs, handler)
@@ -0,0 +1,175 @@
+import re
+import sqlite3
+import time
+from collections import defaultdict
+
+import config
+import metrics
+import profiling
+
+# Shared SQLite access for the scrapers.
+#
+# connect() opens the DB with pragmas tuned for a write-heavy ingest:
+#   - WAL: readers (display, enrich queries) don't block the writer and
+#     commits only append to the log instead of rewriting pages
+#   - synchronous=NORMAL: fsync at checkpoints, not on every commit
+#     (safe with WAL; a power cut can only lose the last few commits)
+#   - bigger page cache + mmap so index lookups on large tables stay in memory
+#
+# BatchWriter queues rows and writes them with executemany, one transaction
+# per batch, instead of one execute (and often one commit) per row.
+
+TABLE_RE = re.compile(r"\b(?:INTO|UPDATE|FROM)\s+(\w+)", re.I)
+KIND_RE = re.compile(r"^\s*(INSERT|REPLACE|UPDATE|DELETE)\b", re.I)
+
+
+def connect(path: str = None, **kwargs) -> sqlite3.Connection:
+    kwargs.setdefault("timeout", config.DB_BUSY_TIMEOUT)
+    conn = sqlite3.connect(path or config.DB_PATH, **kwargs)
+    conn.execute(f"PRAGMA journal_mode={config.DB_JOURNAL}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{config.DB_CACHE_MB * 1024}")  # negative = KiB
+    conn.execute(f"PRAGMA mmap_size={config.DB_MMAP_MB * 1024 * 1024}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class BatchWriter:
+    """
+    Cursor-like write buffer: execute() / executemany() queue rows instead
+    of running them, and flush() writes everything queued in one
+    transaction. Anything written as save(cursor, ...) works unchanged
+    when handed a BatchWriter.
+
+    Consecutive rows of the same statement are grouped into one
+    executemany; the order of statements is kept, so e.g. the flag
+    UPDATEs of one match never run before the squad INSERTs of another.
+    """
+
+    def __init__(self, conn: sqlite3.Connection = None, batch_size: int = None):
+        self.conn = conn or connect()
+        self.batch_size = batch_size or config.DB_BATCH_SIZE
+        self.pending = []  # [(sql, [params, ...]), ...] in queue order
+        self.queued = 0
+        self.callbacks = []  # after_flush() functions for the rows queued so far
+
+        # Throughput counters
+        self.rows = defaultdict(int)  # table -> rows inserted or updated (deletes aren't writes here)
+        self.flushes = 0
+        self.failed = 0
+        self.flush_seconds = 0.0
+        self.started = time.monotonic()
+
+    def _rows_for(self, sql: str) -> list:
+        if not self.pending or self.pending[-1][0] != sql:
+            self.pending.append((sql, []))
+        return self.pending[-1][1]
+
+    def execute(self, sql: str, params=()):
+        self._rows_for(sql).append(params)
+        self.queued += 1
+        if self.queued >= self.batch_size:
+            self.flush()
+
+    def after_flush(self, fn):
+        """
+        Call fn(committed) after the next flush, i.e. once the rows queued
+        so far are written. committed is False if the batch failed and was
+        replayed row by row.
+        """
+        self.callbacks.append(fn)
+
+    def executemany(self, sql: str, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        self._rows_for(sql).extend(rows)
+        self.queued += len(rows)
+        if self.queued >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        with profiling.stage("write"):
+            self._flush()
+
+    def _flush(self):
+        pending, self.pending, self.queued = self.pending, [], 0
+        callbacks, self.callbacks = self.callbacks, []
+        start = time.monotonic()
+        try:
+            with self.conn:
+                counts = [(sql, self.conn.executemany(sql, rows).rowcount) for sql, rows in pending]
+            for sql, n in counts:
+                self._count(sql, n)
+            committed = True
+        except sqlite3.Error as e:
+            # The batch was rolled back; replay it row by row so one bad
+            # row doesn't cost the whole batch
+            print(f"⚠️ Batch write failed ({e}), retrying row by row...")
+            self._write_rows(pending)
+            committed = False
+        for fn in callbacks:
+            fn(committed)
+        self.flushes += 1
+        self.flush_seconds += time.monotonic() - start
+        metrics.observe("db_commit_seconds", time.monotonic() - start)
+
+    def _write_rows(self, pending):
+        for sql, rows in pending:
+            table = table_of(sql)
+            for i, params in enumerate(rows):
+                try:
+                    with self.conn:
+                        n = self.conn.execute(sql, params).rowcount
+                    self._count(sql, n)
+                except sqlite3.IntegrityError as e:
+                    print(f"❌ {table}: {e} for {params!r}")
+                    self.failed += 1
+                    metrics.inc("rows_failed_total", table=table)
+                except sqlite3.Error as e:
+                    # Missing table / column etc.: every row of the statement fails the same way
+                    print(f"❌ {table}: {e} ({len(rows) - i} rows dropped)")
+                    self.failed += len(rows) - i
+                    metrics.inc("rows_failed_total", len(rows) - i, table=table)
+                    break
+
+    def _count(self, sql: str, n: int):
+        # n: rows the statement actually changed (an ignored INSERT or an UPDATE matching nothing is 0)
+        if n <= 0:
+            return
+        table, kind = table_of(sql), kind_of(sql)
+        if kind != "delete":
+            self.rows[table] += n
+        metrics.inc("rows_written_total", n, table=table, kind=kind)
+
+    def stats(self) -> str:
+        total = sum(self.rows.values())
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        per_table = ", ".join(f"{t}={n}" for t, n in sorted(self.rows.items()))
+        return (
+            f"{total} rows in {self.flushes} batches "
+            f"({total / elapsed:.0f} rows/s overall, "
+            f"{total / max(self.flush_seconds, 1e-9):.0f} rows/s writing)"
+            + (f" | {per_table}" if per_table else "")
+            + (f" | {self.failed} failed" if self.failed else "")
+        )
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def table_of(sql: str) -> str:
+    m = TABLE_RE.search(sql)
+    return m.group(1) if m else "?"
+
+
+def kind_of(sql: str) -> str:
+    """insert (upserts and REPLACE included), update, delete, or other."""
+    m = KIND_RE.match(sql)
+    if not m:
+        return "other"
+    kind = m.group(1).lower()
+    return "insert" if kind == "replace" else kind
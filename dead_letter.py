@@ -0,0 +1,136 @@
+import argparse
+import threading
+import time
+from typing import List
+
+import db
+import metrics
+
+# URLs that ran out of retries (see resilience.py), kept so nothing is lost
+# silently during a flaky period.
+#
+#   python3 dead_letter.py            # what failed, by host and status
+#   python3 dead_letter.py --retry    # refetch them all now
+#   python3 dead_letter.py --clear    # forget them
+#
+# A URL leaves the table as soon as any fetch of it succeeds, whether from
+# --retry or a normal rerun. Pages recovered by --retry land in the page
+# cache, so rerunning ingest.py / enrich_players.py then parses them without
+# another download.
+
+_lock = threading.Lock()
+_conn = None
+_urls = None  # in-memory copy of the table's URLs, so resolve() on a healthy URL is free
+
+
+def init_db():
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            url TEXT PRIMARY KEY,
+            status INTEGER,
+            error TEXT,
+            attempts INTEGER,
+            failures INTEGER DEFAULT 1,
+            first_failed REAL,
+            last_failed REAL,
+            source TEXT
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def _connection():
+    # Called with _lock held. One connection per process, autocommit: every
+    # change is its own short transaction next to the pipeline's writer
+    global _conn, _urls
+    if _conn is None:
+        init_db()
+        _conn = db.connect(check_same_thread=False, isolation_level=None)
+        _urls = {url for (url,) in _conn.execute("SELECT url FROM dead_letters")}
+    return _conn
+
+
+def add(url: str, status: int, error: str, attempts: int):
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute("""
+            INSERT INTO dead_letters (url, status, error, attempts, first_failed, last_failed, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                status=excluded.status, error=excluded.error, attempts=excluded.attempts,
+                failures=failures + 1, last_failed=excluded.last_failed, source=excluded.source
+        """, (url, status, error, attempts, now, now, metrics.job_name()))
+        _urls.add(url)
+    metrics.inc("dead_letters_total")
+
+
+def resolve(url: str):
+    """A fetch of `url` succeeded: drop it from the table if it was there."""
+    if _urls is not None and url not in _urls:
+        return
+    with _lock:
+        conn = _connection()
+        if url in _urls:
+            conn.execute("DELETE FROM dead_letters WHERE url=?", (url,))
+            _urls.discard(url)
+
+
+def urls() -> List[str]:
+    # From the table, not _urls: run as a script this module is loaded twice
+    # (__main__ and dead_letter, which resilience.py updates)
+    with _lock:
+        return [url for (url,) in _connection().execute("SELECT url FROM dead_letters ORDER BY url")]
+
+
+def report():
+    with _lock:
+        conn = _connection()
+        rows = conn.execute("""
+            SELECT source, COALESCE(status, error), COUNT(*), MAX(failures), datetime(MAX(last_failed), 'unixepoch')
+            FROM dead_letters GROUP BY 1, 2 ORDER BY 3 DESC
+        """).fetchall()
+    if not rows:
+        print("No dead letters.")
+        return
+    print(f"{'SOURCE':<18} {'STATUS / ERROR':<30} {'URLS':>6} {'MAX FAILS':>9}  LAST FAILED (UTC)")
+    for source, why, count, fails, last in rows:
+        print(f"{source or '?':<18} {str(why)[:30]:<30} {count:>6} {fails:>9}  {last}")
+
+
+def retry_all():
+    from crawler import crawl
+
+    todo = urls()
+    print(f"Retrying {len(todo)} dead letters...")
+    recovered = []
+
+    def handle(url, page):
+        # Any final answer (404 included) is resolved by the fetch itself
+        if page.status_code == 200:
+            recovered.append(url)
+
+    crawl([(url, url) for url in todo], handle)
+    print(f"Recovered {len(recovered)}, still dead: {len(urls())}.")
+    if recovered:
+        print("Rerun ingest.py / enrich_players.py to parse them (they are in the page cache).")
+
+
+def clear():
+    with _lock:
+        _connection().execute("DELETE FROM dead_letters")
+        _urls.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show, retry or clear URLs that ran out of retries.")
+    parser.add_argument("--retry", action="store_true", help="refetch every dead letter now")
+    parser.add_argument("--clear", action="store_true", help="delete all dead letters")
+    args = parser.parse_args()
+    if args.clear:
+        clear()
+    elif args.retry:
+        retry_all()
+    report()
@@ -0,0 +1,81 @@
+import argparse
+import re
+
+import config
+import db
+import profiling
+from crawler import crawl
+from frontier import Frontier
+
+# Match ID discovery.
+#
+# Walks schedule / results / archive pages, follows the series linked from
+# them to each series' match list, and pushes every match ID it sees into
+# the frontier (frontier.py). The scrapers then pick the new IDs up.
+#
+#   python3 discover.py                     # current schedule + recent results
+#   python3 discover.py --years 2023 2024   # plus the season archives
+#
+# Links are pulled out of the raw HTML with regexes; no parse tree needed.
+
+START_PATHS = [
+    "/cricket-schedule/upcoming-series/all",
+    "/cricket-match/live-scores/recent-matches",
+    "/cricket-match/live-scores",
+]
+ARCHIVE_PATH = "/cricket-scorecard-archives/{year}"
+
+MATCH_LINK_RE = re.compile(r'href="/(?:live-cricket-scores|live-cricket-scorecard|cricket-scores|cricket-match-squads)/(\d+)/')
+SERIES_LINK_RE = re.compile(r'href="/cricket-series/(\d+)/([\w-]+)')
+
+
+def series_matches_url(series_id, slug):
+    return f"{config.BASE_URL}/cricket-series/{series_id}/{slug}/matches"
+
+
+def discover(start_urls, depth=1):
+    frontier = Frontier()
+    writer = db.BatchWriter()
+    print(f"Frontier has {len(frontier)} matches.")
+
+    visited = set()
+    level = [(url, url) for url in start_urls]
+    for d in range(depth + 1):
+        visited.update(url for url, _ in level)
+        next_level = {}
+
+        def handle(url, r):
+            if r.status_code != 200:
+                print(f"❌ Failed to fetch {url}. Status: {r.status_code}")
+                return
+            new = frontier.add(writer, MATCH_LINK_RE.findall(r.text), source=url)
+            print(f"   {url}: {len(new)} new matches")
+            if d < depth:
+                for series_id, slug in SERIES_LINK_RE.findall(r.text):
+                    link = series_matches_url(series_id, slug)
+                    if link not in visited:
+                        next_level[link] = link
+
+        print(f"Level {d}: {len(level)} pages...")
+        crawl(level, handle)
+        writer.flush()
+        level = list(next_level.items())
+        if not level:
+            break
+
+    writer.close()
+    print(f"Done. {frontier.added} new matches, frontier has {len(frontier)}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find match IDs on schedule and series pages and add them to the frontier.")
+    parser.add_argument("urls", nargs="*", help="extra start pages (paths or full URLs)")
+    parser.add_argument("--years", nargs="*", type=int, default=[], help="also walk the scorecard archive of these seasons")
+    parser.add_argument("--depth", type=int, default=1, help="how many levels of series links to follow (default 1)")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+
+    paths = START_PATHS + [ARCHIVE_PATH.format(year=y) for y in args.years] + args.urls
+    discover([p if p.startswith("http") else config.BASE_URL + p for p in paths], args.depth)
@@ -1,101 +1,183 @@
 
+import argparse
+import random
 import sqlite3
-import requests
-from bs4 import BeautifulSoup
-import re
 import time
+import re
+
+import config
+import db
+import normalize
+import profiling
+import squads
+from crawler import Crawler
+from fetcher import fetch
+from parsing import make_soup
+from pipeline import Pipeline
+
+DB_PATH = config.DB_PATH
+
+# Enrichment ledger: one row per player that was ever tried.
+#   outcome        "ok" (country found), "incomplete" (profile without a
+#                  country) or "failed" (profile could not be fetched/parsed)
+#   failures       consecutive non-ok outcomes, for the backoff
+#   next_eligible  when the player is due again: ~ENRICH_TTL_DAYS after an
+#                  ok, ENRICH_RETRY_HOURS * 2^(failures-1) after anything else
+# A run only fetches players never tried (and without a country) or due.
+OK, INCOMPLETE, FAILED = "ok", "incomplete", "failed"
+DAY = 86400
 
-DB_PATH = "cricbuzz.db"
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-}
+def init_db():
+    # The ledger is seeded from players, which a fresh DB doesn't have yet
+    squads.init_db()
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS enrichment (
+            player_id INTEGER PRIMARY KEY,
+            last_attempt REAL,
+            outcome TEXT,
+            failures INTEGER DEFAULT 0,
+            next_eligible REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_enrichment_next ON enrichment(next_eligible)")
+    # Players enriched before the ledger existed: schedule their refresh,
+    # spread over the TTL so they don't all come due on the same day
+    conn.execute("""
+        INSERT OR IGNORE INTO enrichment (player_id, outcome, next_eligible)
+        SELECT player_id, 'ok', ? + (0.25 + (abs(random()) % 1000) / 1000.0) * ?
+        FROM players WHERE country IS NOT NULL
+    """, (time.time(), config.ENRICH_TTL_DAYS * DAY))
+    conn.commit()
+    conn.close()
+
+def next_eligible(outcome, failures, now):
+    if outcome == OK:
+        # +-25% so refreshes don't bunch up
+        return now + config.ENRICH_TTL_DAYS * DAY * random.uniform(0.75, 1.25)
+    delay = config.ENRICH_RETRY_HOURS * 3600 * 2 ** (failures - 1)
+    return now + min(delay, config.ENRICH_RETRY_MAX_DAYS * DAY)
+
+def record_attempt(cursor, player_id, outcome, failures):
+    # failures: the player's consecutive failures before this attempt
+    now = time.time()
+    failures = 0 if outcome == OK else failures + 1
+    cursor.execute("""
+        INSERT OR REPLACE INTO enrichment (player_id, last_attempt, outcome, failures, next_eligible)
+        VALUES (?, ?, ?, ?, ?)
+    """, (player_id, now, outcome, failures, next_eligible(outcome, failures, now)))
 
-def get_players_missing_info():
-    """Fetch players who don't have country set yet (or missing other info)."""
+def get_players_due(force=False):
+    """(player_id, name, failures) of players due for enrichment, never-tried first."""
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    # We prioritize those with missing country, but really we want to fill any missing gap
-    cursor.execute("SELECT player_id, name FROM players WHERE country IS NULL")
-    players = cursor.fetchall()
+    if force:
+        # Ignore the schedule: everyone still without a country
+        players = conn.execute("""
+            SELECT p.player_id, p.name, COALESCE(e.failures, 0)
+            FROM players p LEFT JOIN enrichment e ON e.player_id = p.player_id
+            WHERE p.country IS NULL
+        """).fetchall()
+    else:
+        players = conn.execute("""
+            SELECT p.player_id, p.name, COALESCE(e.failures, 0)
+            FROM players p LEFT JOIN enrichment e ON e.player_id = p.player_id
+            WHERE (e.player_id IS NULL AND p.country IS NULL) OR e.next_eligible <= ?
+            ORDER BY e.next_eligible IS NOT NULL, e.next_eligible
+        """, (time.time(),)).fetchall()
     conn.close()
     return players
 
-def clean_text(text):
-    if not text: return None
-    return re.sub(r"\s+", " ", text).strip()
+def schedule_summary():
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute("""
+        SELECT outcome, COUNT(*), SUM(next_eligible <= ?) FROM enrichment GROUP BY outcome ORDER BY outcome
+    """, (time.time(),)).fetchall()
+    conn.close()
+    return ", ".join(f"{outcome} {n} ({due} due)" for outcome, n, due in rows) or "empty"
 
-def fetch_player_details(player_id, name):
+# Labels on the profile's personal info card
+PROFILE_LABELS = ["Born", "Birth Place", "Role"]
+LABEL_PATTERNS = {label: re.compile(label, re.I) for label in PROFILE_LABELS}
+ANY_LABEL_RE = re.compile("|".join(PROFILE_LABELS), re.I)
+
+def profile_url(player_id, name):
     # Construct URL: cricbuzz.com requires a slug, but usually redirects correct ID
     slug = name.lower().replace(" ", "-")
-    url = f"https://www.cricbuzz.com/profiles/{player_id}/{slug}"
+    return f"{config.BASE_URL}/profiles/{player_id}/{slug}"
+
+def parse_player_details(html):
+    soup = make_soup(html)
+    
+    born_val = None
+    place_val = None
+    country_val = None
+    
+    # 1. Country (Header Badge)
+    # Strategy: Look for the flag or the text next to it in the header.
+    # Mobile view: <span class="text-white text-[10px]">Country</span>
+    # Desktop view: <span class="text-base text-gray-800">Country</span> inside a rounded-lg container
+    
+    # Try finding the country by common classes seen in dump
+    # Option A: The text-base one near the name
+    country_node = soup.find("span", class_="text-base text-gray-800")
+    if country_node:
+         country_val = normalize.text(country_node.get_text())
+    else:
+         # Option B: The white text one
+         country_node = soup.find("span", class_="text-white text-[10px]")
+         if country_node:
+             country_val = normalize.text(country_node.get_text())
+
+    # First text node for each label, found in a single lazy walk of the
+    # page instead of one full-tree search per label
+    label_nodes = {}
+    node = soup.find(string=ANY_LABEL_RE)
+    while node is not None and len(label_nodes) < len(PROFILE_LABELS):
+        for label, pattern in LABEL_PATTERNS.items():
+            if label not in label_nodes and pattern.search(node):
+                label_nodes[label] = node
+        node = node.find_next(string=ANY_LABEL_RE)
+
+    # Helper to find value by label
+    def find_value_by_label(label_text):
+        node = label_nodes.get(label_text)
+        if node:
+            row = node.parent
+            if row:
+                container = row.parent
+                if container:
+                    cols = container.find_all("div", recursive=False)
+                    if len(cols) >= 2:
+                        return normalize.text(cols[1].get_text())
+        return None
+
+    # September 03, 1990 (35 years) -> 03/09/1990
+    born_val = normalize.birth_date(find_value_by_label("Born"))
+
+    place_val = find_value_by_label("Birth Place")
+    new_role = find_value_by_label("Role")
+    
+    return born_val, place_val, new_role, country_val
+
+def fetch_player_details(player_id, name):
+    url = profile_url(player_id, name)
     
     print(f"   Fetching {url}...")
     
     try:
-        r = requests.get(url, headers=HEADERS, timeout=10)
+        r = fetch(url, timeout=10)
         if r.status_code != 200:
             print(f"   ❌ Status {r.status_code}")
             return None, None, None, None
             
-        soup = BeautifulSoup(r.text, "html.parser")
-        
-        born_val = None
-        place_val = None
-        role_val = None
-        country_val = None
-        
-        # 1. Country (Header Badge)
-        # Strategy: Look for the flag or the text next to it in the header.
-        # Mobile view: <span class="text-white text-[10px]">Country</span>
-        # Desktop view: <span class="text-base text-gray-800">Country</span> inside a rounded-lg container
-        
-        # Try finding the country by common classes seen in dump
-        # Option A: The text-base one near the name
-        country_node = soup.find("span", class_="text-base text-gray-800")
-        if country_node:
-             country_val = clean_text(country_node.get_text())
-        else:
-             # Option B: The white text one
-             country_node = soup.find("span", class_="text-white text-[10px]")
-             if country_node:
-                 country_val = clean_text(country_node.get_text())
-
-        # Helper to find value by label
-        def find_value_by_label(label_text):
-            node = soup.find(string=re.compile(label_text, re.I))
-            if node:
-                row = node.parent
-                if row:
-                    container = row.parent
-                    if container:
-                        cols = container.find_all("div", recursive=False)
-                        if len(cols) >= 2:
-                            return clean_text(cols[1].get_text())
-            return None
-
-        born_val = find_value_by_label("Born")
-        if born_val:
-            # Parse date immediately: September 03, 1990 (35 years) -> 03/09/1990
-            clean_str = re.sub(r"\s*\(.*\)", "", born_val).strip()
-            try:
-                dt_obj = datetime.datetime.strptime(clean_str, "%B %d, %Y")
-                born_val = dt_obj.strftime("%d/%m/%Y")
-            except Exception:
-                pass # Keep original if parse fails
-
-        place_val = find_value_by_label("Birth Place")
-        new_role = find_value_by_label("Role")
-        
-        return born_val, place_val, new_role, country_val
+        return parse_player_details(r.text)
         
     except Exception as e:
         print(f"   ❌ Error: {e}")
         return None, None, None, None
 
-def update_player(player_id, born, place, role, country):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+def update_player(cursor, player_id, born, place, role, country):
+    # cursor: the pipeline's batch writer, so updates share one transaction per batch
     # Dynamic update query
     updates = []
     params = []
@@ -117,17 +199,33 @@ def update_player(player_id, born, place, role, country):
         sql = f"UPDATE players SET {', '.join(updates)} WHERE player_id=?"
         params.append(player_id)
         cursor.execute(sql, tuple(params))
-        conn.commit()
-    
-    conn.close()
 
-def main():
-    players = get_players_missing_info()
+def parse_profile(player_id, html):
+    # Pipeline parse stage (runs in a worker process)
+    return parse_player_details(html)
+
+def main(force=None):
+    if force is None:
+        force = config.FORCE_RECRAWL
+    init_db()
+    print(f"Enrichment ledger: {schedule_summary()}")
+    players = get_players_due(force)
     print(f"Found {len(players)} players to enrich.")
     
-    for pid, name in players:
-        print(f"Processing {name} ({pid})...")
-        born, place, role, country = fetch_player_details(pid, name)
+    names = {pid: name for pid, name, failures in players}
+    failures = {pid: n for pid, name, n in players}
+    seen = set()
+    
+    def save(cursor, pid, details):
+        # Pipeline write stage: fetch/parse errors were already reported.
+        # The ledger row goes in the same batch as the update.
+        print(f"Processing {names[pid]} ({pid})...")
+        seen.add(pid)
+        if details is None:
+            print("   ⚠️ Profile unavailable.")
+            record_attempt(cursor, pid, FAILED, failures[pid])
+            return
+        born, place, role, country = details
         
         info = []
         if born: info.append(f"Born: {born}")
@@ -135,13 +233,26 @@ def main():
         
         if info:
             print(f"   ✅ {', '.join(info)}")
-            update_player(pid, born, place, role, country)
+            update_player(cursor, pid, born, place, role, country)
         else:
             print("   ⚠️ No new info found.")
-            
-        time.sleep(1.0) # Be polite
-        
+        record_attempt(cursor, pid, OK if country else INCOMPLETE, failures[pid])
+    
+    def finish(cursor):
+        # Profiles whose fetch raised (gave up, see resilience.py, or any
+        # other error) never reach save(): they back off like any failure
+        for pid in names.keys() - seen:
+            record_attempt(cursor, pid, FAILED, failures[pid])
+    
+    jobs = ((pid, profile_url(pid, name)) for pid, name, n in players)
+    Pipeline(parse_profile, save, finish, crawler=Crawler(timeout=10)).run(jobs)
     print("Done.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fill in birth date, place, role and country of players that are due.")
+    parser.add_argument("--force", action="store_true", help="ignore the schedule: every player without a country")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+    main(args.force or None)
@@ -1,34 +1,25 @@
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import sqlite3
 import re
-import time
 
-DB_PATH = "cricbuzz.db"
-BASE_URL = "https://www.cricbuzz.com"
+import config
+import crawl_state
+import db
+import migrate
+import normalize
+import profiling
+from crawler import crawl
+from extractors import register, page_url
+from fetcher import fetch
+from parsing import make_soup
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-}
+DB_PATH = config.DB_PATH
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS leaders (
-        match_id INTEGER,
-        team TEXT,
-        player_id INTEGER,
-        player_name TEXT,
-        role TEXT,
-        FOREIGN KEY (match_id) REFERENCES master(match_id),
-        FOREIGN KEY (player_id) REFERENCES players(player_id)
-    )
-    """)
-    conn.commit()
-    conn.close()
+    # match_players (with is_wicket_keeper) is created by squads.init_db;
+    # older databases get the column from migration 3
+    migrate.migrate(DB_PATH)
 
 def get_matches():
     conn = sqlite3.connect(DB_PATH)
@@ -38,6 +29,29 @@ def get_matches():
     conn.close()
     return rows
 
+# Match ids per roster query (stays well under SQLite's bound-parameter limit)
+ROSTER_CHUNK = 500
+
+def load_roster(match_ids):
+    """
+    (match_id, player_id) -> team for every squad player of these matches,
+    read up front with one query per ROSTER_CHUNK matches instead of a
+    connection and a point query per captain.
+    """
+    match_ids = list(match_ids)
+    roster = {}
+    conn = db.connect(DB_PATH)
+    for i in range(0, len(match_ids), ROSTER_CHUNK):
+        chunk = match_ids[i:i + ROSTER_CHUNK]
+        rows = conn.execute(f"""
+            SELECT match_id, player_id, team FROM match_players
+            WHERE match_id IN ({','.join('?' * len(chunk))})
+        """, chunk)
+        for mid, pid, team in rows:
+            roster[(mid, pid)] = team
+    conn.close()
+    return roster
+
 def extract_id_from_url(url):
     # /profiles/1114/paul-stirling
     match = re.search(r"/profiles/(\d+)/", url)
@@ -45,115 +59,184 @@ def extract_id_from_url(url):
         return int(match.group(1))
     return None
 
-def process_match(match_id, team1, team2):
+def scorecard_urls(match_id):
     # Scorecard page is better for finding (c)
-    url = f"https://www.cricbuzz.com/live-cricket-scorecard/{match_id}/match"
+    return [
+        page_url("scorecard", match_id),
+        f"{config.BASE_URL}/live-cricket-scorecard/{match_id}/something",
+    ]
+
+def find_markers(text):
+    # Leadership markers next to a name: "(c)", "(vc)", "(wk)", "(c & wk)"
+    m = normalize.MARKER_RE.search(text or "")
+    if not m:
+        return set()
+    return {part.strip().lower() for part in m.group(1).split("&")}
+
+def anchor_markers(a):
+    text = a.get_text(strip=True)
+    
+    # Check 1: Inside anchor text: "Name (c)"
+    markers = find_markers(text)
+    if markers:
+        return markers
+    
+    # Check 2: Immediate text sibling: <a...>Name</a> (c)
+    # We need to be careful not to consume the whole parent text if it's shared.
+    # Only check siblings if parent has multiple links? 
+    # Or just check string/stripped strings.
+    if a.next_sibling and isinstance(a.next_sibling, str):
+        return find_markers(a.next_sibling)
+    
+    # Check 3: Parent text, BUT ONLY if parent doesn't contain other profile links
+    # This handles cases where structure is <div>Name (c)</div>
+    if a.parent and len(a.parent.find_all("a", href=re.compile(r"^/profiles/"))) == 1:
+        return find_markers(a.parent.get_text(strip=True))
+    
+    return set()
+
+def flag_row(match_id, pid, markers):
+    return (match_id, pid, int("c" in markers), int("vc" in markers), int("wk" in markers))
+
+def save_leader_flags(cursor, match_id, leaders):
+    # Flags only ever get switched on, so replaying a page is harmless
+    cursor.executemany("""
+        UPDATE match_players
+        SET is_captain = MAX(is_captain, ?3),
+            is_vice_captain = MAX(is_vice_captain, ?4),
+            is_wicket_keeper = MAX(is_wicket_keeper, ?5)
+        WHERE match_id=?1 AND player_id=?2
+    """, [flag_row(match_id, pid, markers) for pid, name, markers in leaders])
+
+@register("scorecard", "leaders", save=save_leader_flags)
+def extract_leaders(soup, match_id):
+    """(player_id, name, markers) for every player marked (c), (vc) or (wk)."""
+    leaders = {}
+    
+    # In scorecard, players are listed in rows. 
+    # Look for "(c)" in the text of the link or cell.
+    
+    # Find all anchors with profiles
+    for a in soup.select("a[href^='/profiles/']"):
+        markers = anchor_markers(a)
+        if not markers:
+            continue
+        
+        pid = extract_id_from_url(a['href'])
+        if not pid:
+            continue
+        
+        # Clean name for storage: "Name (c & wk)" -> "Name"
+        clean_name = normalize.player_name(a.get_text(strip=True))
+        
+        # The same player shows up in several innings, merge their markers
+        name, seen = leaders.get(pid, (clean_name, ()))
+        leaders[pid] = (name, tuple(sorted(set(seen) | markers)))
+    
+    return [(pid, name, markers) for pid, (name, markers) in leaders.items()]
+
+def process_match(match_id, team1, team2, r=None, roster=None):
+    # r: page already fetched by the crawler (fetched here if not given)
+    # roster: load_roster() index covering this match (loaded here if not given)
+    url, url2 = scorecard_urls(match_id)
     print(f"Checking {url}...")
     
     try:
-        r = requests.get(url, headers=HEADERS)
-        if r.status_code != 200:
-            print(f"   ⚠️ Status {r.status_code}. Trying alternate...")
-            url2 = f"https://www.cricbuzz.com/live-cricket-scorecard/{match_id}/something"
-            r = requests.get(url2, headers=HEADERS)
-            if r.status_code != 200: return []
+        if r is None:
+            r = fetch(url)
+            if r.status_code != 200:
+                print(f"   ⚠️ Status {r.status_code}. Trying alternate...")
+                r = fetch(url2)
+        if r.status_code != 200: return []
             
-        soup = BeautifulSoup(r.text, "html.parser")
-        
-        captains = []
-        
-        # In scorecard, players are listed in rows. 
-        # Look for "(c)" in the text of the link or cell.
+        soup = make_soup(r.text)
         
-        # Find all anchors with profiles
-        anchors = soup.select("a[href^='/profiles/']")
+        if roster is None:
+            roster = load_roster([match_id])
         
-        for a in anchors:
-            text = a.get_text(strip=True)
-            is_captain = False
+        leaders = []
+        for pid, clean_name, markers in extract_leaders(soup, match_id):
+            # Check team via match_players table (most reliable)
+            team_for_player = roster.get((match_id, pid), "Unknown")
             
-            # Check 1: Inside anchor text: "Name (c)"
-            if re.search(r"\(\s*c\s*\)", text, re.IGNORECASE):
-                is_captain = True
-            
-            # Check 2: Immediate text sibling: <a...>Name</a> (c)
-            # We need to be careful not to consume the whole parent text if it's shared.
-            # Only check siblings if parent has multiple links? 
-            # Or just check string/stripped strings.
-            elif a.next_sibling and isinstance(a.next_sibling, str):
-                if re.search(r"\(\s*c\s*\)", a.next_sibling, re.IGNORECASE):
-                    is_captain = True
-            
-            # Check 3: Parent text, BUT ONLY if parent doesn't contain other profile links
-            # This handles cases where structure is <div>Name (c)</div>
-            elif a.parent and len(a.parent.find_all("a", href=re.compile(r"^/profiles/"))) == 1:
-                parent_text = a.parent.get_text(strip=True)
-                if re.search(r"\(\s*c\s*\)", parent_text, re.IGNORECASE):
-                    is_captain = True
-
-            if is_captain:
-                # Found a captain
-                pid = extract_id_from_url(a['href'])
-                
-                # Check team via match_squads table (most reliable)
-                if pid:
-                    team_for_player = get_team_for_player(match_id, pid)
-                    if not team_for_player:
-                        team_for_player = "Unknown"
-                    
-                    # Clean name for storage: "Name (c)" -> "Name"
-                    # Also remove (wk) if present
-                    clean_name = re.sub(r"\s*\((?:c|wk|c\s*\&\s*wk|wk\s*\&\s*c)\)", "", text, flags=re.IGNORECASE).strip()
-                        
-                    print(f"   Found Captain: {clean_name} (ID: {pid}) -> Team: {team_for_player}")
-                    captains.append((match_id, team_for_player, pid, clean_name))
+            print(f"   Found {'/'.join(markers)}: {clean_name} (ID: {pid}) -> Team: {team_for_player}")
+            leaders.append((match_id, team_for_player, pid, clean_name, markers))
                     
-        return captains
+        return leaders
         
     except Exception as e:
         print(f"   ❌ Error: {e}")
         return []
 
-def get_team_for_player(match_id, player_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT team FROM match_players WHERE match_id=? AND player_id=?", (match_id, player_id))
-    row = cursor.fetchone()
-    conn.close()
-    if row: return row[0]
-    return None
-
-def save_leaders(leaders):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def save_leaders(leaders, match_ids=()):
+    # match_ids: matches scanned this run, checkpointed in crawl_state with the flags
+    conn = db.connect(DB_PATH)
     
     # Ensure this is running AFTER squads populated match_players.
-    # We update the is_captain flag.
-    
-    count = 0
-    for mid, team, pid, pname in leaders:
-        cursor.execute("UPDATE match_players SET is_captain=1 WHERE match_id=? AND player_id=?", (mid, pid))
-        if cursor.rowcount > 0:
-            count += 1
+    # We update the is_captain / is_vice_captain / is_wicket_keeper flags
+    # for every match at once: stage the flags in a temp table, then apply
+    # them with a single UPDATE ... FROM.
+    with conn:
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS leader_flags (
+                match_id INTEGER, player_id INTEGER, c INTEGER, vc INTEGER, wk INTEGER,
+                PRIMARY KEY (match_id, player_id)
+            )
+        """)
+        conn.execute("DELETE FROM leader_flags")
+        conn.executemany("""
+            INSERT INTO leader_flags VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(match_id, player_id) DO UPDATE SET
+                c=MAX(c, excluded.c), vc=MAX(vc, excluded.vc), wk=MAX(wk, excluded.wk)
+        """, [flag_row(mid, pid, markers) for mid, team, pid, pname, markers in leaders])
+        count = conn.execute("""
+            UPDATE match_players
+            SET is_captain = MAX(is_captain, f.c),
+                is_vice_captain = MAX(is_vice_captain, f.vc),
+                is_wicket_keeper = MAX(is_wicket_keeper, f.wk)
+            FROM leader_flags AS f
+            WHERE match_players.match_id = f.match_id AND match_players.player_id = f.player_id
+        """).rowcount
+        
+        by_match = {}
+        for mid, team, pid, pname, markers in leaders:
+            by_match.setdefault(mid, []).append((pid, pname, markers))
+        for mid in match_ids:
+            if mid in by_match:
+                crawl_state.mark_done(conn, mid, "leaders", crawl_state.fingerprint(by_match[mid]))
+            else:
+                crawl_state.mark_failed(conn, mid, "leaders", "no leaders found")
         
-    conn.commit()
-    print(f"Updated {count} captain flags.")
+    print(f"Updated {count} leader flags.")
     conn.close()
 
 def main():
     init_db()
+    crawl_state.init_db()
+    state = crawl_state.load(["leaders"])
     matches = get_matches()
-    print(f"Scanning {len(matches)} matches for captains...")
+    todo = crawl_state.pending([mid for mid, t1, t2 in matches], ["leaders"], state)
+    print(f"Scanning {len(todo)} matches for captains and keepers...")
     
     all_leaders = []
     
-    for mid, t1, t2 in matches:
-        leaders = process_match(mid, t1, t2)
+    todo_set = set(todo)
+    teams = {mid: (t1, t2) for mid, t1, t2 in matches if mid in todo_set}
+    roster = load_roster(teams)
+    
+    def handle(mid, r):
+        leaders = process_match(mid, *teams[mid], r=r, roster=roster)
         all_leaders.extend(leaders)
-        time.sleep(1.0)
+    
+    crawl([(mid, scorecard_urls(mid)) for mid in teams], handle)
         
-    save_leaders(all_leaders)
-    print(f"Saved {len(all_leaders)} captain records.")
+    save_leaders(all_leaders, teams)
+    print(f"Saved {len(all_leaders)} leader records.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flag the captain, vice-captain and wicket-keeper of every match.")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
     main()
@@ -0,0 +1,111 @@
+import re
+from collections import namedtuple, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+import metrics
+import profiling
+from parsing import make_soup
+
+# Every match has a handful of pages; extractors register against the page
+# type they read, so a page is fetched and parsed once no matter how many
+# tables it feeds.
+PAGE_PATHS = {
+    "squads": "/cricket-match-squads/{match_id}/squads",
+    "match": "/live-cricket-scores/{match_id}/match",
+    "scorecard": "/live-cricket-scorecard/{match_id}/match",
+}
+
+# Order pages are saved in for one match.
+# squads first: captain/keeper flags update the match_players rows it creates.
+PAGE_ORDER = ["squads", "match", "scorecard"]
+
+# extract(soup, match_id) -> records
+# save(cursor, match_id, records) -> None
+# regions: parts of the page the extractor reads (see parsing.make_soup),
+#          None if it needs the whole document
+# complete(soup) -> bool: False while the records can still change (a live
+#          match); such records are saved but the stage stays pending in
+#          crawl_state, so the page is fetched again next run. None = always final.
+Extractor = namedtuple("Extractor", ["name", "page_type", "extract", "save", "regions", "complete"])
+
+# run_extractors() result of an extractor whose page isn't final yet
+Unfinished = namedtuple("Unfinished", ["records"])
+
+# Result banner of a finished match: won, tied, no result or abandoned
+RESULT_REGIONS = [".cb-text-complete", ".cb-text-abandon"]
+RESULT_RE = re.compile(r"\bwon by\b|\bmatch tied\b|\bno result\b|\babandoned\b", re.I)
+
+_registry: Dict[str, List[Extractor]] = defaultdict(list)
+
+
+def register(page_type: str, name: str, save: Callable = None, regions: List[str] = None,
+             complete: Callable = None):
+    """Decorator: register `extract(soup, match_id)` for a page type."""
+    if page_type not in PAGE_PATHS:
+        raise ValueError(f"Unknown page type: {page_type}")
+
+    def wrap(fn):
+        _registry[page_type] = [e for e in _registry[page_type] if e.name != name]
+        _registry[page_type].append(Extractor(name, page_type, fn, save, regions, complete))
+        return fn
+    return wrap
+
+
+def match_finished(soup) -> bool:
+    """Whether a match or scorecard page shows the final result (parse RESULT_REGIONS for it)."""
+    for region in RESULT_REGIONS:
+        if soup.select_one(region):
+            return True
+    return soup.find(string=RESULT_RE) is not None
+
+
+def records_of(result) -> Tuple[object, bool]:
+    """(records, complete) of one run_extractors() result."""
+    if isinstance(result, Unfinished):
+        return result.records, False
+    return result, True
+
+
+def extractors_for(page_type: str) -> List[Extractor]:
+    return list(_registry[page_type])
+
+
+def page_types() -> List[str]:
+    """Page types that have at least one extractor, in save order."""
+    return [p for p in PAGE_ORDER if _registry[p]]
+
+
+def page_url(page_type: str, match_id: int) -> str:
+    return config.BASE_URL + PAGE_PATHS[page_type].format(match_id=match_id)
+
+
+def page_regions(page_type: str) -> Optional[List[str]]:
+    """Union of the regions every extractor of this page needs (None = whole page)."""
+    regions = []
+    for ex in _registry[page_type]:
+        if ex.regions is None:
+            return None
+        regions += [r for r in ex.regions if r not in regions]
+    return regions or None
+
+
+def run_extractors(page_type: str, match_id: int, html: str) -> Dict[str, object]:
+    """Parse the page once and run every extractor registered for it."""
+    soup = make_soup(html, regions=page_regions(page_type))
+    results = {}
+    for ex in _registry[page_type]:
+        try:
+            with metrics.timer("extract_seconds", extractor=ex.name), profiling.stage("extract"):
+                records = ex.extract(soup, match_id)
+                if ex.complete and not ex.complete(soup):
+                    records = Unfinished(records)
+                results[ex.name] = records
+        except Exception as e:
+            print(f"❌ {ex.name} failed on {page_type} page of {match_id}: {e}")
+    return results
+
+
+def load_all():
+    # Importing the scripts registers their extractors
+    import squads, sports_records, awards, scorecard, extract_captains  # noqa: F401
@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import namedtuple
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+
+import adaptive
+import config
+import http_archive
+import metrics
+import profiling
+import resilience
+from page_archive import get_page_archive
+from page_cache import get_cache
+
+# Minimal response object shared by every fetch path.
+# Scripts only ever looked at status_code and text, so keep the same names.
+# validator: (ETag, Last-Modified) of a network response, see revalidation.py
+Page = namedtuple("Page", ["url", "status_code", "text", "from_cache", "validator"], defaults=(None,))
+
+NOT_MODIFIED = 304
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of blocking.
+    reserve() takes one token and returns how long the caller must wait
+    before using it, so the same bucket works for time.sleep and asyncio.sleep.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_for(url: str) -> TokenBucket:
+    host = urlsplit(url).netloc
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(config.HOST_RATE, config.HOST_BURST)
+        return _buckets[host]
+
+
+def record_fetch(url: str, status: int, source: str, text: str = None, seconds: float = None):
+    """Count a response in metrics; `seconds` and `text` only for network fetches."""
+    host = urlsplit(url).netloc
+    metrics.inc("http_requests_total", host=host, status=status, source=source)
+    if seconds is not None:
+        metrics.observe("fetch_seconds", seconds, host=host)
+    if text:
+        metrics.inc("http_bytes_total", len(text), host=host)
+
+
+def validator_of(headers):
+    """(ETag, Last-Modified) of a response, or None if it has neither."""
+    etag, modified = headers.get("ETag"), headers.get("Last-Modified")
+    return (etag, modified) if etag or modified else None
+
+
+def store_response(url: str, status: int, headers, text: str):
+    """Keep a live response wherever it is wanted: HTTP archive, page cache, page archive."""
+    if status == NOT_MODIFIED:
+        # No body: archiving it would replace the 200 recorded for the URL
+        return
+    archive = http_archive.get_archive()
+    if archive:
+        archive.put(url, status, headers, text)
+    if status != 200:
+        return
+    cache = get_cache()
+    if cache:
+        cache.put(url, text)
+    pages = get_page_archive()
+    if pages:
+        pages.put(url, text)
+
+
+def _not_modified(conditional: dict, headers) -> bool:
+    """Whether a recorded response still matches the validators of a conditional request."""
+    etag, modified = validator_of(headers) or (None, None)
+    if conditional.get("If-None-Match"):
+        return conditional["If-None-Match"] == etag
+    return bool(modified) and conditional.get("If-Modified-Since") == modified
+
+
+def replay_page(archive: http_archive.HttpArchive, url: str, headers: dict = None) -> Page:
+    """
+    The recorded response for `url`. A conditional request (`headers`) gets
+    a 304 when the recorded 200 carries the validators it asks about.
+    """
+    recorded = archive.get(url)
+    if recorded is None:
+        print(f"⚠️ Not in HTTP archive: {url}")
+        return Page(url, http_archive.MISSING_STATUS, "", False)
+    status, recorded_headers, text = recorded
+    recorded_headers = requests.structures.CaseInsensitiveDict(recorded_headers)
+    if status == 200 and headers and _not_modified(headers, recorded_headers):
+        status, text = NOT_MODIFIED, ""
+    record_fetch(url, status, "replay")
+    return Page(url, status, text, False, validator_of(recorded_headers))
+
+
+def _get(url: str, getter, timeout: int, headers: dict = None):
+    """One network attempt inside the host's window: (response, text, seconds)."""
+    # Window slot first, then the token: a request queued on the window
+    # must not hold an old reservation, or freed slots would fire in a burst
+    window = adaptive.window_for(url)
+    window.acquire()
+    start, status = None, None
+    try:
+        time.sleep(bucket_for(url).reserve())
+        start = time.perf_counter()
+        with profiling.stage("fetch"):
+            r = getter.get(url, headers={**config.HEADERS, **(headers or {})}, timeout=timeout)
+            text = r.text
+        status = r.status_code
+        return r, text, time.perf_counter() - start
+    finally:
+        window.release(start, status)
+
+
+class _Flight:
+    # One network fetch in progress, for the callers that wait on it
+    def __init__(self):
+        self.done = threading.Event()
+        self.page = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _coalesced(key, fetch_fn) -> Page:
+    """Run fetch_fn, unless another thread is already fetching `key`: then share its result."""
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        metrics.inc("fetches_coalesced_total", host=urlsplit(key[0]).netloc)
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.page
+    try:
+        flight.page = fetch_fn()
+        return flight.page
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def fetch(url: str, timeout: int = 15, session: Optional[requests.Session] = None, headers: dict = None) -> Page:
+    """
+    GET a page, going through the shared page cache.
+    Only 200 responses are cached. Transient failures are retried (see
+    resilience.py); the last response is returned, or GaveUp raised if
+    there never was one. `headers` are added to the request (e.g. the
+    conditional ones from revalidation.py). Threads fetching the same URL
+    at the same time share one request.
+    In record / replay mode (see http_archive.py) responses are stored in /
+    served from the HTTP archive instead; recording never sends the
+    conditional headers.
+    """
+    archive = http_archive.get_archive()
+    if archive and http_archive.mode() == "replay":
+        return replay_page(archive, url, headers)
+    if archive:
+        # Recording: always fetch the full page, a 304 has nothing to archive
+        headers = None
+
+    cache = get_cache()
+    if cache and not archive:
+        html = cache.get(url)
+        if html is not None:
+            record_fetch(url, 200, "cache")
+            return Page(url, 200, html, True)
+
+    key = (url, tuple(sorted(headers.items())) if headers else ())
+    return _coalesced(key, lambda: _fetch_network(url, timeout, session or requests, headers))
+
+
+def _fetch_network(url: str, timeout: int, getter, headers: dict = None) -> Page:
+    retry = resilience.Retry(url)
+    page = None
+    while True:
+        wait = retry.breaker_wait()
+        if wait:
+            delay = retry.blocked(wait)
+        else:
+            try:
+                r, text, seconds = _get(url, getter, timeout, headers)
+            except requests.RequestException as e:
+                metrics.inc("http_errors_total", host=urlsplit(url).netloc, error=type(e).__name__)
+                delay = retry.failed(exc=e)
+            else:
+                record_fetch(url, r.status_code, "network", text, seconds)
+                page = Page(url, r.status_code, text, False, validator_of(r.headers))
+                if not retry.should_retry(r.status_code):
+                    retry.succeeded()
+                    store_response(url, r.status_code, r.headers, text)
+                    return page
+                delay = retry.failed(status=r.status_code, headers=r.headers)
+                if delay is None:
+                    store_response(url, r.status_code, r.headers, text)
+            finally:
+                retry.release()
+        if delay is None:
+            if page is None:
+                raise resilience.GaveUp(f"{url}: {retry.error}")
+            return page
+        time.sleep(delay)
@@ -0,0 +1,78 @@
+import sqlite3
+import time
+from typing import Iterable, List
+
+import db
+
+# Persistent list of match IDs the scrapers work through.
+#
+# discover.py pushes the IDs it finds on schedule / series pages; every
+# scraper reads its work from match_ids(). Dedup is an in-memory set loaded
+# once from the frontier and master tables, so pushing an already-known ID
+# never touches the DB.
+
+# The original hand-picked matches, so a fresh DB still has work to do
+SEED_MATCH_IDS = [
+    116441, 121389, 121400, 121406, 133000, 133011, 133017,
+    137826, 137831, 140537, 140548, 140559
+]
+
+
+def init_db():
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS frontier (
+            match_id INTEGER PRIMARY KEY,
+            source TEXT,
+            discovered_at REAL
+        )
+    """)
+    now = time.time()
+    conn.executemany("INSERT OR IGNORE INTO frontier VALUES (?, 'seed', ?)",
+                     [(mid, now) for mid in SEED_MATCH_IDS])
+    # Matches already in the warehouse belong in the frontier too
+    try:
+        conn.execute("INSERT OR IGNORE INTO frontier SELECT match_id, 'master', ? FROM master", (now,))
+    except sqlite3.OperationalError:
+        pass  # no master table yet
+    conn.commit()
+    conn.close()
+
+
+def match_ids() -> List[int]:
+    """Every match to scrape, oldest ID first."""
+    init_db()
+    conn = db.connect()
+    ids = [mid for (mid,) in conn.execute("SELECT match_id FROM frontier ORDER BY match_id")]
+    conn.close()
+    return ids
+
+
+class Frontier:
+    """
+    Write side used by discovery: add() drops IDs already seen and queues
+    the new ones on a db.BatchWriter (or anything cursor-like).
+    """
+
+    def __init__(self):
+        init_db()
+        conn = db.connect()
+        self.seen = {mid for (mid,) in conn.execute("SELECT match_id FROM frontier")}
+        conn.close()
+        self.added = 0
+
+    def __contains__(self, match_id) -> bool:
+        return match_id in self.seen
+
+    def __len__(self) -> int:
+        return len(self.seen)
+
+    def add(self, cursor, ids: Iterable[int], source: str = None) -> List[int]:
+        new = sorted({int(mid) for mid in ids} - self.seen)
+        if new:
+            now = time.time()
+            cursor.executemany("INSERT OR IGNORE INTO frontier VALUES (?, ?, ?)",
+                               [(mid, source, now) for mid in new])
+            self.seen.update(new)
+            self.added += len(new)
+        return new
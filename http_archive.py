@@ -0,0 +1,96 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+import config
+from page_cache import url_key
+
+# Record / replay of HTTP responses, for offline and repeatable runs.
+#
+#   CRICBUZZ_HTTP_MODE=record   fetch live (bypassing the page cache) and store
+#                               every response in CRICBUZZ_ARCHIVE
+#   CRICBUZZ_HTTP_MODE=replay   serve every request from the archive; the
+#                               network is never touched
+#   CRICBUZZ_HTTP_MODE=live     (default) archive not used
+#
+# Unlike the page cache, the archive keeps non-200 responses and headers,
+# never expires and is never evicted: a replay sees exactly what was recorded.
+# 304s are never recorded (recording doesn't send conditional requests);
+# replay answers a conditional request with a 304 when the recorded 200
+# carries the validators it names.
+
+MODES = ["live", "record", "replay"]
+
+# Replayed for URLs that were never recorded
+MISSING_STATUS = 504
+
+
+class HttpArchive:
+    def __init__(self, path: str = None):
+        self.path = path or config.ARCHIVE_PATH
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT,
+                body BLOB NOT NULL,
+                recorded_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], str]]:
+        """(status, headers, text) as recorded, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body FROM responses WHERE key=?", (url_key(url),)
+            ).fetchone()
+        if not row:
+            self.missing += 1
+            return None
+        self.replayed += 1
+        status, headers, body = row
+        return status, json.loads(headers or "{}"), zlib.decompress(body).decode("utf-8")
+
+    def put(self, url: str, status: int, headers: Dict[str, str], text: str):
+        body = zlib.compress(text.encode("utf-8"), 6)
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO responses (key, url, status, headers, body, recorded_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (url_key(url), url, status, json.dumps(dict(headers)), body, time.time()))
+            self.conn.commit()
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_archive = None
+
+
+def mode() -> str:
+    if config.HTTP_MODE not in MODES:
+        raise ValueError(f"Unknown CRICBUZZ_HTTP_MODE: {config.HTTP_MODE} (expected {', '.join(MODES)})")
+    return config.HTTP_MODE
+
+
+def get_archive() -> Optional[HttpArchive]:
+    """Process-wide archive (None in live mode)."""
+    global _archive
+    if mode() == "live":
+        return None
+    if _archive is None:
+        _archive = HttpArchive()
+    return _archive
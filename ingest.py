@@ -0,0 +1,241 @@
+import argparse
+
+import config
+import crawl_state
+import db
+import frontier
+import profiling
+import revalidation
+import work_queue
+from extractors import PAGE_ORDER, extractors_for, load_all, page_types, page_url, records_of, run_extractors
+from pipeline import UNCHANGED, Pipeline
+
+# One-pass ingestion: every page of a match is fetched and parsed once,
+# and all extractors registered for that page type (see extractors.py)
+# run on the same soup. Replaces running the per-table scripts one by one.
+#
+# Runs on the fetch -> parse -> write pipeline (pipeline.py): parsing happens
+# in a process pool and a single writer thread saves the results.
+# Each extractor is checkpointed in crawl_state, so a rerun only fetches the
+# pages that still have unfinished (or failed) extractors. A --force rerun
+# revalidates pages that are done (see revalidation.py): unchanged ones are
+# neither parsed nor written.
+
+
+def init_all():
+    import awards, dead_letter, extract_captains, migrate, scorecard, squads
+    from sports_records import SportsMatchRecords
+
+    migrate.migrate()
+    SportsMatchRecords(config.DB_PATH)
+    squads.init_db()
+    scorecard.init_db()
+    awards.init_db()
+    extract_captains.init_db()
+    crawl_state.init_db()
+    work_queue.init_db()
+    dead_letter.init_db()
+    revalidation.init_db()
+
+
+def parse_page(key, html):
+    # Runs in a pool worker: make sure the extractors are registered there
+    load_all()
+    match_id, page_type = key
+    return run_extractors(page_type, match_id, html)
+
+
+def page_done(state, match_id, page_type):
+    return all(crawl_state.is_done(state, match_id, ex.name) for ex in extractors_for(page_type))
+
+
+class MatchWriter:
+    """
+    Collects the pages of a match as they come out of the pipeline and saves
+    them in page order once all of them are in, so squads rows exist before
+    the captain flags that update them.
+    """
+
+    def __init__(self, expected, state, worker=None):
+        self.expected = expected  # match_id -> page types being fetched
+        self.state = state
+        self.worker = worker  # set when the pages were claimed from work_queue
+        self.pending = {}
+
+    def save(self, cursor, key, results):
+        match_id, page_type = key
+        pages = self.pending.setdefault(match_id, {})
+        pages[page_type] = results
+        if len(pages) == len(self.expected[match_id]):
+            self.save_match(cursor, match_id, self.pending.pop(match_id))
+
+    def finish(self, cursor):
+        # Matches with a page that failed outright never completed above
+        for match_id, pages in self.pending.items():
+            self.save_match(cursor, match_id, pages)
+        self.pending = {}
+
+    def save_match(self, cursor, match_id, pages):
+        if self.worker and not work_queue.renew(cursor.conn, self.worker, match_id):
+            print(f"   ⏭️ {match_id}: lease lost to another worker, not saved")
+            return
+        counts = []
+        for page_type in self.expected[match_id]:
+            error = self.save_page(cursor, match_id, page_type, pages.get(page_type), counts)
+            if self.worker:
+                work_queue.finish(cursor, self.worker, match_id, page_type, error)
+        print(f"   ✅ {match_id}: {', '.join(counts)}")
+
+    def save_page(self, cursor, match_id, page_type, results, counts):
+        # Returns None if every extractor of the page was saved, else the last error
+        if results is UNCHANGED:
+            counts.append(f"{page_type} page unchanged")
+            return None
+        if results is None:
+            print(f"   ⚠️ {match_id}: {page_type} page unavailable")
+            for ex in extractors_for(page_type):
+                crawl_state.mark_failed(cursor, match_id, ex.name, "page unavailable")
+            return "page unavailable"
+
+        error = None
+        for ex in extractors_for(page_type):
+            if not ex.save:
+                continue
+            if ex.name not in results:
+                error = f"{ex.name}: extractor failed"
+                crawl_state.mark_failed(cursor, match_id, ex.name, "extractor failed")
+                continue
+            records, complete = records_of(results[ex.name])
+            try:
+                written = crawl_state.save_stage(cursor, self.state, match_id, ex.name, records, ex.save, complete)
+            except Exception as e:
+                print(f"   ❌ {match_id}: saving {ex.name} failed: {e}")
+                error = f"{ex.name}: {e}"
+                crawl_state.mark_failed(cursor, match_id, ex.name, e)
+                continue
+            n = len(records) if isinstance(records, list) else 1
+            counts.append((f"{ex.name}={n}" if written or not records else f"{ex.name} unchanged")
+                          + ("" if complete else " (not finished)"))
+        return error
+
+
+def open_pages(match_ids, types, state, force):
+    """match_id -> pages that still have an extractor that isn't done."""
+    expected = {}
+    for mid in match_ids:
+        pages = [t for t in types if force or not page_done(state, mid, t)]
+        if pages:
+            expected[mid] = pages
+    return expected
+
+
+def run_pages(expected, state, workers=None, worker=None):
+    writer = MatchWriter(expected, state, worker)
+    jobs = (((mid, t), page_url(t, mid)) for mid, pages in expected.items() for t in pages)
+    revalidate = revalidation.Revalidation("ingest", lambda key: page_done(state, *key))
+    Pipeline(parse_page, writer.save, writer.finish, workers=workers, revalidation=revalidate).run(jobs)
+
+
+def stages_of(types):
+    return [ex.name for t in types for ex in extractors_for(t)]
+
+
+def setup(types, force):
+    load_all()
+    init_all()
+    types = [t for t in PAGE_ORDER if t in (types or page_types())]
+    if force is None:
+        force = config.FORCE_RECRAWL
+    state = crawl_state.load(stages_of(types))
+    return types, force, state
+
+
+def ingest(match_ids, types=None, workers=None, force=None):
+    types, force, state = setup(types, force)
+
+    expected = open_pages(match_ids, types, state, force)
+    skipped = len(match_ids) - len(expected)
+    if skipped:
+        print(f"⏭️  {skipped} of {len(match_ids)} matches already done (use --force to redo)")
+
+    run_pages(expected, state, workers)
+    print("Done.")
+
+
+def claimed_pages(claimed, state, force, worker):
+    """
+    The claimed pages that still need work, in page order. Jobs whose
+    stages were finished meanwhile (by a worker whose lease had expired)
+    are marked done without fetching anything.
+    """
+    expected, done = {}, []
+    for mid, pages in claimed.items():
+        pages = [t for t in PAGE_ORDER if t in pages]
+        todo = [t for t in pages if force or not page_done(state, mid, t)]
+        done += [(mid, t) for t in pages if t not in todo]
+        if todo:
+            expected[mid] = todo
+    if done:
+        conn = db.connect()
+        with conn:
+            for mid, t in done:
+                work_queue.finish(conn, worker, mid, t)
+        conn.close()
+    return expected
+
+
+def ingest_queue(types=None, workers=None, force=None, claim_size=50):
+    """
+    Worker loop for the shared work queue: enqueue whatever is still open,
+    then keep claiming `claim_size` matches at a time until nothing is left.
+    Start one of these per machine (or per process).
+    """
+    types, force, state = setup(types, force)
+    open_jobs = open_pages(frontier.match_ids(), types, state, force)
+    # Open pages are queued again even if the queue has them as done: a
+    # live match's pages stay pending in crawl_state until it is over
+    added = work_queue.enqueue(((mid, t) for mid, pages in open_jobs.items() for t in pages), requeue=True)
+    print(f"📥 Queued {added} new jobs. Queue: {work_queue.counts()}")
+
+    me = work_queue.worker_id()
+    with work_queue.Heartbeat(me):
+        while True:
+            claimed = work_queue.claim(me, claim_size)
+            if not claimed:
+                break
+            print(f"🔒 {me} claimed {len(claimed)} matches")
+            # Checkpoints as of now, not as of startup: other workers have been saving since
+            state.update(crawl_state.load(stages_of(types), claimed))
+            expected = claimed_pages(claimed, state, force, me)
+            if expected:
+                run_pages(expected, state, workers, worker=me)
+    print(f"Done. Queue: {work_queue.counts()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch each match page once and run every registered extractor on it.")
+    parser.add_argument("pages", nargs="*", help=f"page types to ingest: {', '.join(PAGE_ORDER)} (default: all)")
+    parser.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="redo matches already marked done in crawl_state")
+    parser.add_argument("--queue", action="store_true", help="claim work from the shared work_queue table (run one per machine)")
+    parser.add_argument("--claim-size", type=int, default=50, help="matches claimed at a time with --queue (default 50)")
+    parser.add_argument("--shard", help="k/N: only process matches with match_id %% N == k-1 (no shared queue needed)")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+    unknown = set(args.pages) - set(PAGE_ORDER)
+    if unknown:
+        parser.error(f"unknown page type(s): {', '.join(sorted(unknown))}")
+
+    if args.queue:
+        ingest_queue(args.pages or None, args.workers, args.force or None, args.claim_size)
+    else:
+        match_ids = frontier.match_ids()
+        if args.shard:
+            try:
+                match_ids = [mid for mid in match_ids if work_queue.in_shard(mid, args.shard)]
+            except ValueError as e:
+                parser.error(str(e))
+            print(f"Shard {args.shard}: {len(match_ids)} matches")
+        ingest(match_ids, args.pages or None, args.workers, args.force or None)
@@ -1,16 +1,15 @@
 
-import requests
-from bs4 import BeautifulSoup
 import re
 
-url = "https://www.cricbuzz.com/profiles/1114/paul-stirling"
-headers = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-}
+import config
+from fetcher import fetch
+from parsing import make_soup
+
+url = f"{config.BASE_URL}/profiles/1114/paul-stirling"
 
 try:
-    r = requests.get(url, headers=headers)
-    soup = BeautifulSoup(r.text, "html.parser")
+    r = fetch(url)
+    soup = make_soup(r.text)
     
     # Print the specific section containing personal info
     # Usuallly "Born" or "Birth Place"
@@ -0,0 +1,293 @@
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import config
+
+# Counters and histograms for every scraper, exported when the process exits.
+#
+#   metrics.inc("http_requests_total", host=host, status=200)
+#   metrics.observe("fetch_seconds", 0.42, host=host)
+#   metrics.gauge("concurrency_window", 8, host=host)   # last value wins
+#   with metrics.timer("db_commit_seconds"):
+#       ...
+#
+# At exit the run is written to CRICBUZZ_METRICS_DIR (default metrics/):
+#   <script>.prom   Prometheus text format, for node_exporter's textfile collector
+#   <script>.json   run summary: totals, rates and latency percentiles
+# CRICBUZZ_METRICS=0 turns recording off.
+#
+# Recording is a dict update under one lock, cheap enough to leave on.
+# Process pool workers can't export on their own: drain() hands their
+# numbers back to the parent, which merge()s them (see pipeline.py).
+
+PREFIX = "cricbuzz_"
+
+# Upper bounds in seconds; wide enough for both a 1 ms parse and a 30 s fetch
+BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+HELP = {
+    "http_requests_total": "Responses by host, status and source (network, cache, replay)",
+    "http_bytes_total": "Bytes of page text received from the network",
+    "http_errors_total": "Requests that raised instead of returning a response",
+    "retries_total": "Retried requests by host and reason",
+    "breaker_open_total": "Times a host's circuit breaker opened",
+    "dead_letters_total": "URLs given up on after all retries",
+    "concurrency_window": "Requests allowed in flight per host (see adaptive.py)",
+    "concurrency_cuts_total": "Times a host's concurrency window was cut, by reason",
+    "fetches_coalesced_total": "Fetches that waited for the same URL's request in progress instead of sending their own",
+    "pages_unchanged_total": "Revalidated pages that had not changed (304 or same content)",
+    "fetch_seconds": "Network fetch latency",
+    "parse_seconds": "Time to build the parse tree of a page",
+    "extract_seconds": "Time spent in one extractor",
+    "rows_written_total": "Rows changed per table and statement kind (insert, update, delete)",
+    "rows_failed_total": "Rows that could not be written per table",
+    "db_commit_seconds": "Time to write and commit one batch",
+}
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_counters: Dict[Key, float] = {}
+_histograms: Dict[Key, List] = {}  # key -> [bucket counts..., +Inf count, sum]
+_gauges: Dict[Key, float] = {}
+_started = time.time()
+_pid = os.getpid()
+_registered = False
+_owner = {"pid": os.getpid()}  # process whose numbers the registry holds
+
+
+def _check_fork():
+    # Called with _lock held. A forked pool worker starts with a copy of the
+    # parent's numbers; the parent still has them, so a worker that drained
+    # them would count them twice. Start the worker from zero instead.
+    if _owner["pid"] != os.getpid():
+        _owner["pid"] = os.getpid()
+        _counters.clear()
+        _histograms.clear()
+        _gauges.clear()
+
+
+def _key(name: str, labels) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _register_export():
+    # First thing recorded in this process: arrange for the export at exit
+    global _registered
+    _registered = True
+    if os.getpid() == _pid:
+        atexit.register(export)
+
+
+def inc(name: str, value: float = 1, **labels):
+    if not config.METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _check_fork()
+        if not _registered:
+            _register_export()
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    if not config.METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        _check_fork()
+        if not _registered:
+            _register_export()
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        h[i] += 1
+        h[-1] += seconds
+
+
+def gauge(name: str, value: float, **labels):
+    if not config.METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _check_fork()
+        if not _registered:
+            _register_export()
+        _gauges[key] = value
+
+
+class timer:
+    """Context manager: observe the time spent in the block."""
+
+    def __init__(self, name: str, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+def drain() -> dict:
+    """Take (and clear) everything recorded so far, as a picklable dict."""
+    with _lock:
+        _check_fork()
+        data = {"counters": dict(_counters), "histograms": {k: list(v) for k, v in _histograms.items()},
+                "gauges": dict(_gauges)}
+        _counters.clear()
+        _histograms.clear()
+        _gauges.clear()
+    return data
+
+
+def merge(data: dict):
+    """Add numbers drained in another process."""
+    if not config.METRICS_ENABLED or not data:
+        return
+    with _lock:
+        if not _registered and (data["counters"] or data["histograms"]):
+            _register_export()
+        for key, value in data["counters"].items():
+            _counters[key] = _counters.get(key, 0) + value
+        for key, counts in data["histograms"].items():
+            h = _histograms.setdefault(key, [0] * len(counts))
+            for i, n in enumerate(counts):
+                h[i] += n
+        _gauges.update(data.get("gauges", {}))
+
+
+# --- Export ---
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()) -> str:
+    items = list(extra) + list(labels)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text(job: str) -> str:
+    job_label = [("job", job)]
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+        gauges = sorted(_gauges.items())
+
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+        lines.append(f"{PREFIX}{name}{_labels(labels, job_label)} {value:.15g}")
+
+    for (name, labels), h in histograms:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ["+Inf"], h[:-1]):
+            cumulative += n
+            lines.append(f"{PREFIX}{name}_bucket{_labels(labels, job_label + [('le', bound)])} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_labels(labels, job_label)} {h[-1]:.6f}")
+        lines.append(f"{PREFIX}{name}_count{_labels(labels, job_label)} {cumulative}")
+
+    for (name, labels), value in gauges:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# HELP {PREFIX}{name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+        lines.append(f"{PREFIX}{name}{_labels(labels, job_label)} {value:.15g}")
+
+    lines.append(f"# TYPE {PREFIX}last_run_timestamp_seconds gauge")
+    lines.append(f"{PREFIX}last_run_timestamp_seconds{_labels([], job_label)} {time.time():.0f}")
+    lines.append(f"# TYPE {PREFIX}run_duration_seconds gauge")
+    lines.append(f"{PREFIX}run_duration_seconds{_labels([], job_label)} {time.time() - _started:.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def quantile(h: List, q: float) -> float:
+    """Estimate a quantile from bucket counts (linear within the bucket)."""
+    total = sum(h[:-1])
+    if not total:
+        return 0.0
+    rank = q * total
+    seen = 0
+    for i, n in enumerate(h[:-1]):
+        if seen + n >= rank and n:
+            lower = BUCKETS[i - 1] if i > 0 else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / n
+        seen += n
+    return BUCKETS[-1]
+
+
+def summary(job: str) -> dict:
+    duration = time.time() - _started
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+        gauges = sorted(_gauges.items())
+
+    totals = {}
+    series = []
+    for (name, labels), value in counters:
+        totals[name] = totals.get(name, 0) + value
+        series.append({"name": name, "labels": dict(labels), "value": value})
+    latencies = []
+    for (name, labels), h in histograms:
+        count = sum(h[:-1])
+        latencies.append({
+            "name": name, "labels": dict(labels), "count": count, "sum": round(h[-1], 6),
+            "mean": round(h[-1] / count, 6) if count else 0.0,
+            "p50": round(quantile(h, 0.50), 6), "p95": round(quantile(h, 0.95), 6), "p99": round(quantile(h, 0.99), 6),
+        })
+    return {
+        "job": job,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_started)),
+        "duration_seconds": round(duration, 3),
+        "totals": totals,
+        "rates_per_second": {name: round(value / max(duration, 1e-9), 3) for name, value in totals.items()},
+        "counters": series,
+        "histograms": latencies,
+        "gauges": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in gauges],
+    }
+
+
+def _write(path: str, text: str):
+    # Write-then-rename so a collector never reads half a file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def job_name() -> str:
+    return os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+
+
+def export(job: str = None):
+    if not config.METRICS_ENABLED or os.getpid() != _pid:
+        return
+    job = job or job_name()
+    try:
+        os.makedirs(config.METRICS_DIR, exist_ok=True)
+        _write(os.path.join(config.METRICS_DIR, f"{job}.prom"), prometheus_text(job))
+        _write(os.path.join(config.METRICS_DIR, f"{job}.json"), json.dumps(summary(job), indent=2))
+    except OSError as e:
+        print(f"⚠️ Could not export metrics: {e}")
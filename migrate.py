@@ -0,0 +1,368 @@
+import argparse
+import sqlite3
+import time
+
+import config
+import db
+
+# Versioned schema migrations for cricbuzz.db. Replaces migrate_schema.py,
+# migrate_int.py, migrate_v2.py and cleanup_v2.py.
+#
+#   python3 migrate.py            # bring the DB up to date
+#   python3 migrate.py --status   # current version and what is pending
+#
+# The schema version lives in PRAGMA user_version. Migrations run in order,
+# each in its own transaction together with its version bump, so a failed
+# one leaves the DB exactly at the previous version and the next run picks
+# up from there. ingest.init_all() and the init_db() of every script that
+# creates tables run this first, so the scrapers always see the current
+# schema, whichever of them touches the DB first.
+#
+# Databases from before the version counter (version 0) can be in any state
+# the old scripts left behind, so every migration checks what is actually
+# there (tables, columns, declared types) and does only what is missing.
+# A brand-new database has nothing to migrate: it is stamped with the
+# latest version and the init_db()s create the current tables.
+#
+# Data is moved with set-based INSERT ... SELECT, CHUNK source rows (by
+# rowid) per statement, printing progress on large tables. Tables whose
+# column types change are rebuilt the way SQLite recommends: create
+# <table>_new, copy, drop the old table, rename.
+
+CHUNK = 200_000
+
+MIGRATIONS = []  # (version, description, fn(conn)), in version order
+
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+# --- Helpers ---
+
+def tables(conn) -> set:
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+
+def columns(conn, table: str) -> dict:
+    """Column name -> declared type ({} if the table doesn't exist)."""
+    return {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def add_column(conn, table: str, column: str, decl: str):
+    cols = columns(conn, table)
+    if cols and column not in cols:
+        print(f"   + {table}.{column}")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def copy_rows(conn, source: str, target: str, target_cols, select_exprs, verb: str = "INSERT OR IGNORE") -> int:
+    """INSERT ... SELECT from `source` into `target` in rowid chunks; rows inserted."""
+    lo, hi, total = conn.execute(f"SELECT MIN(rowid), MAX(rowid), COUNT(*) FROM {source}").fetchone()
+    if not total:
+        return 0
+    sql = (f"{verb} INTO {target} ({', '.join(target_cols)}) "
+           f"SELECT {', '.join(select_exprs)} FROM {source} WHERE rowid BETWEEN ? AND ?")
+    copied = 0
+    start = time.perf_counter()
+    for first in range(lo, hi + 1, CHUNK):
+        copied += conn.execute(sql, (first, first + CHUNK - 1)).rowcount
+        if total > CHUNK:
+            done = min(1.0, (first + CHUNK - lo) / (hi - lo + 1))
+            print(f"   {source} → {target}: {done:.0%} ({copied:,} rows, {time.perf_counter() - start:.1f}s)")
+    print(f"   {source} → {target}: {copied:,} of {total:,} rows")
+    return copied
+
+
+def rebuild(conn, table: str, create_sql: str, exprs: dict = None):
+    """
+    Recreate `table` from `create_sql` (written for `table`) and copy its rows
+    over. Columns both versions have are copied, through exprs[column] when
+    given (e.g. a CAST); columns only the new version has get their default.
+    """
+    old = columns(conn, table)
+    conn.execute(f"DROP TABLE IF EXISTS {table}_new")
+    conn.execute(create_sql.replace(f"TABLE {table} (", f"TABLE {table}_new (", 1))
+    shared = [c for c in columns(conn, f"{table}_new") if c in old]
+    exprs = exprs or {}
+    copy_rows(conn, table, f"{table}_new", shared, [exprs.get(c, c) for c in shared], verb="INSERT OR REPLACE")
+    # Drop, then rename _new into place: renaming the old table away would
+    # make SQLite rewrite the other tables' foreign keys to follow it
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+
+# --- Migrations ---
+# Never edit one that has shipped: databases already past its version won't
+# run it again. Add a new one instead.
+
+LEGACY_SCHEMAS = {
+    "master": """
+        CREATE TABLE master (
+            match_id INTEGER PRIMARY KEY,
+            team1 TEXT,
+            team2 TEXT,
+            winner TEXT,
+            venue TEXT,
+            match_name TEXT
+        )""",
+    "match_squads": """
+        CREATE TABLE match_squads (
+            squad_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER NOT NULL,
+            player_id INTEGER NOT NULL,
+            team TEXT NOT NULL,
+            FOREIGN KEY (match_id) REFERENCES master(match_id),
+            FOREIGN KEY (player_id) REFERENCES players(player_id)
+        )""",
+    "batter_scorecard": """
+        CREATE TABLE batter_scorecard (
+            match_id INTEGER,
+            player_id INTEGER,
+            player_name TEXT,
+            R INTEGER,
+            B INTEGER,
+            fours INTEGER,
+            sixes INTEGER,
+            SR REAL,
+            FOREIGN KEY (match_id) REFERENCES master(match_id)
+        )""",
+    "bowler_scorecard": """
+        CREATE TABLE bowler_scorecard (
+            match_id INTEGER,
+            player_id INTEGER,
+            player_name TEXT,
+            O REAL,
+            M INTEGER,
+            R INTEGER,
+            W INTEGER,
+            NB INTEGER,
+            WB INTEGER,
+            ECO REAL,
+            FOREIGN KEY (match_id) REFERENCES master(match_id)
+        )""",
+    "match_awards": """
+        CREATE TABLE match_awards (
+            match_id INTEGER,
+            player_id INTEGER,
+            player_name TEXT,
+            award_name TEXT,
+            FOREIGN KEY (match_id) REFERENCES master(match_id)
+        )""",
+    "leaders": """
+        CREATE TABLE leaders (
+            match_id INTEGER,
+            team TEXT,
+            player_id INTEGER,
+            player_name TEXT,
+            role TEXT,
+            FOREIGN KEY (match_id) REFERENCES master(match_id),
+            FOREIGN KEY (player_id) REFERENCES players(player_id)
+        )""",
+}
+
+V2_SCHEMAS = {
+    "match_players": """
+        CREATE TABLE match_players (
+            match_id INTEGER,
+            player_id INTEGER,
+            team TEXT NOT NULL,
+            is_captain INTEGER DEFAULT 0,
+            is_vice_captain INTEGER DEFAULT 0,
+            is_wicket_keeper INTEGER DEFAULT 0,
+            PRIMARY KEY (match_id, player_id),
+            FOREIGN KEY (match_id) REFERENCES master(match_id),
+            FOREIGN KEY (player_id) REFERENCES players(player_id)
+        )""",
+    "batting_scorecard": """
+        CREATE TABLE batting_scorecard (
+            match_id INTEGER,
+            player_id INTEGER,
+            runs INTEGER,
+            balls INTEGER,
+            fours INTEGER,
+            sixes INTEGER,
+            strike_rate REAL,
+            PRIMARY KEY (match_id, player_id),
+            FOREIGN KEY (match_id) REFERENCES master(match_id),
+            FOREIGN KEY (player_id) REFERENCES players(player_id)
+        )""",
+    "bowling_scorecard": """
+        CREATE TABLE bowling_scorecard (
+            match_id INTEGER,
+            player_id INTEGER,
+            overs REAL,
+            maidens INTEGER,
+            runs INTEGER,
+            wickets INTEGER,
+            no_balls INTEGER,
+            wides INTEGER,
+            economy REAL,
+            PRIMARY KEY (match_id, player_id),
+            FOREIGN KEY (match_id) REFERENCES master(match_id),
+            FOREIGN KEY (player_id) REFERENCES players(player_id)
+        )""",
+    "match_awards": """
+        CREATE TABLE match_awards (
+            match_id INTEGER,
+            player_id INTEGER,
+            award_name TEXT,
+            PRIMARY KEY (match_id, award_name, player_id),
+            FOREIGN KEY (match_id) REFERENCES master(match_id),
+            FOREIGN KEY (player_id) REFERENCES players(player_id)
+        )""",
+}
+
+
+@migration(1, "profile and match name columns")
+def add_profile_columns(conn):
+    # Was migrate_schema.py
+    add_column(conn, "players", "birth_date", "TEXT")
+    add_column(conn, "players", "birth_place", "TEXT")
+    add_column(conn, "players", "country", "TEXT")
+    add_column(conn, "leaders", "player_name", "TEXT")
+    add_column(conn, "leaders", "role", "TEXT")
+    add_column(conn, "master", "match_name", "TEXT")
+
+
+@migration(2, "integer match IDs")
+def integer_match_ids(conn):
+    # Was migrate_int.py. Only tables still declaring match_id as something
+    # other than INTEGER are rebuilt; CAST turns a non-numeric ID into 0, as
+    # the old script did.
+    for table, create_sql in LEGACY_SCHEMAS.items():
+        declared = columns(conn, table).get("match_id")
+        if declared is None or declared == "INTEGER":
+            continue
+        if table == "match_awards" and "player_name" not in columns(conn, table):
+            create_sql = V2_SCHEMAS["match_awards"]
+        print(f"   rebuilding {table} (match_id {declared or 'untyped'} → INTEGER)")
+        rebuild(conn, table, create_sql, {"match_id": "CAST(match_id AS INTEGER)"})
+
+
+# (legacy table, V2 table, V2 columns, legacy expressions)
+V2_COPIES = [
+    ("match_squads", "match_players", ["match_id", "player_id", "team"], ["match_id", "player_id", "team"]),
+    ("batter_scorecard", "batting_scorecard",
+     ["match_id", "player_id", "runs", "balls", "fours", "sixes", "strike_rate"],
+     ["match_id", "player_id", "R", "B", "fours", "sixes", "SR"]),
+    ("bowler_scorecard", "bowling_scorecard",
+     ["match_id", "player_id", "overs", "maidens", "runs", "wickets", "no_balls", "wides", "economy"],
+     ["match_id", "player_id", "O", "M", "R", "W", "NB", "WB", "ECO"]),
+]
+
+
+@migration(3, "V2 tables")
+def v2_tables(conn):
+    # Was migrate_v2.py + the match_awards half of cleanup_v2.py
+    existing = tables(conn)
+    for table in ("match_players", "batting_scorecard", "bowling_scorecard"):
+        if table not in existing:
+            conn.execute(V2_SCHEMAS[table])
+    add_column(conn, "match_players", "is_wicket_keeper", "INTEGER DEFAULT 0")
+
+    for source, target, target_cols, exprs in V2_COPIES:
+        if source in existing:
+            copy_rows(conn, source, target, target_cols, exprs)
+    if "leaders" in existing:
+        flagged = conn.execute("""
+            UPDATE match_players SET is_captain = 1
+            WHERE is_captain = 0 AND (match_id, player_id) IN (SELECT match_id, player_id FROM leaders)
+        """).rowcount
+        print(f"   leaders → match_players: {flagged:,} captains flagged")
+
+    # match_awards: the V1 table (with player_name) becomes the V2 one, and
+    # migrate_v2.py's interim match_awards_v2 is folded into it
+    if "player_name" in columns(conn, "match_awards"):
+        rebuild(conn, "match_awards", V2_SCHEMAS["match_awards"])
+    elif "match_awards" not in existing:
+        conn.execute(V2_SCHEMAS["match_awards"])
+    if "match_awards_v2" in existing:
+        copy_rows(conn, "match_awards_v2", "match_awards", ["match_id", "player_id", "award_name"],
+                  ["match_id", "player_id", "award_name"])
+        conn.execute("DROP TABLE match_awards_v2")
+
+
+@migration(4, "drop V1 tables")
+def drop_v1_tables(conn):
+    # Was cleanup_v2.py. Nothing writes leaders any more (captains are flags
+    # on match_players, copied over by migration 3)
+    for table in ("match_squads", "batter_scorecard", "bowler_scorecard", "leaders"):
+        if table in tables(conn):
+            print(f"   dropping {table}")
+            conn.execute(f"DROP TABLE {table}")
+
+
+# --- Engine ---
+
+def version_of(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def pending(conn):
+    current = version_of(conn)
+    return [m for m in MIGRATIONS if m[0] > current]
+
+
+def migrate(path: str = None) -> int:
+    """Apply every pending migration; the version the DB ends up at."""
+    conn = db.connect(path, isolation_level=None)
+    try:
+        # Rebuilds drop and recreate tables other tables point at; that must
+        # not cascade or fail. (A no-op inside a transaction, so set it here.)
+        conn.execute("PRAGMA foreign_keys = OFF")
+        current = version_of(conn)
+        if current > latest():
+            print(f"⚠️ {path or config.DB_PATH} is at schema version {current}, newer than this code ({latest()})")
+            return current
+        if current == 0 and not tables(conn):
+            conn.execute(f"PRAGMA user_version = {latest()}")
+            return latest()
+
+        for version, description, fn in pending(conn):
+            print(f"🔧 Migration {version}: {description}")
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                fn(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                print(f"❌ Migration {version} failed; schema left at version {current}")
+                raise
+            current = version
+            print(f"✅ Migration {version} done in {time.perf_counter() - start:.1f}s")
+        return current
+    finally:
+        conn.close()
+
+
+def status(path: str = None):
+    conn = db.connect(path)
+    try:
+        print(f"Schema version {version_of(conn)} (latest {latest()})")
+        for version, description, _ in pending(conn):
+            print(f"   pending {version}: {description}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upgrade the database schema to the current version.")
+    parser.add_argument("--db", help=f"database file (default {config.DB_PATH})")
+    parser.add_argument("--status", action="store_true", help="show the version and pending migrations only")
+    args = parser.parse_args()
+    if not args.status:
+        try:
+            migrate(args.db)
+        except sqlite3.Error as e:
+            raise SystemExit(f"❌ {e}")
+    status(args.db)
@@ -0,0 +1,181 @@
+import argparse
+import datetime
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import db
+
+# Cleanup of scraped strings, applied by the extractors before rows reach
+# SQLite (replaces the clean_names.py / format_dates.py passes over players):
+#
+#   text("  Wankhede   Stadium ")          -> "Wankhede Stadium"
+#   player_name("Rohit Sharma (c & wk)")   -> "Rohit Sharma"
+#   name_role("Kristian ClarkeBowler")     -> ("Kristian Clarke", "Bowler")
+#   birth_date("September 03, 1990 (35 years)") -> "03/09/1990"
+#   team("Cricket match squads | India")   -> "India"
+#
+# Patterns are compiled once and results are memoized: the same names,
+# teams and dates come up in thousands of pages, so most calls are a dict
+# lookup.
+#
+# Rows stored before this existed (role suffixes included) can be cleaned in place:
+#
+#   python3 normalize.py
+#
+# which registers these functions with SQLite and runs one UPDATE per table,
+# touching only the rows whose value actually changes.
+
+CACHE_SIZE = 1 << 16  # distinct strings remembered per function
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Leadership markers next to a name: "(c)", "(vc)", "(wk)", "(c & wk)"
+MARKER_RE = re.compile(r"\s*\(\s*((?:c|vc|wk)(?:\s*&\s*(?:c|vc|wk))*)\s*\)", re.IGNORECASE)
+
+# Roles the squads page glues to the end of a name, longer matches first
+KNOWN_ROLES = [
+    "Batting Allrounder",
+    "Bowling Allrounder",
+    "WK-Batter",
+    "Batter",
+    "Bowler",
+    "Head Coach",
+    "Assistant coach",
+    "Fielding Coach",
+    "Batting Coach",
+    "Bowling Coach",
+    "Coach",
+]
+ROLE_SUFFIX_RE = re.compile(r"^(.*?)\s*(" + "|".join(map(re.escape, KNOWN_ROLES)) + r")$", re.DOTALL)
+
+# Page titles the team names are cut from start with one of these
+TITLE_PREFIX_RE = re.compile(r"^(?:Cricket match squads \| |Cricket commentary \| |Live Cricket Score, )+")
+
+AGE_RE = re.compile(r"\s*\(.*\)")  # "(35 years)"
+STORED_DATE_RE = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+DATE_FORMAT = "%d/%m/%Y"
+PROFILE_DATE_FORMAT = "%B %d, %Y"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def text(value: Optional[str]) -> Optional[str]:
+    """Whitespace runs collapsed and trimmed; None for nothing."""
+    if not value:
+        return None
+    return WHITESPACE_RE.sub(" ", value).strip() or None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def player_name(value: Optional[str]) -> Optional[str]:
+    """A player's name without (c) / (vc) / (wk) markers."""
+    value = text(value)
+    if value is None:
+        return None
+    return text(MARKER_RE.sub("", value))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def name_role(value: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Split 'Kristian ClarkeBowler' into ('Kristian Clarke', 'Bowler'); role None if there is none."""
+    value = text(value)
+    if value is None:
+        return None, None
+    m = ROLE_SUFFIX_RE.match(value)
+    if m:
+        return player_name(m.group(1)) or "", m.group(2)
+    return player_name(value), None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def birth_date(value: Optional[str]) -> Optional[str]:
+    """A profile's birth date as dd/mm/yyyy; kept as it is if it doesn't parse."""
+    value = text(value)
+    if value is None or STORED_DATE_RE.match(value):
+        return value
+    try:
+        parsed = datetime.datetime.strptime(AGE_RE.sub("", value).strip(), PROFILE_DATE_FORMAT)
+    except ValueError:
+        return value
+    return parsed.strftime(DATE_FORMAT)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def team(value: Optional[str]) -> Optional[str]:
+    """A team name without the page-title prefix it was cut from."""
+    value = text(value)
+    if value is None:
+        return None
+    return text(TITLE_PREFIX_RE.sub("", value))
+
+
+# --- Bulk mode ---
+
+SQL_FUNCTIONS = {
+    "norm_text": text,
+    "norm_name": player_name,
+    "norm_date": birth_date,
+    "norm_team": team,
+    # The two halves of name_role(), for names stored with the role glued on
+    "norm_split_name": lambda value: name_role(value)[0],
+    "norm_split_role": lambda value: name_role(value)[1],
+}
+
+# Legacy players.name values like "Kristian ClarkeBowler": the role moves to
+# role, the way the squads extractor splits it. Runs before the other
+# players columns, so norm_name then sees the bare name.
+ROLE_SPLIT_SQL = """
+    UPDATE players
+    SET role = norm_split_role(name), name = COALESCE(NULLIF(norm_split_name(name), ''), name)
+    WHERE norm_split_role(name) IS NOT NULL
+      AND (role IS NOT norm_split_role(name) OR name IS NOT COALESCE(NULLIF(norm_split_name(name), ''), name))
+"""
+
+# table -> {column: SQL function}
+BULK_COLUMNS = {
+    "players": {"name": "norm_name", "birth_date": "norm_date", "birth_place": "norm_text", "country": "norm_text"},
+    "master": {"team1": "norm_team", "team2": "norm_team", "winner": "norm_team", "venue": "norm_text"},
+    "match_players": {"team": "norm_team"},
+}
+
+
+def register_functions(conn):
+    """Make the normalizers callable from SQL on `conn` (norm_name(name), ...)."""
+    for name, fn in SQL_FUNCTIONS.items():
+        conn.create_function(name, 1, fn, deterministic=True)
+
+
+def bulk_update_sql(table: str, cols: dict) -> str:
+    # A value that normalizes to nothing is left as it is (players.name is NOT NULL)
+    exprs = {col: f"COALESCE({fn}({col}), {col})" for col, fn in cols.items()}
+    assignments = ", ".join(f"{col} = {expr}" for col, expr in exprs.items())
+    changed = " OR ".join(f"{col} IS NOT {expr}" for col, expr in exprs.items())
+    return f"UPDATE {table} SET {assignments} WHERE {changed}"
+
+
+def normalize_db(path: str = None) -> dict:
+    """Re-normalize every stored row in one UPDATE per table; rows changed per table."""
+    conn = db.connect(path)
+    register_functions(conn)
+    changed = {}
+    try:
+        with conn:
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(players)")}
+            if {"name", "role"} <= existing:
+                changed["players (role suffixes)"] = conn.execute(ROLE_SPLIT_SQL).rowcount
+            for table, cols in BULK_COLUMNS.items():
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                cols = {col: fn for col, fn in cols.items() if col in existing}
+                if cols:
+                    changed[table] = conn.execute(bulk_update_sql(table, cols)).rowcount
+    finally:
+        conn.close()
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-normalize names, roles, dates and teams already in the database.")
+    parser.add_argument("--db", help="database file (default from config)")
+    args = parser.parse_args()
+    for table, n in normalize_db(args.db).items():
+        print(f"🧹 {table}: {n} rows normalized")
@@ -0,0 +1,207 @@
+import hashlib
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+import config
+
+# Permanent archive of every page fetched, so tables can be rebuilt from it
+# (reparse.py) after an extractor changes, without touching the network.
+#
+#   page_archive/blobs.bin   compressed page bodies, appended back to back
+#   page_archive/index.db    url -> content hash, content hash -> (offset, length, codec)
+#
+# Bodies are stored once per distinct content (sha1 of the HTML), so
+# refetching an unchanged page costs an index row, not another blob.
+# Compression is zstd when the `zstandard` package is installed, zlib
+# otherwise; the codec is stored per blob so archives can mix both.
+# Reads go through an mmap of blobs.bin: no read() syscalls or copies,
+# and every reparse worker shares the OS page cache.
+
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+# Page type and id from the URL
+URL_TYPES = [
+    ("scorecard", re.compile(r"/live-cricket-scorecard/(\d+)/")),
+    ("match", re.compile(r"/live-cricket-scores/(\d+)/")),
+    ("squads", re.compile(r"/cricket-match-squads/(\d+)/")),
+    ("profile", re.compile(r"/profiles/(\d+)/")),
+]
+
+
+def classify(url: str) -> Tuple[Optional[str], Optional[int]]:
+    for page_type, pattern in URL_TYPES:
+        m = pattern.search(url)
+        if m:
+            return page_type, int(m.group(1))
+    return None, None
+
+
+@lru_cache(maxsize=None)
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress(data: bytes) -> Tuple[bytes, str]:
+    zstd = _zstd()
+    if zstd:
+        return zstd.ZstdCompressor(level=10).compress(data), CODEC_ZSTD
+    return zlib.compress(data, 6), CODEC_ZLIB
+
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        zstd = _zstd()
+        if not zstd:
+            raise RuntimeError("Archive has zstd blobs: pip install zstandard")
+        return zstd.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+class BlobReader:
+    """Read-only, mmap'ed access to blobs.bin; cheap enough to open in every worker process."""
+
+    def __init__(self, blob_path: str):
+        self.blob_path = blob_path
+        self._map = None
+
+    def _view(self, end: int):
+        # (Re)map when the file has grown past the current mapping
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            with open(self.blob_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def read(self, offset: int, length: int, codec: str) -> str:
+        view = self._view(offset + length)
+        return decompress(view[offset:offset + length], codec).decode("utf-8")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def blob_path(path: str = None) -> str:
+    return os.path.join(path or config.PAGE_ARCHIVE_PATH, "blobs.bin")
+
+
+class PageArchive:
+    def __init__(self, path: str = None):
+        self.path = path or config.PAGE_ARCHIVE_PATH
+        os.makedirs(self.path, exist_ok=True)
+        self.blob_path = blob_path(self.path)
+        self.stored = 0
+        self.deduped = 0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(self.path, "index.db"), check_same_thread=False,
+                                    isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                raw_size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                page_type TEXT,
+                page_id INTEGER,
+                hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_type ON pages (page_type, page_id)")
+        open(self.blob_path, "ab").close()
+        self.reader = BlobReader(self.blob_path)
+
+    def put(self, url: str, html: str):
+        data = html.encode("utf-8")
+        digest = hashlib.sha1(data).hexdigest()
+        page_type, page_id = classify(url)
+        with self._lock:
+            # The write lock on the index also serialises appends to blobs.bin
+            # between processes (e.g. several queue workers on one host)
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.conn.execute("SELECT 1 FROM blobs WHERE hash=?", (digest,)).fetchone():
+                    self.deduped += 1
+                else:
+                    blob, codec = compress(data)
+                    with open(self.blob_path, "ab") as f:
+                        offset = f.seek(0, os.SEEK_END)
+                        f.write(blob)
+                    self.conn.execute("INSERT INTO blobs VALUES (?, ?, ?, ?, ?)",
+                                      (digest, offset, len(blob), codec, len(data)))
+                    self.stored += 1
+                self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                                  (url, page_type, page_id, digest, time.time()))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def get(self, url: str) -> Optional[str]:
+        row = self.conn.execute("""
+            SELECT b.offset, b.length, b.codec FROM pages p JOIN blobs b ON b.hash = p.hash
+            WHERE p.url=?
+        """, (url,)).fetchone()
+        return self.reader.read(*row) if row else None
+
+    def latest(self, page_type: str) -> Iterator[Tuple[int, int, int, str]]:
+        """(page_id, offset, length, codec) of the newest page per id of this type."""
+        return self.conn.execute("""
+            SELECT p.page_id, b.offset, b.length, b.codec
+            FROM pages p JOIN blobs b ON b.hash = p.hash
+            WHERE p.page_type=? AND p.fetched_at = (
+                SELECT MAX(fetched_at) FROM pages q
+                WHERE q.page_type = p.page_type AND q.page_id = p.page_id
+            )
+            GROUP BY p.page_id
+            ORDER BY p.page_id
+        """, (page_type,))
+
+    def stats(self) -> Dict[str, int]:
+        pages, blobs = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM pages), (SELECT COUNT(*) FROM blobs)"
+        ).fetchone()
+        raw, stored = self.conn.execute(
+            "SELECT COALESCE(SUM(raw_size), 0), COALESCE(SUM(length), 0) FROM blobs"
+        ).fetchone()
+        return {"pages": pages, "blobs": blobs, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self):
+        with self._lock:
+            self.reader.close()
+            self.conn.close()
+
+
+_archive = None
+
+
+def get_page_archive() -> Optional[PageArchive]:
+    """Process-wide archive (None when disabled)."""
+    global _archive
+    if not config.PAGE_ARCHIVE_ENABLED:
+        return None
+    if _archive is None:
+        _archive = PageArchive()
+    return _archive
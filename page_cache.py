@@ -0,0 +1,148 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+import config
+
+# Markers that only show up once a match is over.
+# Pages for finished matches never change, so they are cached without expiry.
+FINISHED_RE = re.compile(
+    r"cb-text-complete|\bwon by\b|Match tied|No result|Match abandoned",
+    re.I,
+)
+
+# Only match pages can be "finished" - profiles keep changing.
+MATCH_PAGE_RE = re.compile(r"/(live-cricket-scores|live-cricket-scorecard|cricket-match-squads)/\d+/")
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def is_finished_page(url: str, html: str) -> bool:
+    return bool(MATCH_PAGE_RE.search(url)) and bool(FINISHED_RE.search(html))
+
+
+class PageCache:
+    """
+    Compressed HTML cache in a SQLite side file, keyed by URL.
+    Entries expire after `ttl` seconds unless pinned (finished matches).
+    Total compressed size is kept under `max_bytes` by evicting the
+    least recently used entries.
+    """
+
+    def __init__(self, path: str = None, ttl: int = None, max_bytes: int = None):
+        self.path = path or config.CACHE_PATH
+        self.ttl = config.CACHE_TTL if ttl is None else ttl
+        self.max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        # Shared between threads of the same process, so guard with a lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages(accessed_at)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, url: str) -> Optional[str]:
+        key = url_key(url)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT body, expires_at FROM pages WHERE key=?", (key,)
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+
+            body, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._delete(key)
+                self.conn.commit()
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE pages SET accessed_at=? WHERE key=?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return zlib.decompress(body).decode("utf-8")
+
+    def put(self, url: str, html: str, permanent: bool = None):
+        if permanent is None:
+            permanent = is_finished_page(url, html)
+
+        key = url_key(url)
+        body = zlib.compress(html.encode("utf-8"), 6)
+        now = time.time()
+        expires_at = None if permanent else now + self.ttl
+
+        with self._lock:
+            self._delete(key)
+            self.conn.execute("""
+                INSERT INTO pages (key, url, body, size, fetched_at, accessed_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (key, url, body, len(body), now, now, expires_at))
+            self.total_bytes += len(body)
+            self._evict()
+            self.conn.commit()
+
+    def _delete(self, key: str):
+        row = self.conn.execute("SELECT size FROM pages WHERE key=?", (key,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM pages WHERE key=?", (key,))
+            self.total_bytes -= row[0]
+
+    def _evict(self):
+        # Expired entries go first, then least recently used until we fit
+        now = time.time()
+        freed = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        ).fetchone()[0]
+        if freed:
+            self.conn.execute("DELETE FROM pages WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+            self.total_bytes -= freed
+
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT key, size FROM pages ORDER BY accessed_at LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM pages WHERE key=?", (key,))
+                self.total_bytes -= size
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_cache = None
+
+
+def get_cache() -> Optional[PageCache]:
+    """Process-wide cache instance (None when caching is disabled)."""
+    global _cache
+    if not config.CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = PageCache()
+    return _cache
@@ -0,0 +1,144 @@
+from functools import lru_cache
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import config
+import metrics
+import profiling
+
+# Parser backends, fastest first. Every backend hands the extractors a
+# BeautifulSoup tree, so extractor code is the same whichever one is used.
+#
+#   selectolax  - lexbor (C) parses the raw page and drops <script>, <style>,
+#                 <svg> etc. before bs4 sees it. Cricbuzz pages are mostly
+#                 inline JS, so bs4 ends up building a much smaller tree.
+#   lxml        - bs4 on top of libxml2
+#   html.parser - pure Python, always available
+BACKENDS = ["selectolax", "lxml", "html.parser"]
+
+# Subtrees no extractor ever reads
+STRIP_TAGS = ["script", "style", "noscript", "svg", "template", "iframe", "link", "meta"]
+
+
+@lru_cache(maxsize=None)
+def _has_lxml() -> bool:
+    try:
+        import lxml  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def _has_selectolax() -> bool:
+    try:
+        from selectolax.lexbor import LexborHTMLParser  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+_available = {
+    "selectolax": _has_selectolax,
+    "lxml": _has_lxml,
+    "html.parser": lambda: True,
+}
+_resolved = {}
+
+
+def resolve_backend(name: str = None) -> str:
+    """
+    Pick the backend to use for `name` (default: config.PARSER).
+    A missing backend falls back to the next one in BACKENDS.
+    """
+    name = name or config.PARSER
+    if name in _resolved:
+        return _resolved[name]
+
+    if name == "auto":
+        candidates = BACKENDS
+    elif name in BACKENDS:
+        candidates = BACKENDS[BACKENDS.index(name):]
+    else:
+        raise ValueError(f"Unknown parser backend: {name} (expected auto or one of {', '.join(BACKENDS)})")
+
+    chosen = next(b for b in candidates if _available[b]())
+    if name != "auto" and chosen != name:
+        print(f"⚠️ Parser '{name}' is not installed, falling back to '{chosen}'")
+    _resolved[name] = chosen
+    return chosen
+
+
+def parse_region(spec: str):
+    """
+    "title" -> ("title", None)
+    ".scorecard-bat-grid" -> (None, "scorecard-bat-grid")
+    "div.w-1/2" -> ("div", "w-1/2")
+    """
+    tag, _, cls = spec.partition(".")
+    return (tag or None, cls or None)
+
+
+class RegionStrainer(SoupStrainer):
+    """
+    parse_only filter that keeps a tag (and everything under it) only if it
+    matches one of the regions; text and tags outside those subtrees are never
+    turned into objects. A region's class matches any class token containing
+    it, same as the class_=re.compile(...) lookups the extractors use.
+    """
+
+    def __init__(self, regions: List[str]):
+        super().__init__()
+        self.regions = [parse_region(r) for r in regions]
+
+    def wanted(self, name, attrs) -> bool:
+        classes = (attrs or {}).get("class") or ""
+        if isinstance(classes, (list, tuple)):
+            classes = " ".join(classes)
+        tokens = classes.split()
+        for tag, cls in self.regions:
+            if tag and tag != name:
+                continue
+            if cls and not any(cls in t for t in tokens):
+                continue
+            return True
+        return False
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self.wanted(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return self.wanted(markup_name, markup_attrs)
+
+    def search(self, markup):
+        return None
+
+
+def make_soup(html: str, parser: str = None, regions: Optional[List[str]] = None) -> BeautifulSoup:
+    """
+    Parse a page with the configured backend.
+    With `regions` (e.g. ["title", "div.w-1/2"]) only those subtrees are
+    built, which is much cheaper than a full DOM of a large page.
+    """
+    backend = resolve_backend(parser)
+    with metrics.timer("parse_seconds", parser=backend), profiling.stage("parse"):
+        return _make_soup(html, backend, regions)
+
+
+def _make_soup(html: str, backend: str, regions: Optional[List[str]]) -> BeautifulSoup:
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(STRIP_TAGS)
+        html = tree.html
+        backend = "lxml" if _available["lxml"]() else "html.parser"
+
+    if regions:
+        return BeautifulSoup(html, backend, parse_only=RegionStrainer(regions))
+    return BeautifulSoup(html, backend)
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable
+
+import adaptive
+import db
+import metrics
+import profiling
+from crawler import Crawler
+from fetcher import NOT_MODIFIED
+
+# Three-stage ingest pipeline:
+#
+#   fetch  (async crawler)  ->  parse  (process pool)  ->  write  (one thread, one connection)
+#
+# Each hand-off is bounded, so a slow stage holds back the one before it
+# instead of piling pages up in memory:
+#   - at most `parse_queue` pages are waiting on / inside the process pool;
+#     fetch workers block until a slot frees up
+#   - the writer queue holds at most `write_queue` parsed results
+#
+# parse_fn(key, html) runs in a worker process and must be a module-level
+# function returning plain (picklable) records.
+# save_fn(cursor, key, records) runs in the writer thread; records is None
+# when the page could not be fetched or parsed. `cursor` is a db.BatchWriter,
+# so rows are written in batches of `batch_size` (or after a second
+# without new pages), one transaction each.
+#
+# With a `revalidation` (see revalidation.py), pages that come back 304 skip
+# the parse stage and reach save_fn with records = UNCHANGED. Validators of
+# the other pages are written at the end of the run, after their rows.
+
+_DONE = object()
+UNCHANGED = "unchanged"
+
+
+def _parse_in_worker(parse_fn, key, html):
+    # Metrics and profiles recorded in the worker (parse / extract time) go back with the records
+    records = parse_fn(key, html)
+    return records, metrics.drain(), profiling.drain()
+
+
+class Pipeline:
+    def __init__(self, parse_fn: Callable, save_fn: Callable, finish_fn: Callable = None,
+                 workers: int = None, parse_queue: int = None, write_queue: int = 256,
+                 batch_size: int = None, report_every: float = 5.0, crawler: Crawler = None,
+                 revalidation=None):
+        self.parse_fn = parse_fn
+        self.save_fn = save_fn
+        self.finish_fn = finish_fn
+        self.workers = workers or os.cpu_count() or 2
+        self.parse_queue = parse_queue or self.workers * 2
+        self.write_queue = queue.Queue(maxsize=write_queue)
+        self.batch_size = batch_size
+        self.report_every = report_every
+        self.crawler = crawler or Crawler()
+        self.revalidation = revalidation
+        if revalidation:
+            self.crawler.revalidation = revalidation
+
+        self.parsing = 0
+        self.fetched = 0
+        self.failed = 0
+        self.unchanged = 0
+        self.written = 0
+        self.db_stats = ""
+
+    def depths(self) -> str:
+        return (
+            f"fetch in-flight {self.crawler.window()} | "
+            f"parse {self.parsing}/{self.parse_queue} | "
+            f"write queue {self.write_queue.qsize()}/{self.write_queue.maxsize} | "
+            f"fetched {self.fetched}, unchanged {self.unchanged}, written {self.written}, failed {self.failed}"
+        )
+
+    def run(self, jobs: Iterable):
+        start = time.monotonic()
+        writer = threading.Thread(target=self._writer, name="db-writer")
+        writer.start()
+        try:
+            with ProcessPoolExecutor(self.workers) as pool:
+                asyncio.run(self._run(jobs, pool))
+        finally:
+            self.write_queue.put(_DONE)
+            writer.join()
+        print(f"📊 Pipeline finished in {time.monotonic() - start:.1f}s: {self.depths()}")
+        print(f"📊 DB writes: {self.db_stats}")
+        adaptive.report()
+
+    async def _run(self, jobs, pool):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.parse_queue)
+        pending = set()
+
+        async def put(item):
+            # Blocking put in a thread: a full writer queue stalls the parsers
+            await loop.run_in_executor(None, self.write_queue.put, item)
+
+        async def parse(key, html):
+            try:
+                records, worker_metrics, worker_profile = await loop.run_in_executor(
+                    pool, _parse_in_worker, self.parse_fn, key, html)
+                metrics.merge(worker_metrics)
+                profiling.merge(worker_profile)
+            except Exception as e:
+                print(f"❌ Parse failed for {key}: {e!r}")
+                records = None
+                self.failed += 1
+            finally:
+                self.parsing -= 1
+                slots.release()
+            await put((key, records))
+
+        async def on_page(key, page):
+            self.fetched += 1
+            if page.status_code == NOT_MODIFIED:
+                self.unchanged += 1
+                await put((key, UNCHANGED))
+                return
+            if page.status_code != 200:
+                print(f"❌ Failed to fetch {page.url}. Status: {page.status_code}")
+                self.failed += 1
+                await put((key, None))
+                return
+            if self.revalidation:
+                self.revalidation.remember(page)
+            await slots.acquire()
+            self.parsing += 1
+            task = asyncio.ensure_future(parse(key, page.text))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        async def report():
+            while True:
+                await asyncio.sleep(self.report_every)
+                print(f"📊 {self.depths()}")
+
+        reporter = asyncio.ensure_future(report())
+        try:
+            # Only the crawl: pool start-up and shutdown and waiting for the
+            # last parses aren't fetch time
+            with profiling.stage("fetch"):
+                await self.crawler.arun(jobs, on_page)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            reporter.cancel()
+
+    def _writer(self):
+        # The only connection that writes, so there is never lock contention
+        writer = db.BatchWriter(batch_size=self.batch_size)
+        while True:
+            try:
+                item = self.write_queue.get(timeout=1.0)
+            except queue.Empty:
+                # Parsers are behind: write what we have rather than hold it
+                writer.flush()
+                continue
+            if item is _DONE:
+                break
+            key, records = item
+            try:
+                with profiling.stage("write"):
+                    self.save_fn(writer, key, records)
+                self.written += 1
+            except Exception as e:
+                print(f"❌ Saving {key} failed: {e!r}")
+                self.failed += 1
+
+        if self.finish_fn:
+            self.finish_fn(writer)
+        if self.revalidation:
+            self.revalidation.flush(writer)
+        writer.close()
+        self.db_stats = writer.stats()
@@ -0,0 +1,316 @@
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+
+import config
+
+# Opt-in profiling of the crawl stages: fetch, parse, extract, write.
+#
+#   python3 ingest.py --profile                 # scripts with options
+#   python3 profiling.py squads.py              # any script
+#   CRICBUZZ_PROFILE=1 python3 enrich_players.py
+#
+# The code marks its stages with `with profiling.stage("parse"): ...`.
+# While profiling is on, every stage gets:
+#   - its own cProfile, switched on only inside the stage. Nested stages
+#     pause the outer one, so time is counted once, in the innermost stage.
+#   - a sampling profiler: every CRICBUZZ_PROFILE_INTERVAL ms (default 10) the stack of
+#     each thread is recorded under the stage it is in ("other" outside any
+#     stage). This also covers asyncio code, which cProfile attributes poorly.
+#   - tracemalloc: allocation growth since start, snapshotted when the stage
+#     ends (at most every SNAPSHOT_EVERY seconds)
+#
+# At exit everything goes to profiles/<script>-<time>/ (CRICBUZZ_PROFILE_DIR):
+#   <stage>.pstats      load with pstats / snakeviz
+#   <stage>.txt         top functions by cumulative time
+#   <stage>.collapsed   "frame;frame;frame count" lines for flamegraph.pl / speedscope
+#   all.collapsed       every thread and stage in one flamegraph
+#   allocations.txt     top allocation sites at exit and per stage
+#
+# Process pool workers (parse / extract in ingest.py) hand their profiles to
+# the parent every few seconds through drain() / merge(); the last few
+# seconds of a worker can be missing.
+# Off (the default), stage() returns a shared no-op context manager.
+
+# Leaf frames of a thread that is only waiting (lock, queue, select): not sampled
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("selectors.py", "select"),
+    ("queue.py", "get"), ("queues.py", "get"), ("connection.py", "wait"), ("connection.py", "_recv"),
+    ("thread.py", "_worker"),
+}
+SNAPSHOT_EVERY = 10.0  # seconds between tracemalloc snapshots of one stage
+DRAIN_EVERY = 5.0  # seconds between profile hand-offs from a pool worker
+TOP = 30
+
+_NULL = nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_profiles = {}  # (stage, thread id) -> cProfile.Profile
+_merged = defaultdict(list)  # stage -> [stats dicts from workers]
+_samples = defaultdict(Counter)  # stage -> tuple of frame labels, root first -> count
+_labels = {}  # code object -> "file.py:function"
+_snapshots = {}  # stage -> (time, tracemalloc snapshot)
+_state = {"pid": None, "baseline": None, "last_drain": 0.0, "started": 0.0}
+
+
+def enable():
+    """Turn profiling on for this process and the processes it starts."""
+    config.PROFILE_ENABLED = True
+    os.environ["CRICBUZZ_PROFILE"] = "1"
+
+
+def _start():
+    # Lazily, on the first stage of each process (pool workers included)
+    with _lock:
+        if _state["pid"] == os.getpid():
+            return
+        is_worker = _state["pid"] is not None or _is_pool_worker()
+        _state["pid"] = os.getpid()
+        _state["started"] = _state["last_drain"] = time.monotonic()
+        _profiles.clear()
+        _samples.clear()
+        # A forked worker inherits the stage stack of the thread that forked it
+        _local.stack = []
+        _stage_of.clear()
+    threading.Thread(target=_sampler, name="profiling-sampler", daemon=True).start()
+    if not is_worker:
+        tracemalloc.start(1)  # the allocating line is enough for the top sites
+        _state["baseline"] = tracemalloc.take_snapshot()
+        atexit.register(export)
+
+
+def _is_pool_worker() -> bool:
+    import multiprocessing
+    return multiprocessing.parent_process() is not None
+
+
+def stage(name: str):
+    if not config.PROFILE_ENABLED:
+        return _NULL
+    return _Stage(name)
+
+
+class _Stage:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if _state["pid"] != os.getpid():
+            _start()
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if stack:
+            _profile(stack[-1]).disable()
+        stack.append(self.name)
+        _stage_of[threading.get_ident()] = self.name
+        _enable(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        stack = _local.stack
+        _profile(stack.pop()).disable()
+        if stack:
+            _stage_of[threading.get_ident()] = stack[-1]
+            _enable(stack[-1])
+        else:
+            _stage_of.pop(threading.get_ident(), None)
+            if tracemalloc.is_tracing():
+                _maybe_snapshot(self.name)
+
+
+# thread id -> innermost stage, read by the sampler
+_stage_of = {}
+
+
+def _profile(name: str) -> cProfile.Profile:
+    key = (name, threading.get_ident())
+    prof = _profiles.get(key)
+    if prof is None:
+        with _lock:
+            prof = _profiles.setdefault(key, cProfile.Profile())
+    return prof
+
+
+def _enable(name: str):
+    try:
+        _profile(name).enable()
+    except ValueError:
+        # Python 3.12+ allows one active cProfile per process, not per thread;
+        # a stage running in a second thread then only shows up in the samples
+        pass
+
+
+def current_stage(thread_id: int) -> str:
+    return _stage_of.get(thread_id, "other")
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+    return label
+
+
+def _sampler():
+    # Kept cheap: stacks are counted as tuples of cached labels and only
+    # joined into flamegraph lines at export
+    me = threading.get_ident()
+    interval = config.PROFILE_INTERVAL_MS / 1000
+    while True:
+        time.sleep(interval)
+        for thread_id, frame in sys._current_frames().items():
+            code = frame.f_code
+            if thread_id == me or (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_label(frame.f_code))
+                frame = frame.f_back
+            labels.reverse()
+            with _lock:
+                _samples[current_stage(thread_id)][tuple(labels)] += 1
+
+
+def _maybe_snapshot(name: str):
+    now = time.monotonic()
+    last = _snapshots.get(name)
+    if last is None or now - last[0] >= SNAPSHOT_EVERY:
+        _snapshots[name] = (now, tracemalloc.take_snapshot())
+
+
+# --- Pool workers ---
+
+def _stats_of(prof: cProfile.Profile) -> dict:
+    prof.create_stats()
+    return dict(prof.stats)
+
+
+def drain(force: bool = False):
+    """
+    In a pool worker: profiles and samples collected since the last drain,
+    every DRAIN_EVERY seconds (None in between, or when profiling is off).
+    """
+    if not config.PROFILE_ENABLED or _state["pid"] != os.getpid():
+        return None
+    now = time.monotonic()
+    if not force and now - _state["last_drain"] < DRAIN_EVERY:
+        return None
+    _state["last_drain"] = now
+    with _lock:
+        profiles = list(_profiles.items())
+        _profiles.clear()
+        samples = {s: dict(c) for s, c in _samples.items()}
+        _samples.clear()
+    stats = defaultdict(list)
+    for (name, _), prof in profiles:
+        stats[name].append(_stats_of(prof))
+    return {"stats": dict(stats), "samples": samples}
+
+
+def merge(data):
+    """In the parent: add what a worker drained."""
+    if not data:
+        return
+    with _lock:
+        for name, stats_list in data["stats"].items():
+            _merged[name].extend(stats_list)
+        for name, counts in data["samples"].items():
+            _samples[name].update(counts)
+
+
+# --- Export ---
+
+class _StatsHolder:
+    # pstats.Stats accepts anything with create_stats() / .stats
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def export(path: str = None):
+    if _state["pid"] != os.getpid():
+        return
+    job = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+    path = path or os.path.join(config.PROFILE_DIR, f"{job}-{time.strftime('%Y%m%d-%H%M%S')}")
+    os.makedirs(path, exist_ok=True)
+
+    with _lock:
+        profiles = list(_profiles.items())
+        merged = {name: list(stats) for name, stats in _merged.items()}
+        samples = {name: Counter(counts) for name, counts in _samples.items()}
+
+    by_stage = defaultdict(list)
+    for (name, _), prof in profiles:
+        by_stage[name].append(_stats_of(prof))
+    for name, stats_list in merged.items():
+        by_stage[name].extend(stats_list)
+
+    for name, stats_list in sorted(by_stage.items()):
+        stats_list = [s for s in stats_list if s]
+        if not stats_list:
+            continue
+        stats = pstats.Stats(_StatsHolder(stats_list[0]))
+        for extra in stats_list[1:]:
+            stats.add(_StatsHolder(extra))
+        stats.dump_stats(os.path.join(path, f"{name}.pstats"))
+        out = io.StringIO()
+        pstats.Stats(os.path.join(path, f"{name}.pstats"), stream=out).sort_stats("cumulative").print_stats(TOP)
+        with open(os.path.join(path, f"{name}.txt"), "w") as f:
+            f.write(out.getvalue())
+
+    with open(os.path.join(path, "all.collapsed"), "w") as every:
+        for name, counts in sorted(samples.items()):
+            with open(os.path.join(path, f"{name}.collapsed"), "w") as f:
+                for stack, n in counts.most_common():
+                    stack = ";".join(stack)
+                    f.write(f"{stack} {n}\n")
+                    every.write(f"{name};{stack} {n}\n")
+
+    if tracemalloc.is_tracing():
+        _write_allocations(os.path.join(path, "allocations.txt"))
+
+    total = sum(sum(c.values()) for c in samples.values())
+    shares = ", ".join(f"{name} {sum(c.values()) * 100 / max(total, 1):.0f}%"
+                       for name, c in sorted(samples.items(), key=lambda kv: -sum(kv[1].values())))
+    print(f"🔬 Profile written to {path} ({total} samples: {shares})")
+
+
+def _write_allocations(path: str):
+    current, peak = tracemalloc.get_traced_memory()
+    final = tracemalloc.take_snapshot()
+    baseline = _state["baseline"]
+    with open(path, "w") as f:
+        f.write(f"Traced memory at exit: {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+        f.write(f"Top {TOP} allocation sites at exit:\n")
+        for stat in final.statistics("lineno")[:TOP]:
+            f.write(f"  {stat}\n")
+        for name, (_, snapshot) in sorted(_snapshots.items()):
+            f.write(f"\nGrowth since start, as of the last end of stage '{name}':\n")
+            for stat in snapshot.compare_to(baseline, "lineno")[:TOP]:
+                f.write(f"  {stat}\n")
+
+
+# --- Runner for scripts without a --profile option ---
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print("usage: python3 profiling.py <script.py> [args...]")
+        sys.exit(0 if len(sys.argv) > 1 else 2)
+    enable()
+    script = sys.argv[1]
+    sys.argv = sys.argv[1:]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    with stage("main"):
+        runpy.run_path(script, run_name="__main__")
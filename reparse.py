@@ -0,0 +1,97 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import crawl_state
+import db
+import metrics
+import profiling
+from enrich_players import parse_player_details, update_player
+from extractors import PAGE_ORDER, extractors_for, load_all, records_of, run_extractors
+from ingest import init_all
+from page_archive import BlobReader, PageArchive, blob_path
+
+# Rebuild the tables from the page archive (page_archive.py) without
+# fetching anything, e.g. after fixing an extractor:
+#
+#   python3 reparse.py                  # every page type
+#   python3 reparse.py scorecard        # just the scorecard extractors
+#   python3 reparse.py --workers 8
+#
+# The newest archived copy of each page is parsed in a process pool; the
+# main process writes the results in batches. Page types run in save order
+# (squads before the scorecard flags that update them, player profiles
+# last), so the whole rebuild is CPU-bound.
+
+PAGE_TYPES = PAGE_ORDER + ["profile"]
+
+_reader = None
+
+
+def parse_blob(task):
+    # Runs in a pool worker: open the archive and the extractors once per process
+    global _reader
+    page_type, page_id, offset, length, codec = task
+    if _reader is None:
+        load_all()
+        _reader = BlobReader(blob_path())
+    html = _reader.read(offset, length, codec)
+    if page_type == "profile":
+        return page_id, parse_player_details(html), metrics.drain(), profiling.drain()
+    return page_id, run_extractors(page_type, page_id, html), metrics.drain(), profiling.drain()
+
+
+def save_results(writer, page_type, page_id, results):
+    if page_type == "profile":
+        update_player(writer, page_id, *results)
+        return
+    for ex in extractors_for(page_type):
+        if ex.save and ex.name in results:
+            # Empty state: always rewrite, the point is to replace what's there
+            records, complete = records_of(results[ex.name])
+            crawl_state.save_stage(writer, {}, page_id, ex.name, records, ex.save, complete)
+
+
+def reparse(types=None, workers=None):
+    load_all()
+    init_all()
+    archive = PageArchive()
+    stats = archive.stats()
+    print(f"Archive: {stats['pages']} pages, {stats['blobs']} distinct bodies, "
+          f"{stats['raw_bytes'] / 1e6:.1f} MB of HTML in {stats['stored_bytes'] / 1e6:.1f} MB")
+
+    workers = workers or os.cpu_count() or 2
+    writer = db.BatchWriter()
+    with ProcessPoolExecutor(workers) as pool:
+        for page_type in [t for t in PAGE_TYPES if t in (types or PAGE_TYPES)]:
+            tasks = [(page_type, *row) for row in archive.latest(page_type)]
+            if not tasks:
+                continue
+            start = time.monotonic()
+            chunk = max(1, len(tasks) // (workers * 4))
+            for page_id, results, worker_metrics, worker_profile in pool.map(parse_blob, tasks, chunksize=chunk):
+                metrics.merge(worker_metrics)
+                profiling.merge(worker_profile)
+                save_results(writer, page_type, page_id, results)
+            writer.flush()
+            elapsed = time.monotonic() - start
+            print(f"   ✅ {page_type}: {len(tasks)} pages in {elapsed:.1f}s ({len(tasks) / max(elapsed, 1e-9):.0f} pages/s)")
+
+    writer.close()
+    archive.close()
+    print(f"Done. {writer.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the tables from archived pages, without refetching.")
+    parser.add_argument("pages", nargs="*", help=f"page types to reparse: {', '.join(PAGE_TYPES)} (default: all)")
+    parser.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+    unknown = set(args.pages) - set(PAGE_TYPES)
+    if unknown:
+        parser.error(f"unknown page type(s): {', '.join(sorted(unknown))}")
+    reparse(args.pages or None, args.workers)
@@ -0,0 +1,211 @@
+import email.utils
+import random
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+import dead_letter
+import metrics
+
+# Shared retry policy for every fetch (fetcher.fetch and crawler.Crawler).
+#
+#   - transient failures (timeouts, connection errors, 429 and 5xx) are
+#     retried up to CRICBUZZ_RETRIES times with "full jitter" exponential
+#     backoff: a random delay in [0, min(max, base * 2^attempt)], so workers
+#     that failed together don't come back together
+#   - a Retry-After header (seconds or HTTP date) is honoured as a minimum
+#     delay; one longer than CRICBUZZ_RETRY_MAX_DELAY means give up
+#   - every host has a circuit breaker: after BREAKER_FAILURES failures in
+#     a row it opens and requests wait out BREAKER_COOLDOWN instead of
+#     hitting the host; then a single probe goes through, and its result
+#     closes or re-opens the breaker. Waiting on the breaker is not an
+#     attempt (nothing was sent), but a URL gives up after waiting
+#     CRICBUZZ_BREAKER_MAX_WAIT in total, so a dead host can't stall a
+#     crawl forever. A probe that ends without a verdict (an unexpected
+#     exception, a cancelled task) hands the probe to the next caller
+#   - a URL that runs out of attempts goes to the dead_letters table
+#     (dead_letter.py), which a later pass retries in bulk
+#
+#   retry = Retry(url)
+#   while True:
+#       wait = retry.breaker_wait()
+#       if wait:
+#           delay = retry.blocked(wait)
+#       else:
+#           try:
+#               ... make the request ...
+#               if not retry.should_retry(status):
+#                   retry.succeeded()
+#                   return response
+#               delay = retry.failed(status=status, headers=headers)  # or exc=...
+#           finally:
+#               retry.release()
+#       if delay is None:
+#           give up (the URL is dead-lettered already)
+#       sleep(delay)
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+CIRCUIT_OPEN = "circuit open"
+
+
+class GaveUp(Exception):
+    """A URL ran out of attempts without getting any response."""
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter delay before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def retry_after(headers) -> Optional[float]:
+    """Seconds asked for by a Retry-After header, if any."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, host: str, failures: int = None, cooldown: float = None):
+        self.host = host
+        self.threshold = failures or config.BREAKER_FAILURES
+        self.cooldown = cooldown or config.BREAKER_COOLDOWN
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait_time(self) -> Tuple[float, bool]:
+        """
+        (0, probe) if a request may go now, else (seconds to wait before
+        asking again, False). `probe` is True for the one caller let
+        through a half-open breaker; it must call end_probe() when done.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0, False
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.cooldown - time.monotonic()
+                if remaining > 0:
+                    return remaining, False
+                # Cooldown over: this caller is the probe
+                self.state = self.HALF_OPEN
+                return 0.0, True
+            # Half-open: a probe is in flight, everyone else holds off
+            return min(1.0, self.cooldown), False
+
+    def end_probe(self):
+        """The probe is over; if it recorded neither success nor failure, the next caller probes."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic() - self.cooldown
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"✅ Circuit for {self.host} closed again")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                metrics.inc("breaker_open_total", host=self.host)
+                print(f"⛔ Circuit for {self.host} open after {self.failures} failures, pausing {self.cooldown:.0f}s")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+class Retry:
+    """Attempt bookkeeping for one URL (see the loop at the top of the file)."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.host = urlsplit(url).netloc
+        self.breaker = breaker_for(url)
+        self.attempts = 0
+        self.waited = 0.0  # seconds spent on an open breaker
+        self.probe = False
+
+    def breaker_wait(self) -> float:
+        wait, self.probe = self.breaker.wait_time()
+        return wait
+
+    def release(self):
+        """After every request, whatever happened to it."""
+        if self.probe:
+            self.probe = False
+            self.breaker.end_probe()
+
+    @staticmethod
+    def should_retry(status: int) -> bool:
+        return status in RETRY_STATUSES
+
+    def succeeded(self):
+        # Any real answer (404 included) means the host is up
+        self.breaker.record_success()
+        dead_letter.resolve(self.url)
+
+    def blocked(self, wait: float) -> Optional[float]:
+        """The breaker is open: wait it out, unless this URL has waited long enough already."""
+        self.status, self.error = None, CIRCUIT_OPEN
+        if self.waited + wait > config.BREAKER_MAX_WAIT:
+            return self._give_up(None, f"{CIRCUIT_OPEN} for {self.waited:.0f}s")
+        self.waited += wait
+        return wait
+
+    def failed(self, status: int = None, headers=None, exc: BaseException = None) -> Optional[float]:
+        """
+        Record a failed attempt (an error status, or the exception a request
+        raised); seconds to wait before the next one, or None to give up.
+        """
+        self.breaker.record_failure()
+        delay = backoff(self.attempts + 1)
+        asked = retry_after(headers)
+        if asked is not None:
+            if asked > config.RETRY_MAX_DELAY:
+                return self._give_up(status, f"Retry-After {asked:.0f}s")
+            delay = max(delay, asked)
+        if exc is not None:
+            # The repr (host, port, errno text) goes to the dead letter; the
+            # metric label only gets the exception type, so it stays bounded
+            return self._next(delay, status, repr(exc), type(exc).__name__)
+        return self._next(delay, status, f"HTTP {status}", status)
+
+    def _next(self, delay: float, status: Optional[int], error: str, reason) -> Optional[float]:
+        self.attempts += 1
+        self.status, self.error = status, error
+        if self.attempts >= config.RETRY_ATTEMPTS:
+            return self._give_up(status, error)
+        metrics.inc("retries_total", host=self.host, reason=reason)
+        return delay
+
+    def _give_up(self, status: Optional[int], error: str) -> None:
+        print(f"💀 Giving up on {self.url} after {self.attempts} attempts ({error})")
+        dead_letter.add(self.url, status, error, self.attempts)
+        return None
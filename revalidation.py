@@ -0,0 +1,109 @@
+import hashlib
+import time
+from typing import Callable, Dict, Optional
+
+import db
+import metrics
+from fetcher import NOT_MODIFIED, Page
+
+# Conditional requests for pages a script has already processed.
+#
+# Finished matches almost never change, but a forced refresh (--force /
+# CRICBUZZ_FORCE=1) would otherwise download, parse and fingerprint every
+# one of them again. A Revalidation remembers, per URL, the validators
+# (ETag / Last-Modified) and a hash of the page last processed:
+#
+#   revalidation = Revalidation("scorecard", lambda mid: all stages of mid are done)
+#   crawl(jobs, handle, revalidation=revalidation)
+#   def handle(match_id, page):
+#       if page.status_code == 304: return          # unchanged: no parse, no writes
+#       ... save the rows through `writer` ...
+#       revalidation.save(writer, page)             # same batch as the rows
+#
+# A page is only requested conditionally when `is_current(key)` says what
+# was saved from it is complete (crawl_state), so a validator can never hide
+# a page whose processing failed. Pages that come back with the same hash
+# (a cache hit, or a server without validators) are turned into 304s too.
+# Each script has its own scope: two scripts reading the same URL keep
+# separate validators.
+
+
+def init_db():
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS http_validators (
+            scope TEXT,
+            url TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            body_hash TEXT,
+            updated_at REAL,
+            PRIMARY KEY (scope, url)
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def body_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class Revalidation:
+    def __init__(self, scope: str, is_current: Callable[[object], bool]):
+        self.scope = scope
+        self.is_current = is_current
+        self.pending = []  # remember()ed pages, written by flush()
+        init_db()
+        conn = db.connect()
+        self.known: Dict[str, tuple] = {
+            url: (etag, modified, digest) for url, etag, modified, digest in conn.execute(
+                "SELECT url, etag, last_modified, body_hash FROM http_validators WHERE scope=?", (scope,))
+        }
+        conn.close()
+
+    def headers(self, key, url: str) -> Optional[dict]:
+        """Conditional request headers for `url`, or None to fetch it normally."""
+        known = self.known.get(url)
+        if known is None or not self.is_current(key):
+            return None
+        etag, modified, _ = known
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+        return headers
+
+    def check(self, page: Page) -> Page:
+        """The page of a conditional fetch, as a 304 if it is what was processed last time."""
+        if page.status_code == 200:
+            known = self.known.get(page.url)
+            if known is None or known[2] != body_hash(page.text):
+                return page
+            page = page._replace(status_code=NOT_MODIFIED, text="")
+        if page.status_code == NOT_MODIFIED:
+            metrics.inc("pages_unchanged_total", scope=self.scope)
+        return page
+
+    def _row(self, page: Page) -> tuple:
+        # Validators only come with network responses; a cached page keeps just its hash
+        etag, modified = page.validator or (None, None)
+        digest = body_hash(page.text)
+        self.known[page.url] = (etag, modified, digest)
+        return self.scope, page.url, etag, modified, digest, time.time()
+
+    def save(self, cursor, page: Page):
+        """Store the validators of a page whose rows were just written through `cursor`."""
+        if page.status_code == 200:
+            cursor.execute("INSERT OR REPLACE INTO http_validators VALUES (?, ?, ?, ?, ?, ?)", self._row(page))
+
+    def remember(self, page: Page):
+        """Like save(), but held back until flush(): for pages whose rows are written later."""
+        if page.status_code == 200:
+            self.pending.append(self._row(page))
+
+    def flush(self, cursor):
+        if self.pending:
+            cursor.executemany("INSERT OR REPLACE INTO http_validators VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+            self.pending = []
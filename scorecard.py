@@ -1,17 +1,23 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import sqlite3
-import time
 import re
 
-MATCH_IDS = [
-    116441, 121389, 121400, 121406, 133000, 133011, 133017, 
-    137826, 137831, 140537, 140548, 140559
-]
+import config
+import crawl_state
+import db
+import frontier
+import migrate
+import profiling
+import revalidation
+from crawler import crawl
+from fetcher import NOT_MODIFIED
+from extractors import RESULT_REGIONS, match_finished, register, page_url
+from parsing import make_soup
 
-DB_PATH = "cricbuzz.db"
+DB_PATH = config.DB_PATH
 
 def init_db():
+    migrate.migrate(DB_PATH)
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
@@ -64,150 +70,182 @@ def clean_int(val):
     except:
         return 0
 
+def save_batting(cursor, match_id, rows):
+    # Clear existing data for this match first
+    cursor.execute("DELETE FROM batting_scorecard WHERE match_id=?", (int(match_id),))
+    cursor.executemany("""
+        INSERT OR IGNORE INTO batting_scorecard (match_id, player_id, runs, balls, fours, sixes, strike_rate)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+def save_bowling(cursor, match_id, rows):
+    cursor.execute("DELETE FROM bowling_scorecard WHERE match_id=?", (int(match_id),))
+    cursor.executemany("""
+        INSERT OR IGNORE INTO bowling_scorecard (match_id, player_id, overs, maidens, runs, wickets, no_balls, wides, economy)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+# Only these rows are parsed (see parsing.make_soup), plus the result banner:
+# a scorecard is only final once the match is
+BATTING_REGIONS = [".scorecard-bat-grid"]
+BOWLING_REGIONS = [".scorecard-bowl-grid"]
+
+@register("scorecard", "batting", save=save_batting, regions=BATTING_REGIONS + RESULT_REGIONS, complete=match_finished)
+def extract_batting(soup, match_id):
+    # The new layout uses "grid" classes.
+    # We search for rows directly.
+    rows = []
+    bat_rows = soup.find_all("div", class_=re.compile(r"scorecard-bat-grid"))
+    for row in bat_rows:
+        # Skip header row (contains "Batter")
+        if "Batter" in row.get_text():
+            continue
+        
+        # Each row follows a flexible grid structure
+        # We can rely on recursive children or direct children.
+        # Since utility classes clutter things, let's grab all text nodes or specific children.
+        # However, identifying columns by position is safer if we just grab direct children divs.
+        
+        cols = row.find_all("div", recursive=False)
+        # Structure:
+        # 0: Name + Dismissal (Nested)
+        # 1: R
+        # 2: B
+        # 3: 4s
+        # 4: 6s
+        # 5: SR
+        # 6+: Icon etc.
+        
+        if len(cols) < 6: continue
+        
+        # Check for Name
+        name_col = cols[0]
+        link = name_col.find("a", href=re.compile(r"/profiles/"))
+        if not link: continue # Probably Extras or Total row
+        
+        href = link['href']
+        m = re.search(r"/profiles/(\d+)/", href)
+        p_id = int(m.group(1)) if m else 0
+        
+        # Extract numbers
+        # Text usually inside these cols
+        r_val = clean_int(cols[1].get_text())
+        b_val = clean_int(cols[2].get_text())
+        fours = clean_int(cols[3].get_text())
+        sixes = clean_int(cols[4].get_text())
+        sr = clean_float(cols[5].get_text())
+        
+        rows.append((int(match_id), p_id, r_val, b_val, fours, sixes, sr))
+    return rows
+
+@register("scorecard", "bowling", save=save_bowling, regions=BOWLING_REGIONS + RESULT_REGIONS, complete=match_finished)
+def extract_bowling(soup, match_id):
+    rows = []
+    bowl_rows = soup.find_all("div", class_=re.compile(r"scorecard-bowl-grid"))
+    for row in bowl_rows:
+        if "Bowler" in row.get_text():
+            continue
+        
+        # Bowling rows have 'a' tag as direct child for name, then 'divs' for stats
+        # So we get all direct children regardless of tag type
+        cols = row.find_all(recursive=False)
+        
+        # Structure:
+        # 0: Name (Link)
+        # 1: O
+        # 2: M
+        # 3: R
+        # 4: W
+        # 5: NB
+        # 6: WD
+        # 7: ECO
+        # 8+: Icon
+        
+        if len(cols) < 8: continue
+        
+        name_col = cols[0]
+        # If name_col is the 'a' tag itself
+        if name_col.name == 'a':
+            link = name_col
+        else:
+             # Fallback in case it's wrapped
+            link = name_col.find("a", href=re.compile(r"/profiles/"))
+        
+        if not link: continue
+        
+        href = link['href']
+        m = re.search(r"/profiles/(\d+)/", href)
+        p_id = int(m.group(1)) if m else 0
+        
+        o_val = clean_float(cols[1].get_text())
+        m_val = clean_int(cols[2].get_text())
+        r_val = clean_int(cols[3].get_text())
+        w_val = clean_int(cols[4].get_text())
+        nb_val = clean_int(cols[5].get_text())
+        wd_val = clean_int(cols[6].get_text()) # WB
+        eco_val = clean_float(cols[7].get_text())
+        
+        rows.append((int(match_id), p_id, o_val, m_val, r_val, w_val, nb_val, wd_val, eco_val))
+    return rows
+
 def scrape_scorecards():
     init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
+    crawl_state.init_db()
+    stages = ["batting", "bowling"]
+    state = crawl_state.load(stages)
+    # Rows are buffered and written in batches (see db.py)
+    writer = db.BatchWriter()
+    # Pages of finished matches are revalidated instead of downloaded again
+    revalidate = revalidation.Revalidation(
+        "scorecard", lambda mid: all(crawl_state.is_done(state, mid, s) for s in stages))
     
-    for match_id in MATCH_IDS:
+    def handle(match_id, r):
         print(f"Details for Match ID: {match_id}...")
         
-        url = f"https://www.cricbuzz.com/live-cricket-scorecard/{match_id}/match"
-        
         try:
-            r = requests.get(url, headers=headers, timeout=15)
+            if r.status_code == NOT_MODIFIED:
+                print("   ⏭️ Unchanged since last run.")
+                return
             if r.status_code != 200:
                 print(f"❌ Failed to fetch page. Status: {r.status_code}")
-                # Try fallback just in case
-                url2 = f"https://www.cricbuzz.com/live-cricket-scorecard/{match_id}/scorecard"
-                r = requests.get(url2, headers=headers, timeout=15)
-                if r.status_code != 200: continue
+                for stage in stages:
+                    crawl_state.mark_failed(writer, match_id, stage, f"HTTP {r.status_code}")
+                return
                 
-            soup = BeautifulSoup(r.text, "html.parser")
-            
-            # Clear existing data for this match in new tables
-            cursor.execute("DELETE FROM batting_scorecard WHERE match_id=?", (int(match_id),))
-            cursor.execute("DELETE FROM bowling_scorecard WHERE match_id=?", (int(match_id),))
-
+            soup = make_soup(r.text, regions=BATTING_REGIONS + BOWLING_REGIONS + RESULT_REGIONS)
             
-            # The new layout uses "grid" classes.
-            # We search for rows directly.
-            
-            # --- BATTING ---
-            bat_rows = soup.find_all("div", class_=re.compile(r"scorecard-bat-grid"))
-            bat_count = 0
-            for row in bat_rows:
-                # Skip header row (contains "Batter")
-                if "Batter" in row.get_text():
-                    continue
-                
-                # Each row follows a flexible grid structure
-                # We can rely on recursive children or direct children.
-                # Since utility classes clutter things, let's grab all text nodes or specific children.
-                # However, identifying columns by position is safer if we just grab direct children divs.
-                
-                cols = row.find_all("div", recursive=False)
-                # Structure:
-                # 0: Name + Dismissal (Nested)
-                # 1: R
-                # 2: B
-                # 3: 4s
-                # 4: 6s
-                # 5: SR
-                # 6+: Icon etc.
-                
-                if len(cols) < 6: continue
-                
-                # Check for Name
-                name_col = cols[0]
-                link = name_col.find("a", href=re.compile(r"/profiles/"))
-                if not link: continue # Probably Extras or Total row
-                
-                p_name = link.get_text().strip()
-                href = link['href']
-                m = re.search(r"/profiles/(\d+)/", href)
-                p_id = int(m.group(1)) if m else 0
-                
-                # Extract numbers
-                # Text usually inside these cols
-                r_val = clean_int(cols[1].get_text())
-                b_val = clean_int(cols[2].get_text())
-                fours = clean_int(cols[3].get_text())
-                sixes = clean_int(cols[4].get_text())
-                sr = clean_float(cols[5].get_text())
-                
-                cursor.execute("""
-                    INSERT OR IGNORE INTO batting_scorecard (match_id, player_id, runs, balls, fours, sixes, strike_rate)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (int(match_id), p_id, r_val, b_val, fours, sixes, sr))
-                bat_count += 1
-
-            # --- BOWLING ---
-            bowl_rows = soup.find_all("div", class_=re.compile(r"scorecard-bowl-grid"))
-            bowl_count = 0
-            for row in bowl_rows:
-                if "Bowler" in row.get_text():
-                    continue
-                
-                # Bowling rows have 'a' tag as direct child for name, then 'divs' for stats
-                # So we get all direct children regardless of tag type
-                cols = row.find_all(recursive=False)
-                
-                # Structure:
-                # 0: Name (Link)
-                # 1: O
-                # 2: M
-                # 3: R
-                # 4: W
-                # 5: NB
-                # 6: WD
-                # 7: ECO
-                # 8+: Icon
-                
-                if len(cols) < 8: continue
-                
-                name_col = cols[0]
-                # If name_col is the 'a' tag itself
-                if name_col.name == 'a':
-                    link = name_col
-                else:
-                     # Fallback in case it's wrapped
-                    link = name_col.find("a", href=re.compile(r"/profiles/"))
-                
-                if not link: continue
-                
-                p_name = link.get_text().strip()
-                href = link['href']
-                m = re.search(r"/profiles/(\d+)/", href)
-                p_id = int(m.group(1)) if m else 0
-                
-                o_val = clean_float(cols[1].get_text())
-                m_val = clean_int(cols[2].get_text())
-                r_val = clean_int(cols[3].get_text())
-                w_val = clean_int(cols[4].get_text())
-                nb_val = clean_int(cols[5].get_text())
-                wd_val = clean_int(cols[6].get_text()) # WB
-                eco_val = clean_float(cols[7].get_text())
-                
-                cursor.execute("""
-                    INSERT OR IGNORE INTO bowling_scorecard (match_id, player_id, overs, maidens, runs, wickets, no_balls, wides, economy)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (int(match_id), p_id, o_val, m_val, r_val, w_val, nb_val, wd_val, eco_val))
-                bowl_count += 1
+            bat = extract_batting(soup, match_id)
+            bowl = extract_bowling(soup, match_id)
+            finished = match_finished(soup)
+            # Unchanged scorecards are not deleted and re-inserted
+            crawl_state.save_stage(writer, state, match_id, "batting", bat, save_batting, finished)
+            crawl_state.save_stage(writer, state, match_id, "bowling", bowl, save_bowling, finished)
+            revalidate.save(writer, r)
             
-            conn.commit()
-            print(f"   ✅ {match_id}: Batters={bat_count}, Bowlers={bowl_count}")
-            time.sleep(1.0)
+            print(f"   ✅ {match_id}: Batters={len(bat)}, Bowlers={len(bowl)}")
             
         except Exception as e:
             print(f"❌ Error processing {match_id}: {e}")
+            for stage in stages:
+                crawl_state.mark_failed(writer, match_id, stage, e)
 
-    conn.close()
-    print("Done.")
+    jobs = [
+        (match_id, [
+            page_url("scorecard", match_id),
+            # Fallback just in case
+            f"{config.BASE_URL}/live-cricket-scorecard/{match_id}/scorecard",
+        ])
+        for match_id in crawl_state.pending(frontier.match_ids(), stages, state)
+    ]
+    crawl(jobs, handle, timeout=15, revalidation=revalidate)
+
+    writer.close()
+    print(f"Done. {writer.stats()}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the batting and bowling scorecards of every match in the frontier.")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
     scrape_scorecards()
@@ -1,45 +1,49 @@
+import argparse
 
 import requests
 from bs4 import BeautifulSoup
-import sqlite3
 import re
-import time
 from typing import List, Dict, Optional
 
+import config
+import crawl_state
+import db
+import frontier
+import migrate
+import normalize
+import profiling
+from crawler import crawl
+from extractors import match_finished, register
+from fetcher import fetch
+from parsing import make_soup
+
 class SportsMatchScraper:
     """Scraper for specific cricket match data with refined schema"""
     
-    BASE_URL = "https://www.cricbuzz.com"
-    
-    # Specific list of matches provided by user
-    MATCH_IDS = [
-        116441, 121389, 121400, 121406, 133000, 133011, 133017, 
-        137826, 137831, 140537, 140548, 140559
-    ]
+    BASE_URL = config.BASE_URL
     
-    HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    }
+    HEADERS = config.HEADERS
     
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
+        self.failed = {}  # match_id -> error, for the last scrape()
+        self.unfinished = set()  # match_ids whose page shows no result yet
         
     def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
         try:
-            time.sleep(0.5) 
-            response = self.session.get(url, timeout=30)
+            response = fetch(url, timeout=30, session=self.session)
             if response.status_code == 404:
                 return None
-            response.raise_for_status()
-            return BeautifulSoup(response.text, "html.parser")
+            if response.status_code != 200:
+                raise requests.HTTPError(f"HTTP {response.status_code}")
+            return make_soup(response.text)
         except Exception as e:
             print(f"❌ Error fetching {url}: {e}")
             return None
 
     def clean_text(self, text: str) -> str:
-        if not text: return ""
-        return re.sub(r"\s+", " ", text).strip()
+        return normalize.text(text) or ""
 
     def get_match_details(self, match_id: int) -> Dict:
         """Fetch details using match_id"""
@@ -48,9 +52,13 @@ class SportsMatchScraper:
         # Strategy: Use the 'squads' URL strategy or similar to get the title/header first?
         # Actually, simpler: Use the live-scores URL with a dummy slug, catch redirect or parse.
         
-        url = f"{self.BASE_URL}/live-cricket-scores/{match_id}/match"
-        soup = self.fetch_page(url)
-        
+        soup = self.fetch_page(self.match_url(match_id))
+        return self.parse_match_details(match_id, soup)
+
+    def match_url(self, match_id: int) -> str:
+        return f"{self.BASE_URL}/live-cricket-scores/{match_id}/match"
+
+    def parse_match_details(self, match_id: int, soup: Optional[BeautifulSoup]) -> Dict:
         data = {
             "match_id": str(match_id),
             "team1": "Unknown",
@@ -87,15 +95,11 @@ class SportsMatchScraper:
         venue_el = soup.select_one('a[href*="/venues/"]')
         if venue_el:
             data["venue"] = self.clean_text(venue_el.get_text())
-        else:
-             # Fallback
-             match_info = soup.select_one(".cb-nav-subhdr") # sometimes holds venue?
-             pass
 
         # 3. Winner
         # Look for the result status
         # <div class="cb-col cb-col-100 cb-min-stts cb-text-complete">Team A won by X runs</div>
-        result_el = soup.select_one(".cb-text-complete")
+        result_el = soup.select_one(".cb-text-complete, .cb-text-abandon")
         if result_el:
             result_text = self.clean_text(result_el.get_text())
             data["winner"] = self.extract_winner_name(result_text, data["team1"], data["team2"])
@@ -114,10 +118,8 @@ class SportsMatchScraper:
         try:
             if " vs " in title:
                 parts = title.split(" vs ")
-                t1 = parts[0].strip()
-                # Cleanup specific prefix seen in logs
-                t1 = t1.replace("Cricket commentary | ", "")
-                t1 = t1.replace("Live Cricket Score, ", "")
+                # Drops the page-title prefix ("Cricket commentary | ", ...)
+                t1 = normalize.team(parts[0]) or ""
                 
                 remainder = parts[1]
                 # Split by comma or known separators
@@ -128,7 +130,7 @@ class SportsMatchScraper:
                         i = remainder.find(sep)
                         if i != -1 and i < idx:
                             idx = i
-                t2 = remainder[:idx].strip()
+                t2 = normalize.team(remainder[:idx]) or ""
         except:
             pass
         return t1, t2
@@ -160,29 +162,59 @@ class SportsMatchScraper:
         if "no result" in txt:
             return "No Result"
 
+        if "abandon" in txt:
+            return "Abandoned"
+
         # Fallback: if text starts with team name
         if t1 and result_text.startswith(t1): return t1
         if t2 and result_text.startswith(t2): return t2
         
         return result_text # Return full string if unsure, better than null
 
-    def scrape(self) -> List[Dict]:
+    def scrape(self, match_ids: List[int] = None) -> List[Dict]:
         matches = []
-        for mid in self.MATCH_IDS:
+        self.failed = {}
+        self.unfinished = set()
+
+        def handle(mid, response):
             print(f"Processing {mid}...")
-            details = self.get_match_details(mid)
+            soup = None
+            if response.status_code == 200:
+                soup = make_soup(response.text)
+                if not match_finished(soup):
+                    self.unfinished.add(mid)
+            else:
+                self.failed[mid] = f"HTTP {response.status_code}"
+                if response.status_code != 404:
+                    print(f"❌ Error fetching {response.url}: HTTP {response.status_code}")
+            details = self.parse_match_details(mid, soup)
             matches.append(details)
             print(f"   -> {details['team1']} vs {details['team2']} | Winner: {details['winner']}")
+
+        if match_ids is None:
+            match_ids = frontier.match_ids()
+        crawl([(mid, self.match_url(mid)) for mid in match_ids], handle, timeout=30)
         return matches
 
 
+# Upsert keeps any columns of an existing row that the scraper doesn't set
+# (INSERT OR REPLACE would delete the row and reinsert it)
+UPSERT_MATCH_SQL = """
+    INSERT INTO master (match_id, team1, team2, winner, venue, match_name)
+    VALUES (:match_id, :team1, :team2, :winner, :venue, :match_name)
+    ON CONFLICT(match_id) DO UPDATE SET
+        team1=excluded.team1, team2=excluded.team2, winner=excluded.winner,
+        venue=excluded.venue, match_name=excluded.match_name
+"""
+
 class SportsMatchRecords:
-    def __init__(self, db_path: str = "cricbuzz.db"):
+    def __init__(self, db_path: str = config.DB_PATH):
         self.db_path = db_path
         self._init_db()
 
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
+        migrate.migrate(self.db_path)
+        conn = db.connect(self.db_path)
         # Re-create table with new schema
         conn.execute("DROP TABLE IF EXISTS master_new") 
         # Check if we should migrate data? No, we are re-scraping specific IDs.
@@ -230,31 +262,25 @@ class SportsMatchRecords:
         conn.commit()
         conn.close()
 
-    def save_matches(self, matches: List[Dict]):
-        conn = sqlite3.connect(self.db_path)
-        # We use INSERT OR REPLACE to update existing entries
-        # Ensure match_name is passed
-        conn.executemany("""
-            UPDATE master 
-            SET team1=:team1, team2=:team2, winner=:winner, venue=:venue, match_name=:match_name
-            WHERE match_id=:match_id
-        """, matches)
-        
-        # For new records or if update missed (though we initialized with migration)
-        # It's better to use INSERT OR REPLACE but we need to list all cols.
-        # Since we added a col via ALTER, existing rows have NULL.
-        # The UPDATE above handles it.
-        # But for full upsert:
-        conn.executemany("""
-            INSERT OR REPLACE INTO master (match_id, team1, team2, winner, venue, match_name)
-            VALUES (:match_id, :team1, :team2, :winner, :venue, :match_name)
-        """, matches)
-        
-        conn.commit()
-        conn.close()
+    def save_matches(self, matches: List[Dict], failed: Dict[int, str] = None, state: Dict = None,
+                     unfinished=()):
+        # One upsert pass over all rows, in one transaction.
+        # Matches whose page failed are only checkpointed as failed (retried next run),
+        # unfinished ones as pending, unchanged ones aren't rewritten.
+        failed = failed or {}
+        writer = db.BatchWriter(db.connect(self.db_path))
+        for data in matches:
+            mid = int(data["match_id"])
+            if mid in failed:
+                crawl_state.mark_failed(writer, mid, "match_details", failed[mid])
+            else:
+                crawl_state.save_stage(writer, state or {}, mid, "match_details", data, save_match_details,
+                                       mid not in unfinished)
+        writer.close()
+        print(f"💾 {writer.stats()}")
 
     def display(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = db.connect(self.db_path)
         rows = conn.execute("SELECT * FROM master").fetchall()
         print("\n" + "="*120)
         print(f"{'ID':<10} {'MATCH':<15} {'TEAM 1':<20} {'TEAM 2':<20} {'WINNER':<20} {'VENUE'}")
@@ -268,10 +294,32 @@ class SportsMatchRecords:
         print("="*120)
         conn.close()
 
+_scraper = None
+
+def save_match_details(cursor, match_id, data):
+    cursor.execute(UPSERT_MATCH_SQL, data)
+
+# Teams and venue are saved as soon as the page is up, the winner once there is one
+@register("match", "match_details", save=save_match_details, complete=match_finished)
+def extract_match_details(soup, match_id) -> Dict:
+    global _scraper
+    if _scraper is None:
+        _scraper = SportsMatchScraper()
+    return _scraper.parse_match_details(match_id, soup)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape teams, venue and winner of every match in the frontier.")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+
+    records = SportsMatchRecords()
+    crawl_state.init_db()
+    state = crawl_state.load(["match_details"])
+    
     scraper = SportsMatchScraper()
-    data = scraper.scrape()
+    data = scraper.scrape(crawl_state.pending(frontier.match_ids(), ["match_details"], state))
     
-    db = SportsMatchRecords()
-    db.save_matches(data)
-    db.display()
+    records.save_matches(data, scraper.failed, state, scraper.unfinished)
+    records.display()
@@ -1,48 +1,39 @@
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import sqlite3
-import time
 import re
 
-# List of matches provided by the user
-MATCH_IDS = [
-    116441, 121389, 121400, 121406, 133000, 133011, 133017, 
-    137826, 137831, 140537, 140548, 140559
-]
-
-DB_PATH = "cricbuzz.db"
-
-# Known Roles to check for suffix
-# Longer matches first
-KNOWN_ROLES = [
-    "Batting Allrounder", 
-    "Bowling Allrounder", 
-    "WK-Batter", 
-    "Batter", 
-    "Bowler",
-    "Head Coach",
-    "Assistant coach",
-    "Fielding Coach",
-    "Batting Coach",
-    "Bowling Coach",
-    "Coach"
-]
+import config
+import crawl_state
+import db
+import frontier
+import migrate
+import normalize
+import profiling
+import revalidation
+from crawler import crawl
+from fetcher import NOT_MODIFIED
+from extractors import register, page_url
+from parsing import make_soup
+
+DB_PATH = config.DB_PATH
 
 def init_db():
+    migrate.migrate(DB_PATH)
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
-    # Drop to schema change
-    cursor.execute("DROP TABLE IF EXISTS players")
-    cursor.execute("DROP TABLE IF EXISTS match_squads")
-    
     # Create Players Table
+    # (birth_date, birth_place, country are filled in by enrich_players.py,
+    # so the table is never dropped here)
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS players (
         player_id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
-        role TEXT
+        role TEXT,
+        birth_date TEXT,
+        birth_place TEXT,
+        country TEXT
     )
     """)
     
@@ -55,6 +46,7 @@ def init_db():
         team TEXT NOT NULL,
         is_captain INTEGER DEFAULT 0,
         is_vice_captain INTEGER DEFAULT 0,
+        is_wicket_keeper INTEGER DEFAULT 0,
         PRIMARY KEY (match_id, player_id),
         FOREIGN KEY (match_id) REFERENCES master(match_id),
         FOREIGN KEY (player_id) REFERENCES players(player_id)
@@ -68,7 +60,7 @@ def extract_teams_from_title(title):
     try:
         if " vs " in title:
             parts = title.split(" vs ")
-            team1 = parts[0].strip()
+            team1 = normalize.team(parts[0]) or ""
             remainder = parts[1]
             separators = [",", "Squads", "Scorecard", "Live", "Match", "1st", "2nd", "3rd", "4th", "5th", "T20I", "ODI", "Test"]
             idx = len(remainder)
@@ -77,116 +69,159 @@ def extract_teams_from_title(title):
                     i = remainder.find(sep)
                     if i != -1 and i < idx:
                         idx = i
-            team2 = remainder[:idx].strip()
+            team2 = normalize.team(remainder[:idx]) or ""
             return team1, team2
     except:
         pass
     return "Unknown A", "Unknown B"
 
-def parse_name_role(full_text):
-    """
-    Separates 'Kristian ClarkeBowler' -> 'Kristian Clarke', 'Bowler'
-    """
-    full_text = full_text.strip()
+def process_col(col, match_id, team_name):
+    rows = []
+    links = col.find_all("a", href=re.compile(r"/profiles/"))
     
-    # Check for roles at the end of the string
-    found_role = None
-    name_part = full_text
+    for i, link in enumerate(links):
+        if i >= 11: break
+        
+        href = link['href']
+        full_text = link.get_text().strip()
+        
+        name, role = normalize.name_role(full_text)
+        
+        # Debug print occasionally
+        if i == 0:
+            print(f"   Sample: '{full_text}' -> Name: '{name}', Role: '{role}'")
+        
+        m = re.search(r"/profiles/(\d+)/", href)
+        if m:
+            rows.append((int(match_id), int(m.group(1)), name, role, team_name))
+    return rows
+
+# player_id -> (name, role) of what players holds, loaded on first use.
+# A player appears in hundreds of squads but rarely changes, so only new or
+# changed players are written. Rows queued but not flushed yet are tracked
+# separately and only move into _known_players once their batch commits.
+_known_players = None
+_queued_players = {}
+
+def known_players():
+    global _known_players
+    if _known_players is None:
+        conn = db.connect()
+        _known_players = {pid: (name, role) for pid, name, role in conn.execute(
+            "SELECT player_id, name, role FROM players")}
+        conn.close()
+    return _known_players
+
+def reset_known_players(empty=False):
+    """Forget the cached players, e.g. when writing to another DB (`empty` if it has none yet)."""
+    global _known_players
+    _known_players = {} if empty else None
+    _queued_players.clear()
+
+def changed_players(rows):
+    """(player_id, name, role) of the squad rows that differ from players."""
+    known = known_players()
+    changed = {}
+    for mid, p_id, name, role, team_name in rows:
+        prev = _queued_players.get(p_id) or known.get(p_id)
+        # What the upsert below leaves in the table: a missing role keeps the old one
+        if role is None and prev is not None:
+            role = prev[1]
+        value = (name, role)
+        if prev != value:
+            _queued_players[p_id] = value
+            changed[p_id] = (p_id, name, role)
+    return list(changed.values())
+
+def _players_flushed(batch):
+    def done(committed):
+        known = known_players()
+        for p_id, value in batch.items():
+            if committed:
+                known[p_id] = value
+            if _queued_players.get(p_id) == value:
+                del _queued_players[p_id]
+    return done
+
+def save_squad(cursor, match_id, rows):
+    # Insert Player (Update role if missing or changed); enriched columns are kept
+    players = changed_players(rows)
+    if players:
+        # Registered first: the executemany below may be what flushes the batch
+        cursor.after_flush(_players_flushed({p_id: _queued_players[p_id] for p_id, _, _ in players}))
+    cursor.executemany("""
+        INSERT INTO players (player_id, name, role) 
+        VALUES (?, ?, ?)
+        ON CONFLICT(player_id) DO UPDATE SET role=COALESCE(excluded.role, role), name=excluded.name
+    """, players)
     
-    for role in KNOWN_ROLES:
-        # Check if text ends with this role
-        # Case insensitive check? Or exact? 
-        # The text usually matches case e.g. "Batter"
-        if full_text.endswith(role):
-            found_role = role
-            # Remove role from end
-            name_part = full_text[:-len(role)].strip()
-            break
-            
-    return name_part, found_role
+    # Insert Squad (V2: match_players)
+    cursor.executemany("""
+        INSERT OR IGNORE INTO match_players (match_id, player_id, team)
+        VALUES (?, ?, ?)
+    """, [(mid, p_id, team_name) for mid, p_id, name, role, team_name in rows])
+
+# The title (team names) and the two team columns are all we read
+SQUAD_REGIONS = ["title", "div.w-1/2"]
+
+@register("squads", "squad", save=save_squad, regions=SQUAD_REGIONS)
+def extract_squad(soup, match_id):
+    """Rows of (match_id, player_id, name, role, team) for both playing XIs."""
+    title = soup.title.string if soup.title else ""
+    t1_name, t2_name = extract_teams_from_title(title)
+    
+    cols = soup.find_all("div", class_="w-1/2")
+    
+    if len(cols) < 2:
+        return []
+    
+    return process_col(cols[0], match_id, t1_name) + process_col(cols[1], match_id, t2_name)
 
 def scrape_squads():
     init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
+    crawl_state.init_db()
+    state = crawl_state.load(["squad"])
+    writer = db.BatchWriter()
+    revalidate = revalidation.Revalidation("squads", lambda mid: crawl_state.is_done(state, mid, "squad"))
     
-    for match_id in MATCH_IDS:
+    def handle(match_id, r):
         print(f"Processing Match ID: {match_id}...")
         
-        url = f"https://www.cricbuzz.com/cricket-match-squads/{match_id}/squads"
-        
         try:
-            r = requests.get(url, headers=headers)
+            if r.status_code == NOT_MODIFIED:
+                print("   ⏭️ Unchanged since last run.")
+                return
             if r.status_code != 200:
                 print(f"❌ Failed to fetch page. Status: {r.status_code}")
-                continue
+                crawl_state.mark_failed(writer, match_id, "squad", f"HTTP {r.status_code}")
+                return
                 
-            soup = BeautifulSoup(r.text, "html.parser")
-            
-            title = soup.title.string if soup.title else ""
-            t1_name, t2_name = extract_teams_from_title(title)
+            soup = make_soup(r.text, regions=SQUAD_REGIONS)
             
-            # Clean names just in case
-            t1_name = t1_name.replace("Cricket match squads | ", "")
-            t2_name = t2_name.replace("Cricket match squads | ", "")
+            rows = extract_squad(soup, match_id)
+            crawl_state.save_stage(writer, state, match_id, "squad", rows, save_squad)
+            revalidate.save(writer, r)
+            if not rows:
+                return
             
-            cols = soup.find_all("div", class_="w-1/2")
-            
-            if len(cols) < 2:
-                continue
-            
-            def process_col(col, team_name):
-                count = 0
-                links = col.find_all("a", href=re.compile(r"/profiles/"))
-                
-                for i, link in enumerate(links):
-                    if i >= 11: break
-                    
-                    href = link['href']
-                    full_text = link.get_text().strip()
-                    
-                    name, role = parse_name_role(full_text)
-                    
-                    # Debug print occasionally
-                    if i == 0:
-                        print(f"   Sample: '{full_text}' -> Name: '{name}', Role: '{role}'")
-                    
-                    m = re.search(r"/profiles/(\d+)/", href)
-                    if m:
-                        p_id = int(m.group(1))
-                        
-                        # Insert Player (Update role if missing or changed)
-                        cursor.execute("""
-                            INSERT INTO players (player_id, name, role) 
-                            VALUES (?, ?, ?)
-                            ON CONFLICT(player_id) DO UPDATE SET role=excluded.role, name=excluded.name
-                        """, (p_id, name, role))
-                        
-                        # Insert Squad (V2: match_players)
-                        cursor.execute("""
-                            INSERT OR IGNORE INTO match_players (match_id, player_id, team)
-                            VALUES (?, ?, ?)
-                        """, (int(match_id), p_id, team_name))
-                        count += 1
-                return count
-
-            process_col(cols[0], t1_name)
-            process_col(cols[1], t2_name)
-            
-            print(f"   ✅ Processed {t1_name} & {t2_name}")
-            
-            conn.commit()
-            time.sleep(1.0)
+            teams = sorted({row[4] for row in rows})
+            print(f"   ✅ Processed {' & '.join(teams)}")
             
         except Exception as e:
             print(f"❌ Error processing {match_id}: {e}")
+            crawl_state.mark_failed(writer, match_id, "squad", e)
 
-    conn.close()
-    print("Done.")
+    todo = crawl_state.pending(frontier.match_ids(), ["squad"], state)
+    jobs = [(match_id, page_url("squads", match_id)) for match_id in todo]
+    crawl(jobs, handle, timeout=15, revalidation=revalidate)
+
+    writer.close()
+    print(f"Done. {writer.stats()}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the playing XIs of every match in the frontier.")
+    parser.add_argument("--profile", action="store_true", help="profile each stage (see profiling.py)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
     scrape_squads()
@@ -0,0 +1,312 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for cricbuzz.com, for load tests at any scale.
+#
+#   python3 stub_server.py --matches 10000 --players 20000 --latency 80 --error-rate 0.02
+#   CRICBUZZ_BASE_URL=http://127.0.0.1:8080 CRICBUZZ_HOST_RATE=1000 python3 discover.py
+#   CRICBUZZ_BASE_URL=http://127.0.0.1:8080 CRICBUZZ_HOST_RATE=1000 python3 ingest.py
+#
+# Serves match, scorecard, squads and profile pages with the markup the
+# extractors read, plus schedule / series pages listing every match so
+# discover.py can fill the frontier. Pages are generated from the match or
+# player ID with a seeded RNG: the same URL always returns the same page,
+# and nothing is held in memory whatever the counts.
+#
+# Pages carry an ETag (a hash of the page), and a request whose If-None-Match
+# matches it gets a 304, like a CDN in front of the real site.
+# GET /__stats returns request counts per page type and status as JSON.
+
+FIRST_MATCH_ID = 100001
+FIRST_PLAYER_ID = 1001
+SERIES_SIZE = 20  # matches per series page
+
+TEAMS = [
+    "India", "Australia", "England", "New Zealand", "South Africa", "Pakistan",
+    "Sri Lanka", "Bangladesh", "West Indies", "Afghanistan", "Ireland", "Zimbabwe",
+    "Netherlands", "Scotland", "Nepal", "Oman",
+]
+FORMATS = ["T20I", "ODI", "Test"]
+ORDINALS = ["1st", "2nd", "3rd", "4th", "5th"]
+ROLES = ["Batter", "Bowler", "Batting Allrounder", "Bowling Allrounder", "WK-Batter"]
+FIRST_NAMES = ["Aarav", "Ben", "Chris", "Dinesh", "Ethan", "Faf", "Glenn", "Hasan", "Imran", "Jos",
+               "Kane", "Liam", "Mitchell", "Nathan", "Ollie", "Pat", "Quinton", "Rashid", "Steve", "Tom"]
+LAST_NAMES = ["Smith", "Khan", "Sharma", "Taylor", "Root", "Williamson", "Starc", "Perera", "Rahman",
+              "Holder", "Stirling", "Ervine", "Edwards", "Leask", "Paudel", "Ilyas", "Cummins", "Latham"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August",
+          "September", "October", "November", "December"]
+
+PAGE_RE = re.compile(r"^/(live-cricket-scorecard|live-cricket-scores|cricket-match-squads|profiles)/(\d+)(?:/|$)")
+SERIES_RE = re.compile(r"^/cricket-series/(\d+)/")
+LIST_PREFIXES = ("/cricket-schedule", "/cricket-match/live-scores", "/cricket-scorecard-archives")
+
+PAGE_TYPES = {
+    "live-cricket-scorecard": "scorecard",
+    "live-cricket-scores": "match",
+    "cricket-match-squads": "squads",
+    "profiles": "profile",
+}
+
+
+class Site:
+    """Deterministic synthetic site: everything is derived from (seed, id)."""
+
+    def __init__(self, matches: int, players: int, seed: int = 0):
+        self.matches = matches
+        self.players = max(players, len(TEAMS) * 11)
+        self.seed = seed
+        self.pool = self.players // len(TEAMS)  # players per team
+
+    def rng(self, kind: str, i: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{i}")
+
+    def is_match(self, mid: int) -> bool:
+        return FIRST_MATCH_ID <= mid < FIRST_MATCH_ID + self.matches
+
+    def is_player(self, pid: int) -> bool:
+        return FIRST_PLAYER_ID <= pid < FIRST_PLAYER_ID + self.pool * len(TEAMS)
+
+    # --- Data ---
+
+    def player_name(self, pid: int) -> str:
+        rng = self.rng("player", pid)
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {pid}"
+
+    def player_role(self, pid: int) -> str:
+        return self.rng("player", pid).choice(ROLES)
+
+    def fixture(self, mid: int):
+        """(team1, team2, match_name, venue) of a match."""
+        rng = self.rng("match", mid)
+        t1, t2 = rng.sample(range(len(TEAMS)), 2)
+        name = f"{rng.choice(ORDINALS)} {rng.choice(FORMATS)}"
+        return t1, t2, name, f"{TEAMS[rng.randrange(len(TEAMS))]} Stadium {mid % 97}"
+
+    def xi(self, mid: int, team: int):
+        """Player IDs of a team's playing XI in a match; captain first, keeper second."""
+        base = FIRST_PLAYER_ID + team * self.pool
+        return [base + i for i in self.rng(f"xi{team}", mid).sample(range(self.pool), 11)]
+
+    # --- Pages ---
+
+    def title(self, mid: int, suffix: str) -> str:
+        t1, t2, name, _ = self.fixture(mid)
+        return f"{TEAMS[t1]} vs {TEAMS[t2]}, {name} {suffix}"
+
+    def result(self, mid: int) -> str:
+        t1, t2, _, _ = self.fixture(mid)
+        rng = self.rng("result", mid)
+        winner = TEAMS[rng.choice((t1, t2))]
+        return f"{winner} won by {rng.randint(1, 150)} runs"
+
+    def link(self, pid: int, text: str = None) -> str:
+        slug = self.player_name(pid).lower().replace(" ", "-")
+        return f'<a href="/profiles/{pid}/{slug}" class="cb-link-undrln">{text or self.player_name(pid)}</a>'
+
+    def page(self, title: str, body: str) -> str:
+        # Some filler so pages are closer to real ones in size
+        filler = "".join(f'<div class="cb-nav-item">Menu {i}</div>' for i in range(40))
+        return (f"<html><head><title>{title}</title><style>.x{{color:red}}</style></head>"
+                f"<body><nav>{filler}</nav>{body}<script>var cb = {{}};</script></body></html>")
+
+    def match_page(self, mid: int) -> str:
+        t1, t2, _, venue = self.fixture(mid)
+        pom = self.rng("pom", mid).choice(self.xi(mid, t1) + self.xi(mid, t2))
+        body = (
+            f'<a href="/venues/{mid % 97}/stadium">{venue}</a>'
+            f'<div class="cb-col cb-col-100 cb-min-stts cb-text-complete">{self.result(mid)}</div>'
+            f'<div class="cb-mo-ply-id"><span class="cb-text-gray">PLAYER OF THE MATCH</span>{self.link(pom)}</div>'
+        )
+        return self.page(f"Cricket commentary | {self.title(mid, '- Live Cricket Score')}", body)
+
+    def scorecard_page(self, mid: int) -> str:
+        t1, t2, _, _ = self.fixture(mid)
+        rng = self.rng("scorecard", mid)
+        rows = []
+        for bat, bowl in ((t1, t2), (t2, t1)):
+            rows.append('<div class="scorecard-bat-grid"><div>Batter</div><div>R</div><div>B</div>'
+                        '<div>4s</div><div>6s</div><div>SR</div></div>')
+            for i, pid in enumerate(self.xi(mid, bat)):
+                balls = rng.randint(1, 60)
+                runs = rng.randint(0, balls * 2)
+                marker = " (c)" if i == 0 else " (wk)" if i == 1 else " (vc)" if i == 2 else ""
+                rows.append(
+                    f'<div class="grid scorecard-bat-grid"><div>{self.link(pid, self.player_name(pid) + marker)}'
+                    f'<div>c X b Y</div></div><div>{runs}</div><div>{balls}</div><div>{runs // 8}</div>'
+                    f'<div>{runs // 20}</div><div>{runs * 100 / balls:.2f}</div></div>'
+                )
+            rows.append('<div class="grid scorecard-bat-grid"><div>Extras</div><div>7</div><div></div>'
+                        '<div></div><div></div><div></div></div>')
+            rows.append('<div class="scorecard-bowl-grid"><div>Bowler</div><div>O</div><div>M</div>'
+                        '<div>R</div><div>W</div><div>NB</div><div>WD</div><div>ECO</div></div>')
+            for pid in self.xi(mid, bowl)[6:]:
+                overs, runs = rng.randint(1, 4), rng.randint(10, 50)
+                rows.append(
+                    f'<div class="grid scorecard-bowl-grid">{self.link(pid)}<div>{overs}</div><div>{rng.randint(0, 1)}</div>'
+                    f'<div>{runs}</div><div>{rng.randint(0, 4)}</div><div>{rng.randint(0, 2)}</div>'
+                    f'<div>{rng.randint(0, 3)}</div><div>{runs / overs:.1f}</div></div>'
+                )
+        body = f'<div class="cb-text-complete">{self.result(mid)}</div>' + "".join(rows)
+        return self.page(self.title(mid, "- Scorecard"), body)
+
+    def squads_page(self, mid: int) -> str:
+        t1, t2, _, _ = self.fixture(mid)
+        cols = []
+        for team in (t1, t2):
+            links = "".join(self.link(pid, self.player_name(pid) + self.player_role(pid)) for pid in self.xi(mid, team))
+            cols.append(f'<div class="w-1/2">{links}</div>')
+        return self.page(f"Cricket match squads | {self.title(mid, 'Squads')}", "".join(cols))
+
+    def profile_page(self, pid: int) -> str:
+        rng = self.rng("profile", pid)
+        team = (pid - FIRST_PLAYER_ID) // self.pool
+        born = f"{rng.choice(MONTHS)} {rng.randint(1, 28):02d}, {rng.randint(1980, 2004)}"
+        body = (
+            f'<h1>{self.player_name(pid)}</h1><span class="text-base text-gray-800">{TEAMS[team]}</span>'
+            f'<div><div>Born</div><div>{born} (30 years)</div></div>'
+            f'<div><div>Birth Place</div><div>City {pid % 500}, {TEAMS[team]}</div></div>'
+            f'<div><div>Role</div><div>{self.player_role(pid)}</div></div>'
+        )
+        return self.page(f"{self.player_name(pid)} Profile - Cricbuzz", body)
+
+    def list_page(self) -> str:
+        # Schedule / results / archive pages: one link per series
+        series = (self.matches + SERIES_SIZE - 1) // SERIES_SIZE
+        links = "".join(f'<a href="/cricket-series/{s}/series-{s}">Series {s}</a>' for s in range(1, series + 1))
+        return self.page("Cricket Schedule", links)
+
+    def series_page(self, series: int) -> str:
+        first = FIRST_MATCH_ID + (series - 1) * SERIES_SIZE
+        mids = [m for m in range(first, first + SERIES_SIZE) if self.is_match(m)]
+        links = "".join(f'<a href="/live-cricket-scores/{m}/match">{self.title(m, "")}</a>' for m in mids)
+        return self.page(f"Series {series} matches", links)
+
+    def render(self, path: str):
+        """(page_type, html), or (page_type, None) for an unknown page."""
+        m = PAGE_RE.match(path)
+        if m:
+            page_type, i = PAGE_TYPES[m.group(1)], int(m.group(2))
+            if page_type == "profile":
+                return page_type, self.profile_page(i) if self.is_player(i) else None
+            if not self.is_match(i):
+                return page_type, None
+            return page_type, {"scorecard": self.scorecard_page, "match": self.match_page,
+                               "squads": self.squads_page}[page_type](i)
+        m = SERIES_RE.match(path)
+        if m:
+            return "series", self.series_page(int(m.group(1)))
+        if path.startswith(LIST_PREFIXES):
+            return "list", self.list_page()
+        return "other", None
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Set by serve()
+    site: Site = None
+    latency = 0.0  # seconds
+    jitter = 0.0
+    error_rate = 0.0
+    error_codes = [500]
+    stats = Counter()
+    stats_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def count(self, page_type: str, status: int):
+        with self.stats_lock:
+            self.stats[f"{page_type} {status}"] += 1
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/__stats":
+            with self.stats_lock:
+                stats = dict(sorted(self.stats.items()))
+            self.send(200, json.dumps(stats, indent=2), "application/json")
+            return
+
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        page_type, html = self.site.render(path)
+        if html is None:
+            self.count(page_type, 404)
+            self.send(404, "<html><body>Page not found</body></html>")
+            return
+        if random.random() < self.error_rate:
+            status = random.choice(self.error_codes)
+            self.count(page_type, status)
+            headers = {"Retry-After": "1"} if status in (429, 503) else None
+            self.send(status, f"<html><body>Error {status}</body></html>", headers=headers)
+            return
+        etag = '"' + hashlib.sha1(html.encode("utf-8")).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.count(page_type, 304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.count(page_type, 200)
+        self.send(200, html, headers={"ETag": etag})
+
+
+def make_server(host, port, site, latency_ms=0, jitter_ms=0, error_rate=0.0, error_codes=None) -> ThreadingHTTPServer:
+    """Server for `site`, not yet started (port 0 = any free port)."""
+    Handler.site = site
+    Handler.latency = latency_ms / 1000
+    Handler.jitter = jitter_ms / 1000
+    Handler.error_rate = error_rate
+    Handler.error_codes = error_codes or [500]
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(host, port, site, latency_ms=0, jitter_ms=0, error_rate=0.0, error_codes=None):
+    server = make_server(host, port, site, latency_ms, jitter_ms, error_rate, error_codes)
+    print(f"🏏 Stub Cricbuzz on http://{host}:{port}: {site.matches} matches "
+          f"({FIRST_MATCH_ID}-{FIRST_MATCH_ID + site.matches - 1}), "
+          f"{site.pool * len(TEAMS)} players, latency {latency_ms}±{jitter_ms} ms, error rate {error_rate:.1%}")
+    print(f"   export CRICBUZZ_BASE_URL=http://{host}:{port} CRICBUZZ_HOST_RATE=1000")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {dict(sorted(Handler.stats.items()))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic Cricbuzz pages for load testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--matches", type=int, default=10000, help=f"number of matches, IDs from {FIRST_MATCH_ID} (default 10000)")
+    parser.add_argument("--players", type=int, default=20000, help="size of the player pool (default 20000)")
+    parser.add_argument("--seed", type=int, default=0, help="change to get a different but still repeatable site")
+    parser.add_argument("--latency", type=float, default=0, help="added delay per request in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="random ± variation of the delay in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of page requests answered with an error")
+    parser.add_argument("--error-codes", type=int, nargs="+", default=[500, 502, 503, 429],
+                        help="statuses to inject (default 500 502 503 429)")
+    args = parser.parse_args()
+    serve(args.host, args.port, Site(args.matches, args.players, args.seed),
+          args.latency, args.jitter, args.error_rate, args.error_codes)
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Before any module reads config: nothing touches the real DB, caches or the network
+_scratch = tempfile.mkdtemp(prefix="cricbuzz-tests-")
+os.environ.update({
+    "CRICBUZZ_DB": os.path.join(_scratch, "cricbuzz.db"),
+    "CRICBUZZ_CACHE": "0",
+    "CRICBUZZ_PAGE_ARCHIVE": "0",
+    "CRICBUZZ_METRICS": "0",
+    "CRICBUZZ_HTTP_MODE": "live",
+    "CRICBUZZ_HOST_RATE": "1000",
+    "CRICBUZZ_HOST_BURST": "100",
+    "CRICBUZZ_RETRY_BASE_DELAY": "0.01",
+    "CRICBUZZ_FORCE": "0",
+})
+
+import config  # noqa: E402
+import stub_server  # noqa: E402
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    """A fresh SQLite file as the DB of every module, for one test."""
+    path = str(tmp_path / "cricbuzz.db")
+    monkeypatch.setattr(config, "DB_PATH", path)
+    for module in list(sys.modules.values()):
+        if getattr(module, "__file__", None) and os.path.dirname(os.path.abspath(module.__file__)) == ROOT:
+            if hasattr(module, "DB_PATH"):
+                monkeypatch.setattr(module, "DB_PATH", path)
+    # Connections opened on the previous test's DB
+    dead_letter = sys.modules.get("dead_letter")
+    if dead_letter:
+        monkeypatch.setattr(dead_letter, "_conn", None)
+        monkeypatch.setattr(dead_letter, "_urls", None)
+    return path
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """stub_server on a free port, as config.BASE_URL; yields the Site."""
+    site = stub_server.Site(matches=6, players=200)
+    stub_server.Handler.stats.clear()
+    server = stub_server.make_server("127.0.0.1", 0, site)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(config, "BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    yield site
+    server.shutdown()
+    server.server_close()
+
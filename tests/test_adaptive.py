@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+import aiohttp
+import pytest
+
+import adaptive
+import config
+import extractors
+import fetcher
+import stub_server
+from crawler import Crawler
+
+
+@pytest.fixture
+def full_window(stub, monkeypatch):
+    """The stub host's window (one slot, taken) and token bucket (one token)."""
+    monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY", False)
+    monkeypatch.setattr(adaptive, "_windows", {})
+    monkeypatch.setattr(fetcher, "_buckets", {})
+    url = extractors.page_url("match", stub_server.FIRST_MATCH_ID)
+    window = adaptive.window_for(url, 1)
+    fetcher._buckets[window.host] = bucket = fetcher.TokenBucket(rate=1.0, burst=1)
+    window.acquire()
+    return url, window, bucket
+
+
+def test_blocked_request_holds_no_token(full_window):
+    url, window, bucket = full_window
+    pages = []
+    thread = threading.Thread(target=lambda: pages.append(fetcher.fetch(url)), daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    # Waiting on the window: the token is still there for whoever gets the slot
+    tokens = bucket.tokens
+    window.release(None, None)
+    thread.join(5)
+
+    assert tokens == 1
+    assert pages[0].status_code == 200
+    assert bucket.tokens < 1
+
+
+def test_blocked_async_request_holds_no_token(full_window):
+    url, window, bucket = full_window
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            task = asyncio.ensure_future(Crawler(1)._get(session, url))
+            await asyncio.sleep(0.2)
+            tokens = bucket.tokens
+            window.release(None, None)
+            return tokens, await asyncio.wait_for(task, 5)
+
+    tokens, (status, _, _, _) = asyncio.run(run())
+    assert tokens == 1
+    assert status == 200
+    assert bucket.tokens < 1
@@ -0,0 +1,65 @@
+import config
+import crawl_state
+import db
+import sports_records  # noqa: F401  (registers match_details)
+from extractors import records_of, run_extractors
+
+LIVE_PAGE = """<html><head><title>Cricket commentary | India vs Australia, 3rd T20I - Live Cricket Score</title></head>
+<body><a href="/venues/1/wankhede">Wankhede Stadium</a>
+<div class="cb-text-inprogress">Australia need 42 runs in 30 balls</div></body></html>"""
+
+FINISHED_PAGE = LIVE_PAGE.replace(
+    '<div class="cb-text-inprogress">Australia need 42 runs in 30 balls</div>',
+    '<div class="cb-col cb-min-stts cb-text-complete">India won by 12 runs</div>')
+
+ABANDONED_PAGE = LIVE_PAGE.replace(
+    '<div class="cb-text-inprogress">Australia need 42 runs in 30 balls</div>',
+    '<div class="cb-text-abandon">Match abandoned due to rain</div>')
+
+
+def save_match_page(html, match_id=1):
+    crawl_state.init_db()
+    sports_records.SportsMatchRecords(config.DB_PATH)
+    records, complete = records_of(run_extractors("match", match_id, html)["match_details"])
+    state = crawl_state.load(["match_details"])
+    writer = db.BatchWriter()
+    crawl_state.save_stage(writer, state, match_id, "match_details", records,
+                           sports_records.save_match_details, complete)
+    writer.close()
+    return records, crawl_state.load(["match_details"])
+
+
+def test_live_match_is_saved_but_stays_pending(tmp_db):
+    records, state = save_match_page(LIVE_PAGE)
+    assert records["winner"] is None
+    assert state[(1, "match_details")].status == crawl_state.PENDING
+    assert not crawl_state.is_done(state, 1, "match_details")
+    assert crawl_state.pending([1], ["match_details"], state, force=False) == [1]
+
+    conn = db.connect()
+    assert conn.execute("SELECT team1, team2, winner FROM master").fetchall() == [("India", "Australia", None)]
+    conn.close()
+
+
+def test_finished_match_is_done(tmp_db):
+    save_match_page(LIVE_PAGE)
+    records, state = save_match_page(FINISHED_PAGE)
+    assert records["winner"] == "India"
+    assert state[(1, "match_details")].status == crawl_state.DONE
+    assert crawl_state.pending([1], ["match_details"], state, force=False) == []
+
+
+def test_abandoned_match_is_done(tmp_db):
+    records, state = save_match_page(ABANDONED_PAGE)
+    assert records["winner"] == "Abandoned"
+    assert state[(1, "match_details")].status == crawl_state.DONE
+
+
+def test_unchanged_pending_records_are_not_rewritten(tmp_db):
+    save_match_page(LIVE_PAGE)
+    state = crawl_state.load(["match_details"])
+    records, complete = records_of(run_extractors("match", 1, LIVE_PAGE)["match_details"])
+    writer = db.BatchWriter()
+    assert not crawl_state.save_stage(writer, state, 1, "match_details", records,
+                                      sports_records.save_match_details, complete)
+    writer.close()
@@ -0,0 +1,14 @@
+import db
+
+
+def test_batch_writer_counts_rows_actually_written(tmp_db):
+    writer = db.BatchWriter(db.connect(tmp_db))
+    writer.conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    writer.executemany("INSERT OR IGNORE INTO t (id, v) VALUES (?, ?)", [(1, "a"), (2, "b"), (1, "dup")])
+    writer.execute("UPDATE t SET v = 'c' WHERE id = ?", (3,))  # matches nothing
+    writer.execute("UPDATE t SET v = 'c' WHERE id = ?", (2,))
+    writer.execute("DELETE FROM t WHERE id = ?", (1,))
+    writer.close()
+
+    assert dict(writer.rows) == {"t": 3}
+    assert writer.flushes == 1 and writer.failed == 0
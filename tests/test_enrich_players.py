@@ -0,0 +1,33 @@
+import db
+import enrich_players
+import squads
+import stub_server
+
+PLAYER = stub_server.FIRST_PLAYER_ID
+UNKNOWN = 999999  # the stub has no profile: 404
+UNREACHABLE = PLAYER + 1  # fetch raises (connection refused)
+
+
+def test_init_db_on_a_fresh_db(tmp_db):
+    enrich_players.init_db()
+    conn = db.connect()
+    assert conn.execute("SELECT COUNT(*) FROM enrichment").fetchone() == (0,)
+    conn.close()
+
+
+def test_every_player_without_a_result_backs_off(tmp_db, stub, monkeypatch):
+    squads.init_db()
+    conn = db.connect()
+    with conn:
+        conn.executemany("INSERT INTO players (player_id, name) VALUES (?, ?)",
+                         [(pid, stub.player_name(pid)) for pid in (PLAYER, UNKNOWN, UNREACHABLE)])
+    profile_url = enrich_players.profile_url
+    monkeypatch.setattr(enrich_players, "profile_url", lambda pid, name: (
+        f"http://127.0.0.1:1/profiles/{pid}" if pid == UNREACHABLE else profile_url(pid, name)))
+
+    enrich_players.main(force=False)
+
+    ledger = dict(conn.execute("SELECT player_id, outcome || '/' || failures FROM enrichment"))
+    assert ledger == {PLAYER: "ok/0", UNKNOWN: "failed/1", UNREACHABLE: "failed/1"}
+    assert enrich_players.get_players_due() == []
+    conn.close()
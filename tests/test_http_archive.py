@@ -0,0 +1,44 @@
+import pytest
+
+import config
+import extractors
+import fetcher
+import http_archive
+import stub_server
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch, stub):
+    monkeypatch.setattr(config, "ARCHIVE_PATH", str(tmp_path / "http_archive.db"))
+    monkeypatch.setattr(config, "HTTP_MODE", "record")
+    monkeypatch.setattr(http_archive, "_archive", None)
+    recorded = http_archive.get_archive()
+    yield recorded
+    recorded.close()
+
+
+def test_recording_never_archives_a_304(archive, stub):
+    url = extractors.page_url("squads", stub_server.FIRST_MATCH_ID)
+    page = fetcher.fetch(url)
+    etag = page.validator[0]
+
+    # A revalidation while recording fetches the full page
+    again = fetcher.fetch(url, headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert stub_server.Handler.stats["squads 304"] == 0
+
+    fetcher.store_response(url, fetcher.NOT_MODIFIED, {"ETag": etag}, "")
+    status, headers, text = archive.get(url)
+    assert status == 200 and text == page.text
+
+
+def test_replay_answers_304_only_to_a_matching_conditional_request(archive, stub, monkeypatch):
+    url = extractors.page_url("squads", stub_server.FIRST_MATCH_ID)
+    recorded = fetcher.fetch(url)
+    monkeypatch.setattr(config, "HTTP_MODE", "replay")
+
+    assert fetcher.fetch(url).text == recorded.text
+    assert fetcher.fetch(url, headers={"If-None-Match": recorded.validator[0]}).status_code == fetcher.NOT_MODIFIED
+    stale = fetcher.fetch(url, headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200 and stale.text == recorded.text
+    assert fetcher.fetch(extractors.page_url("squads", 1)).status_code == http_archive.MISSING_STATUS
@@ -0,0 +1,39 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import config
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(config, "METRICS_ENABLED", True)
+    metrics.drain()
+    yield
+    metrics.drain()
+
+
+def _record_and_drain():
+    metrics.inc("http_requests_total", host="h", status=200, source="network")
+    return metrics.drain()
+
+
+def counter(data, name):
+    return sum(v for (n, _), v in data["counters"].items() if n == name)
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_forked_worker_drains_only_its_own_numbers():
+    # The parent has already counted some requests when the pool forks
+    metrics.inc("http_requests_total", 5, host="h", status=200, source="network")
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("fork")) as pool:
+        first = pool.submit(_record_and_drain).result()
+        second = pool.submit(_record_and_drain).result()
+    assert counter(first, "http_requests_total") == 1
+    assert counter(second, "http_requests_total") == 1
+
+    metrics.merge(first)
+    metrics.merge(second)
+    assert counter(metrics.drain(), "http_requests_total") == 7
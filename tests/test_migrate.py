@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+import awards
+import config
+import extract_captains
+import migrate
+import scorecard
+import squads
+from sports_records import SportsMatchRecords
+
+
+def version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("init_db", [
+    squads.init_db, scorecard.init_db, awards.init_db, extract_captains.init_db,
+    lambda: SportsMatchRecords(config.DB_PATH),
+])
+def test_standalone_init_db_stamps_a_fresh_db(tmp_db, init_db):
+    init_db()
+    assert version(tmp_db) == migrate.latest()
+
+
+def test_init_db_migrates_an_unversioned_db(tmp_db):
+    # match_players as the pre-keeper scripts left it, leaders still around
+    conn = sqlite3.connect(tmp_db)
+    conn.executescript("""
+        CREATE TABLE match_players (match_id INTEGER, player_id INTEGER, team TEXT NOT NULL,
+                                    is_captain INTEGER DEFAULT 0, is_vice_captain INTEGER DEFAULT 0,
+                                    PRIMARY KEY (match_id, player_id));
+        CREATE TABLE leaders (match_id INTEGER, team TEXT, player_id INTEGER, player_name TEXT, role TEXT);
+        INSERT INTO match_players (match_id, player_id, team) VALUES (1, 10, 'India'), (1, 11, 'India');
+        INSERT INTO leaders VALUES (1, 'India', 11, 'A Captain', 'captain');
+    """)
+    conn.close()
+
+    extract_captains.init_db()
+
+    conn = sqlite3.connect(tmp_db)
+    assert "is_wicket_keeper" in migrate.columns(conn, "match_players")
+    assert "leaders" not in migrate.tables(conn)
+    assert conn.execute("SELECT player_id FROM match_players WHERE is_captain = 1").fetchall() == [(11,)]
+    conn.close()
+    assert version(tmp_db) == migrate.latest()
@@ -0,0 +1,27 @@
+import db
+import normalize
+import squads
+
+
+def test_bulk_pass_splits_legacy_role_suffixes(tmp_db):
+    squads.init_db()
+    conn = db.connect()
+    with conn:
+        conn.executemany("INSERT INTO players (player_id, name, role, birth_date) VALUES (?, ?, ?, ?)", [
+            (1, "Kristian ClarkeBowler", None, None),
+            (2, "Jos Buttler (c)WK-Batter", "Batter", "September 08, 1990 (35 years)"),
+            (3, "Virat Kohli", "Batter", "05/11/1988"),
+        ])
+
+    changed = normalize.normalize_db(tmp_db)
+
+    assert changed["players (role suffixes)"] == 2
+    assert changed["players"] == 1  # only Buttler's date; the names are clean after the split
+    assert conn.execute("SELECT player_id, name, role, birth_date FROM players ORDER BY player_id").fetchall() == [
+        (1, "Kristian Clarke", "Bowler", None),
+        (2, "Jos Buttler", "WK-Batter", "08/09/1990"),
+        (3, "Virat Kohli", "Batter", "05/11/1988"),
+    ]
+    # A second pass has nothing left to do
+    assert set(normalize.normalize_db(tmp_db).values()) == {0}
+    conn.close()
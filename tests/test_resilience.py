@@ -0,0 +1,102 @@
+import pytest
+
+import config
+import dead_letter
+import extractors
+import fetcher
+import metrics
+import resilience
+import stub_server
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(config, "METRICS_ENABLED", True)
+    metrics.drain()
+    yield
+    metrics.drain()
+
+
+def retry_reasons():
+    return {dict(labels)["reason"] for (name, labels) in metrics.drain()["counters"] if name == "retries_total"}
+
+
+def test_retry_reason_is_the_exception_type():
+    retry = resilience.Retry("http://example.test/x")
+    retry.failed(exc=ConnectionError("Cannot connect to host example.test:443 [Errno 111] Connection refused"))
+    # The full error is kept for the dead letter
+    assert "Errno 111" in retry.error
+    retry.failed(status=503)
+    assert retry_reasons() == {"ConnectionError", "503"}
+
+
+@pytest.fixture
+def breaker_config(monkeypatch):
+    monkeypatch.setattr(config, "BREAKER_FAILURES", 2)
+    monkeypatch.setattr(config, "BREAKER_COOLDOWN", 0.05)
+    monkeypatch.setattr(config, "BREAKER_MAX_WAIT", 60.0)
+
+
+def served(status):
+    return sum(n for key, n in stub_server.Handler.stats.items() if key.endswith(f" {status}"))
+
+
+def test_breaker_waits_are_not_attempts(tmp_db, stub, breaker_config, monkeypatch):
+    # Every request fails: the breaker opens after 2, yet all attempts are sent
+    monkeypatch.setattr(stub_server.Handler, "error_rate", 1.0)
+    url = extractors.page_url("match", stub_server.FIRST_MATCH_ID)
+
+    page = fetcher.fetch(url)
+
+    assert page.status_code == 500
+    assert served(500) == config.RETRY_ATTEMPTS
+    assert dead_letter.urls() == [url]
+
+
+def test_open_breaker_gives_up_after_max_wait(tmp_db, stub, breaker_config, monkeypatch):
+    monkeypatch.setattr(config, "BREAKER_COOLDOWN", 30.0)
+    monkeypatch.setattr(config, "BREAKER_MAX_WAIT", 1.0)
+    url = extractors.page_url("match", stub_server.FIRST_MATCH_ID)
+    breaker = resilience.breaker_for(url)
+    for _ in range(config.BREAKER_FAILURES):
+        breaker.record_failure()
+
+    with pytest.raises(resilience.GaveUp, match=resilience.CIRCUIT_OPEN):
+        fetcher.fetch(url)
+    assert served(200) == served(500) == 0
+    assert dead_letter.urls() == [url]
+
+
+def test_probe_that_raises_hands_on_the_probe(tmp_db, stub, breaker_config, monkeypatch):
+    url = extractors.page_url("match", stub_server.FIRST_MATCH_ID)
+    breaker = resilience.breaker_for(url)
+    for _ in range(config.BREAKER_FAILURES):
+        breaker.record_failure()
+    breaker.opened_at -= config.BREAKER_COOLDOWN  # cooldown over: the next request probes
+
+    real_get = fetcher._get
+
+    def broken_get(*args, **kwargs):
+        raise RuntimeError("parser blew up")
+
+    monkeypatch.setattr(fetcher, "_get", broken_get)
+    with pytest.raises(RuntimeError):
+        fetcher.fetch(url)
+    assert breaker.state == breaker.OPEN
+
+    monkeypatch.setattr(fetcher, "_get", real_get)
+    assert fetcher.fetch(url).status_code == 200
+    assert breaker.state == breaker.CLOSED
+
+
+def test_retry_all_resolves_every_final_answer(tmp_db, stub):
+    found = extractors.page_url("match", stub_server.FIRST_MATCH_ID)
+    gone = extractors.page_url("match", 1)  # 404
+    dead = "http://127.0.0.1:1/live-cricket-scores/1/match"
+    for url in (found, gone, dead):
+        dead_letter.add(url, 503, "HTTP 503", config.RETRY_ATTEMPTS)
+
+    dead_letter.retry_all()
+
+    assert dead_letter.urls() == [dead]
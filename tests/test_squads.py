@@ -0,0 +1,61 @@
+import pytest
+
+import db
+import squads
+
+
+def squad(*players):
+    return [(100, pid, name, role, "India") for pid, name, role in players]
+
+
+@pytest.fixture
+def writer(tmp_db):
+    squads.init_db()
+    squads.reset_known_players(empty=True)
+    writer = db.BatchWriter(db.connect(tmp_db))
+    yield writer
+    writer.close()
+    squads.reset_known_players()
+
+
+def players(writer):
+    return writer.conn.execute("SELECT player_id, name, role FROM players ORDER BY player_id").fetchall()
+
+
+def test_players_are_known_once_their_batch_commits(writer):
+    squads.save_squad(writer, 100, squad((1, "Virat Kohli", "Batter"), (2, "Jasprit Bumrah", "Bowler")))
+    assert squads.known_players() == {}
+
+    writer.flush()
+    assert squads.known_players() == {1: ("Virat Kohli", "Batter"), 2: ("Jasprit Bumrah", "Bowler")}
+    assert writer.rows["players"] == 2
+
+
+def test_unchanged_players_are_not_rewritten(writer):
+    squads.save_squad(writer, 100, squad((1, "Virat Kohli", "Batter")))
+    writer.flush()
+    # Same player in the next match; no role on this page keeps the stored one
+    squads.save_squad(writer, 101, squad((1, "Virat Kohli", "Batter"), (3, "KL Rahul", None)))
+    squads.save_squad(writer, 102, squad((1, "Virat Kohli", None)))
+    writer.flush()
+
+    assert writer.rows["players"] == 2
+    assert players(writer) == [(1, "Virat Kohli", "Batter"), (3, "KL Rahul", None)]
+
+
+def test_renamed_player_is_written(writer):
+    squads.save_squad(writer, 100, squad((1, "V Kohli", "Batter")))
+    squads.save_squad(writer, 101, squad((1, "Virat Kohli", None)))
+    writer.flush()
+
+    assert players(writer) == [(1, "Virat Kohli", "Batter")]
+    assert squads.known_players()[1] == ("Virat Kohli", "Batter")
+
+
+def test_known_players_are_loaded_from_the_table(writer):
+    squads.save_squad(writer, 100, squad((1, "Virat Kohli", "Batter")))
+    writer.flush()
+    squads.reset_known_players()
+
+    assert squads.known_players() == {1: ("Virat Kohli", "Batter")}
+    assert squads.changed_players(squad((1, "Virat Kohli", "Batter"))) == []
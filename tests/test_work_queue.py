@@ -0,0 +1,34 @@
+import db
+import work_queue
+
+
+def status(conn, match_id, stage):
+    return conn.execute("SELECT status, worker FROM work_queue WHERE match_id=? AND stage=?",
+                        (match_id, stage)).fetchone()
+
+
+def test_only_the_lease_holder_finishes_a_job(tmp_db):
+    work_queue.init_db()
+    work_queue.enqueue([(1, "squads"), (1, "match")])
+    assert work_queue.claim("a", 10) == {1: ["squads", "match"]}
+
+    # a's lease runs out and b claims the match
+    conn = db.connect()
+    with conn:
+        conn.execute("UPDATE work_queue SET lease_expires = 0")
+    assert work_queue.claim("b", 10) == {1: ["squads", "match"]}
+
+    assert not work_queue.renew(conn, "a", 1)
+    with conn:
+        work_queue.finish(conn, "a", 1, "squads")
+        work_queue.finish(conn, "a", 1, "match", error="timeout")
+    assert status(conn, 1, "squads") == ("leased", "b")
+    assert status(conn, 1, "match") == ("leased", "b")
+
+    assert work_queue.renew(conn, "b", 1)
+    with conn:
+        work_queue.finish(conn, "b", 1, "squads")
+        work_queue.finish(conn, "b", 1, "match", error="timeout")
+    assert status(conn, 1, "squads") == ("done", "b")
+    assert status(conn, 1, "match") == ("queued", None)
+    conn.close()
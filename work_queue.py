@@ -0,0 +1,195 @@
+import os
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import config
+import db
+
+# Leased work queue for running ingest on several machines at once.
+#
+# Jobs are (match_id, stage) rows, where stage is a page type ("squads",
+# "match", "scorecard"). A worker claims whole matches: every open stage of a
+# match is leased to it for LEASE_SECONDS, so the pages of one match are
+# still saved together and in order (see ingest.MatchWriter).
+#
+#   queued  --claim-->  leased  --finish(ok)-->   done
+#                         |     --finish(fail)--> queued again, or failed after MAX_ATTEMPTS
+#                         '-- lease expires (worker died) --> claimable again
+#
+# A heartbeat thread keeps the leases of a live worker from expiring.
+# Only the current lease holder can finish a job: a worker whose lease
+# expired and was reclaimed finds out in renew() before saving the match,
+# and its finish() no longer matches the row. Saves are idempotent anyway
+# (scorecards and awards are replaced per match, squads are upserts).
+#
+# The queue lives in the main DB file. For workers on different machines
+# put the DB on a shared file system and set CRICBUZZ_DB_JOURNAL=DELETE:
+# WAL only works between processes on the same host.
+
+LEASE_SECONDS = config.LEASE_SECONDS
+MAX_ATTEMPTS = 5
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def init_db():
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS work_queue (
+            match_id INTEGER,
+            stage TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER DEFAULT 0,
+            last_error TEXT,
+            updated_at REAL,
+            PRIMARY KEY (match_id, stage)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_work_queue_status ON work_queue (status, lease_expires)")
+    conn.commit()
+    conn.close()
+
+
+def enqueue(jobs: Iterable[tuple], requeue: bool = False) -> int:
+    """
+    Add (match_id, stage) jobs. Jobs already in the queue are left alone,
+    unless `requeue` is set: then finished ones are queued again.
+    """
+    conn = db.connect()
+    now = time.time()
+    on_conflict = "DO UPDATE SET status='queued', attempts=0, updated_at=excluded.updated_at WHERE status != 'leased'" if requeue else "DO NOTHING"
+    with conn:
+        before = conn.total_changes
+        conn.executemany(f"""
+            INSERT INTO work_queue (match_id, stage, status, updated_at)
+            VALUES (?, ?, 'queued', ?)
+            ON CONFLICT(match_id, stage) {on_conflict}
+        """, [(mid, stage, now) for mid, stage in jobs])
+        added = conn.total_changes - before
+    conn.close()
+    return added
+
+
+def claim(worker: str, matches: int) -> Dict[int, List[str]]:
+    """
+    Lease every open stage of up to `matches` matches to `worker`.
+    Open = queued, or leased by someone whose lease has expired.
+    Returns match_id -> stages.
+    """
+    conn = db.connect(isolation_level=None)
+    now = time.time()
+    # IMMEDIATE takes the write lock up front, so two workers can't claim the same rows
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        open_ = "(status = 'queued' OR (status = 'leased' AND lease_expires < :now))"
+        rows = conn.execute(f"""
+            SELECT match_id, stage FROM work_queue
+            WHERE {open_} AND match_id IN (
+                SELECT DISTINCT match_id FROM work_queue WHERE {open_}
+                ORDER BY match_id LIMIT :n
+            )
+        """, {"now": now, "n": matches}).fetchall()
+        conn.executemany("""
+            UPDATE work_queue
+            SET status='leased', worker=?, lease_expires=?, attempts=attempts + 1, updated_at=?
+            WHERE match_id=? AND stage=?
+        """, [(worker, now + LEASE_SECONDS, now, mid, stage) for mid, stage in rows])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    claimed = {}
+    for mid, stage in rows:
+        claimed.setdefault(mid, []).append(stage)
+    return claimed
+
+
+def renew(conn, worker: str, match_id: int) -> bool:
+    """
+    Extend `worker`'s leases on a match, right before its rows are saved.
+    False if the lease was lost (expired and claimed by another worker).
+    """
+    now = time.time()
+    with conn:
+        cur = conn.execute("""
+            UPDATE work_queue SET lease_expires=?, updated_at=?
+            WHERE match_id=? AND worker=? AND status='leased'
+        """, (now + LEASE_SECONDS, now, int(match_id), worker))
+    return cur.rowcount > 0
+
+
+def finish(cursor, worker: str, match_id: int, stage: str, error: str = None):
+    """
+    Mark a job done (or failed), through the same cursor / batch as its rows.
+    A no-op unless `worker` still holds the lease.
+    """
+    now = time.time()
+    if error is None:
+        cursor.execute("""
+            UPDATE work_queue SET status='done', lease_expires=NULL, last_error=NULL, updated_at=?
+            WHERE match_id=? AND stage=? AND worker=? AND status='leased'
+        """, (now, int(match_id), stage, worker))
+    else:
+        cursor.execute("""
+            UPDATE work_queue
+            SET status=CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                worker=NULL, lease_expires=NULL, last_error=?, updated_at=?
+            WHERE match_id=? AND stage=? AND worker=? AND status='leased'
+        """, (MAX_ATTEMPTS, str(error), now, int(match_id), stage, worker))
+
+
+def counts() -> Dict[str, int]:
+    conn = db.connect()
+    rows = conn.execute("SELECT status, COUNT(*) FROM work_queue GROUP BY status").fetchall()
+    conn.close()
+    return dict(rows)
+
+
+class Heartbeat:
+    """Extends the worker's leases every LEASE_SECONDS / 3 until stopped."""
+
+    def __init__(self, worker: str):
+        self.worker = worker
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        conn = db.connect()
+        while not self.stopped.wait(LEASE_SECONDS / 3):
+            with conn:
+                conn.execute("""
+                    UPDATE work_queue SET lease_expires=?
+                    WHERE worker=? AND status='leased'
+                """, (time.time() + LEASE_SECONDS, self.worker))
+        conn.close()
+
+
+def in_shard(match_id: int, shard: str) -> bool:
+    """Deterministic split without a shared queue: shard "k/N" owns match_id % N == k - 1."""
+    k, n = parse_shard(shard)
+    return match_id % n == k - 1
+
+
+def parse_shard(shard: str):
+    k, _, n = shard.partition("/")
+    k, n = int(k), int(n)
+    if not 1 <= k <= n:
+        raise ValueError(f"Bad shard {shard!r}: expected k/N with 1 <= k <= N")
+    return k, n